@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from typing import List
 from typing import Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from schemas.bdcs import BDCIn, OMCIn, BDCOMCOut, BDCOMCAllOut,DelMessage
+from schemas.bdcs import BDCIn, OMCIn, BDCOMCOut, BDCOMCAllOut,DelMessage, MasterDataSync
 from controller.bdcs_omcs import BDCOMCController
 from utils.auth import AuthToken, bearerschema
+from utils.reference_cache import cached_json_response
+from utils.session import get_async_db_session, get_db_session
 
 
 
@@ -14,51 +18,55 @@ bdc_omc_router = APIRouter()
 
 
 @bdc_omc_router.post("/bdcs", response_model=BDCOMCOut, description="Add a new BDC, requires system admin privileges")
-async def add_bdc(bdc_data: BDCIn, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    bdc = BDCOMCController.add_bdc_omc(bdc_data)
+async def add_bdc(bdc_data: BDCIn, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    bdc = BDCOMCController.add_bdc_omc(bdc_data, db_session)
     return bdc
 
 @bdc_omc_router.post("/omcs", response_model=BDCOMCOut, description="Add a new OMC, requires system admin privileges")
-async def add_omc(omc_data: OMCIn, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    omc = BDCOMCController.add_bdc_omc(omc_data)
+async def add_omc(omc_data: OMCIn, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    omc = BDCOMCController.add_bdc_omc(omc_data, db_session)
     return omc
 
 
 @bdc_omc_router.get("/bdcs_omcs", response_model=Union[BDCOMCAllOut, List[BDCOMCOut]], description="Get all BDCs and OMCs, both system admin and users can access this endpoint")
-async def all_bdcs_omcs(param: Optional[str] = None):
-    bdcs_omcs = BDCOMCController.all_bdcs_omcs(param)
-    return bdcs_omcs
+async def all_bdcs_omcs(request: Request, param: Optional[str] = None, db_session: AsyncSession = Depends(get_async_db_session)):
+    bdcs_omcs = await BDCOMCController.all_bdcs_omcs(param, db_session)
+    return cached_json_response(request, bdcs_omcs)
 
 
 @bdc_omc_router.delete("/bdcs/{bdc_id}", response_model=DelMessage, description="Delete a BDC by ID, requires system admin privileges")
-async def delete_bdc(bdc_id: int, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    bdc = BDCOMCController.delete_bdc_omc(bdc_id, None)
+async def delete_bdc(bdc_id: int, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    bdc = BDCOMCController.delete_bdc_omc(bdc_id, None, db_session)
     return bdc
 
 @bdc_omc_router.delete("/omcs/{omc_id}", response_model=DelMessage, description="Delete a OMC by ID, requires system admin privileges")
-async def delete_omc(omc_id: int, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    omc = BDCOMCController.delete_bdc_omc(None, omc_id)
+async def delete_omc(omc_id: int, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    omc = BDCOMCController.delete_bdc_omc(None, omc_id, db_session)
     return omc
 
-@bdc_omc_router.get("/omcs/sync", response_model=DelMessage, description="Sync OMCs with the database, requires system admin privileges")
+@bdc_omc_router.get("/omcs/sync", response_model=MasterDataSync, description="Sync OMCs with the database, requires system admin privileges; dry_run only reports the changes")
 async def sync_omcs(
-    bearer_token=Depends(bearerschema)
+    dry_run: bool = False,
+    bearer_token=Depends(bearerschema),
+    db_session: Session = Depends(get_db_session),
     ):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    omc = BDCOMCController.sync_omcs()
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    omc = BDCOMCController.sync_omcs(dry_run)
     return omc
 
 
-@bdc_omc_router.get("/bdcs/sync", description="Sync BDCs with the database, requires system admin privileges")
+@bdc_omc_router.get("/bdcs/sync", response_model=MasterDataSync, description="Sync BDCs with the database, requires system admin privileges; dry_run only reports the changes")
 async def sync_bdcs(
-    bearer_token=Depends(bearerschema)
+    dry_run: bool = False,
+    bearer_token=Depends(bearerschema),
+    db_session: Session = Depends(get_db_session),
     ):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    bdc = BDCOMCController.sync_bdcs()
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    bdc = BDCOMCController.sync_bdcs(dry_run)
     return bdc
 
 
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from controller.bootstrap import BootstrapController
+from schemas.bootstrap import Bootstrap, ReferenceChanges
+from utils.reference_cache import cached_json_response
+from utils.session import get_async_db_session
+
+
+bootstrap_router = APIRouter()
+
+
+@bootstrap_router.get("/bootstrap", response_model=Bootstrap)
+async def get_bootstrap(request: Request, db_session: AsyncSession = Depends(get_async_db_session)):
+    """Get the bootstrap bundle
+    This method returns the BDCs, OMCs, stations and products in one gzipped,
+    ETagged response; send the ETag back in If-None-Match to get a 304 when nothing changed
+    """
+    return cached_json_response(request, await BootstrapController.get_bootstrap(db_session))
+
+
+@bootstrap_router.get("/bootstrap/changes", response_model=ReferenceChanges)
+async def get_changes(since: Optional[datetime] = None, db_session: AsyncSession = Depends(get_async_db_session)):
+    """Get the reference data changes since a cursor
+    This method returns the BDCs, OMCs, stations and products inserted, updated or
+    soft-deleted since the cursor of the previous call; rows near the cursor may be
+    sent twice, so apply them as upserts
+    """
+    return await BootstrapController.get_changes(since, db_session)
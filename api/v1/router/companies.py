@@ -2,15 +2,18 @@ from fastapi import APIRouter, Depends
 
 from controller.companies import CompanyController
 from schemas.companies import CompanyIn, CompanyOut, CompanyUpdate
+from sqlalchemy.orm import Session
+
 from utils.auth import AuthToken, bearerschema
+from utils.session import get_db_session
 
 
 
-def verify_system_admin(bearer_token=Depends(bearerschema)):
+def verify_system_admin(bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
     """Verify System Admin
     This method verifies if the user is a system admin
     """
-    AuthToken.verify_system_admin(bearer_token.credentials)
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
 
 company_router = APIRouter()
 company_router.dependencies.append(Depends(verify_system_admin))
@@ -18,37 +21,37 @@ company_router.dependencies.append(Depends(verify_system_admin))
 
 
 @company_router.post("/companies", response_model=CompanyOut, description="Add a new company, requires system admin privileges")
-def add_company(company_data: CompanyIn):
+def add_company(company_data: CompanyIn, db_session: Session = Depends(get_db_session)):
     """Add Company
     This method adds a company to the database
     """
-    company = CompanyController.add_company(company_data)
+    company = CompanyController.add_company(company_data, db_session)
     return company
 
 
 @company_router.get("/companies/{company_id}", response_model=CompanyOut, description="Get a company by ID, requires system admin privileges")
-def get_company(company_id: str):
+def get_company(company_id: str, db_session: Session = Depends(get_db_session)):
     """Get Company
     This method returns a company from the database
     """
-    company = CompanyController.get_company(company_id)
+    company = CompanyController.get_company(company_id, db_session)
     return company
 
 @company_router.get("/companies", response_model=list[CompanyOut], description="Get all companies, requires system admin privileges")
-def get_all_companies():
+def get_all_companies(db_session: Session = Depends(get_db_session)):
     """Get All Companies
     This method returns all companies from the database
     """
-    companies = CompanyController.get_all_companies()
+    companies = CompanyController.get_all_companies(db_session)
     return companies
 
 
 @company_router.put("/companies/{company_id}", response_model=CompanyOut, description="Update a company by ID, requires system admin privileges")
-def update_company(company_id: str, company_data: CompanyUpdate):
+def update_company(company_id: str, company_data: CompanyUpdate, db_session: Session = Depends(get_db_session)):
     """Update Company
     This method updates a company in the database
     """
-    company = CompanyController.update_company(company_id, company_data)
+    company = CompanyController.update_company(company_id, company_data, db_session)
     return company
 
 
@@ -1,10 +1,18 @@
-from typing import Union
+from typing import List, Union
 
 import fastapi
 from fastapi import responses
 
+from api.v1.router.companies import verify_system_admin
 from config.setting import Settings
-from schemas.health import Health, Status
+from core import setup
+from controller.sync import SyncController, company_config_cache
+from schemas.health import CacheStats, CompanyLinkStats, Health, MasterDataSyncRunStats, PoolStats, SchedulerStatus, Status, SyncOutboxStats
+from models.master_data_sync import MasterDataSyncRun
+from services.scheduler import coordinator
+from utils.session import CreateDBSession
+from services.sync_dispatcher import dispatcher
+from utils.auth import identity_cache
 
 """
 This health router is used to check the health of the application
@@ -37,4 +45,76 @@ async def get_health(
         "releaseId": settings.releaseId,
     }
 
-    return content
\ No newline at end of file
+    return content
+
+
+@health_router.get("/health/db-pool", response_model=PoolStats, dependencies=[fastapi.Depends(verify_system_admin)])
+async def get_db_pool_stats() -> dict:
+    """Database pool statistics
+    This method returns connection pool usage for this worker, requires system admin privileges
+    """
+    return setup.database.pool_stats()
+
+
+
+@health_router.get("/health/async-db-pool", response_model=PoolStats, dependencies=[fastapi.Depends(verify_system_admin)])
+async def get_async_db_pool_stats() -> dict:
+    """Async database pool statistics
+    This method returns asyncio connection pool usage for this worker, requires system admin privileges
+    """
+    return setup.async_database.pool_stats()
+
+
+
+@health_router.get("/health/auth-cache", response_model=CacheStats, dependencies=[fastapi.Depends(verify_system_admin)])
+async def get_auth_cache_stats() -> dict:
+    """Token verification cache statistics
+    This method returns hit and miss counters for this worker, requires system admin privileges
+    """
+    return identity_cache.stats()
+
+
+
+@health_router.get("/health/sync-outbox", response_model=SyncOutboxStats, dependencies=[fastapi.Depends(verify_system_admin)])
+def get_sync_outbox_stats() -> dict:
+    """Sync outbox statistics
+    This method returns the queue depth and the age of the oldest pending item, requires system admin privileges
+    """
+    return SyncController.outbox_stats()
+
+
+
+@health_router.get("/health/sync-companies", response_model=List[CompanyLinkStats], dependencies=[fastapi.Depends(verify_system_admin)])
+async def get_sync_company_stats() -> list:
+    """Company endpoint statistics
+    This method returns the circuit state, latency and rate limit per company endpoint for this worker, requires system admin privileges
+    """
+    return dispatcher.stats()
+
+
+
+@health_router.get("/health/scheduler", response_model=SchedulerStatus, dependencies=[fastapi.Depends(verify_system_admin)])
+def get_scheduler_status() -> dict:
+    """Scheduler leadership
+    This method returns which node holds the scheduler lease and whether it is this worker, requires system admin privileges
+    """
+    return coordinator.status()
+
+
+
+@health_router.get("/health/company-config-cache", response_model=CacheStats, dependencies=[fastapi.Depends(verify_system_admin)])
+async def get_company_config_cache_stats() -> dict:
+    """Company config cache statistics
+    This method returns hit and miss counters of the sync endpoint config cache for this worker, requires system admin privileges
+    """
+    return company_config_cache.stats()
+
+
+
+@health_router.get("/health/master-data-sync", response_model=List[MasterDataSyncRunStats], dependencies=[fastapi.Depends(verify_system_admin)])
+def get_master_data_sync_runs(limit: int = fastapi.Query(20, ge=1, le=200)) -> list:
+    """Master data sync runs
+    This method returns the duration, bytes fetched and outcome of the latest BDC, OMC and station syncs, requires system admin privileges
+    """
+    with CreateDBSession() as db_session:
+        return [MasterDataSyncRunStats.model_validate(run) for run in MasterDataSyncRun.recent(db_session, limit)]
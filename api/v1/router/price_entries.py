@@ -1,6 +1,12 @@
-from fastapi import APIRouter, Depends,  UploadFile, File, Form
+from fastapi import APIRouter, Depends,  UploadFile, File, Form, Response
+from fastapi.responses import StreamingResponse
 from typing import Union, Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
 from utils.auth import bearerschema, AuthToken
+from errors.exception import AuthException
+from utils.session import get_async_db_session, get_db_session
 from schemas.price_entry import SellerType
 from fastapi.background import BackgroundTasks
 
@@ -17,6 +23,10 @@ from schemas.price_entry import (
     OMCPriceEntryOut,
     BDCPriceEntryOut,
     OMCBDCFilterParams,
+    PriceEntryExportParams,
+    PriceImportReport,
+    ImageUploadsIn,
+    PresignedUrlItem,
     TransactionTerm,
     WindowType,
     DelResponse,
@@ -34,24 +44,71 @@ price_entry_router = APIRouter()
     response_model=Union[List[OMCPriceEntryOut], List[BDCPriceEntryOut]],
 )
 async def get_price_entries(
-    params: OMCBDCFilterParams = Depends(), bearer_token=Depends(bearerschema)
+    response: Response,
+    params: OMCBDCFilterParams = Depends(), bearer_token=Depends(bearerschema),
+    db_session: AsyncSession = Depends(get_async_db_session),
 ):
-    user_info = AuthToken.verify_user_token(bearer_token.credentials)
-    price_entries = PriceEntryController.get_price_entries(
-        params, user_info.id)
+    user_info = await AuthToken.verify_user_token_async(bearer_token.credentials, db_session)
+    price_entries, next_cursor = await PriceEntryController.get_price_entries(
+        params, user_info.id, db_session)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return price_entries
 
 
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@price_entry_router.get("/price_entries/export", response_class=StreamingResponse)
+def export_price_entries(
+    params: PriceEntryExportParams = Depends(), bearer_token=Depends(bearerschema),
+    db_session: Session = Depends(get_db_session),
+):
+    user_info = AuthToken.verify_user_token(bearer_token.credentials, db_session)
+    chunks = PriceEntryController.export_price_entries(params, user_info)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="price_entries.{params.format}"'},
+    )
+
+
+
+@price_entry_router.post("/price_entries/import", response_model=PriceImportReport)
+def import_price_entries(
+    file: UploadFile = File(..., description="CSV or XLSX file, one product price per row"),
+    bearer_token=Depends(bearerschema),
+    db_session: Session = Depends(get_db_session),
+):
+    user_info = AuthToken.verify_user_token(bearer_token.credentials, db_session)
+    if not user_info.is_admin:
+        raise AuthException("You are not authorized to import price entries")
+    return PriceEntryController.import_price_entries(user_info, file.file, file.filename, db_session)
+
+
+
+@price_entry_router.post("/price_entries/images/presigned", response_model=List[PresignedUrlItem])
+async def get_presigned_upload_urls(
+    upload_data: ImageUploadsIn, bearer_token=Depends(bearerschema),
+    db_session: AsyncSession = Depends(get_async_db_session),
+):
+    """Get presigned PUT URLs to upload price entry images straight to S3,
+    then pass the returned image keys as price_entries_image_keys"""
+    user_info = await AuthToken.verify_user_token_async(bearer_token.credentials, db_session)
+    return PriceEntryController.get_presigned_url(user_info.id, upload_data.images)
+
+
 
 @price_entry_router.get(
     "/price_entries/{price_entry_id}",
     response_model=Union[OMCPriceEntryOut, BDCPriceEntryOut],
 )
 async def get_price_entry_by_id(
-    price_entry_id: int, bearer_token=Depends(bearerschema)
+    price_entry_id: int, bearer_token=Depends(bearerschema),
+    db_session: AsyncSession = Depends(get_async_db_session),
 ):
-    AuthToken.verify_user_token(bearer_token.credentials)
-    price_entry = PriceEntryController.get_price_entry(price_entry_id)
+    await AuthToken.verify_user_token_async(bearer_token.credentials, db_session)
+    price_entry = await PriceEntryController.get_price_entry(price_entry_id, db_session)
     return price_entry
 
 
@@ -67,7 +124,9 @@ async def add_omc_price_entry(
     product_type: str = Form(...),
     product_price: str = Form(...),
     price_entries_images: List[UploadFile] = File(None),
+    price_entries_image_keys: List[str] = Form(None),
     bearer_token=Depends(bearerschema),
+    db_session: AsyncSession = Depends(get_async_db_session),
 ):
     input_data = {
         "seller_type": seller_type,
@@ -81,9 +140,9 @@ async def add_omc_price_entry(
         },
     }
     price_entry_data = OMCPriceEntryCreate(**input_data)
-    user_info = AuthToken.verify_user_token(bearer_token.credentials)
+    user_info = await AuthToken.verify_user_token_async(bearer_token.credentials, db_session)
     price_entry = await PriceEntryController.add_price_entry(
-        user_info, price_entry_data,bg,  price_entries_images
+        user_info, price_entry_data,bg,  price_entries_images, db_session, price_entries_image_keys
     )
     return price_entry
 
@@ -103,7 +162,9 @@ async def add_bdc_price_entry(
     product_type: str = Form(...),
     product_price: str = Form(...),
     price_entries_images: List[UploadFile] = File(None),
+    price_entries_image_keys: List[str] = Form(None),
     bearer_token=Depends(bearerschema),
+    db_session: AsyncSession = Depends(get_async_db_session),
 ):
     input_data = {
         "seller_type": seller_type,
@@ -121,9 +182,9 @@ async def add_bdc_price_entry(
         },
     }
     price_entry_data = BDCPriceEntryCreate(**input_data)
-    user_info = AuthToken.verify_user_token(bearer_token.credentials)
+    user_info = await AuthToken.verify_user_token_async(bearer_token.credentials, db_session)
     price_entry = await PriceEntryController.add_price_entry(
-        user_info, price_entry_data,bg, price_entries_images
+        user_info, price_entry_data,bg, price_entries_images, db_session, price_entries_image_keys
     )
     return price_entry
 
@@ -141,6 +202,7 @@ async def update_omc_price_entry(
     product_unit_of_measurement: Optional[str] = Form(None),
     new_price_entries_images: List[UploadFile] = File(None),
     bearer_token=Depends(bearerschema),
+    db_session: Session = Depends(get_db_session),
 ):
     input_data = {
         "omc_id": int(omc_id) if omc_id else None,
@@ -154,9 +216,9 @@ async def update_omc_price_entry(
     }
 
     price_entry_data = OMCPriceEntryUpdate(**input_data)
-    AuthToken.verify_user_token(bearer_token.credentials)
+    AuthToken.verify_user_token(bearer_token.credentials, db_session)
     price_entry = await PriceEntryController.update_price_entry(
-        price_entry_data, price_entry_id, "omc", bg, new_price_entries_images
+        price_entry_data, price_entry_id, "omc", bg, new_price_entries_images, db_session
     )
     return price_entry
 
@@ -181,6 +243,7 @@ async def update_bdc_price_entry(
     product_unit_of_measurement: Optional[str] = Form(None),
     new_price_entries_images: List[UploadFile] = File(None),
     bearer_token=Depends(bearerschema),
+    db_session: Session = Depends(get_db_session),
 ):
     
     input_data = {
@@ -200,15 +263,15 @@ async def update_bdc_price_entry(
     
 
     price_entry_data =  BDCPriceEntryUpdate(**input_data)
-    AuthToken.verify_user_token(bearer_token.credentials)
+    AuthToken.verify_user_token(bearer_token.credentials, db_session)
     price_entry = await  PriceEntryController.update_price_entry(
-        price_entry_data, price_entry_id,"bdc", bg, new_price_entries_images
+        price_entry_data, price_entry_id,"bdc", bg, new_price_entries_images, db_session
     )
     return price_entry
 
 @price_entry_router.delete("/price_entries/{price_entry_id}", response_model=DelResponse)
-async def delete_price_entry_image(price_entry_id: int, image_id: int):
-    message = await PriceEntryController.delete_price_entry_image(price_entry_id, image_id)
+async def delete_price_entry_image(price_entry_id: int, image_id: int, db_session: Session = Depends(get_db_session)):
+    message = await PriceEntryController.delete_price_entry_image(price_entry_id, image_id, db_session)
     return message
 
 
@@ -1,9 +1,14 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from controller.products import ProductController
 from schemas.products import Product, ProductIn
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
 from utils.auth import bearerschema, AuthToken
+from utils.reference_cache import cached_json_response
+from utils.session import get_async_db_session, get_db_session
 
 
 def verify_system_admin(bearer_token=Depends(bearerschema)):
@@ -22,41 +27,45 @@ product_router = APIRouter()
 
 @product_router.get("/products", response_model=List[Product])
 async def get_products(
+    request: Request,
     # bearer_token=Depends(bearerschema) 
+    db_session: AsyncSession = Depends(get_async_db_session),
     ):
     """Get all products
-    This method gets all products
+    This method gets all products, answering 304 when If-None-Match has the current ETag
     """
     # AuthToken.verify_user_token(bearer_token.credentials)
-    return ProductController.get_all_products()
+    return cached_json_response(request, await ProductController.get_all_products(db_session))
 
 
 @product_router.get("/products/{product_id}", response_model=Product)
 async def get_product_by_id(product_id: int, 
+                            request: Request,
                             # bearer_token=Depends(bearerschema)
+                            db_session: AsyncSession = Depends(get_async_db_session),
                             ):
     """Get product by id
-    This method gets a product by id
+    This method gets a product by id, answering 304 when If-None-Match has the current ETag
     """
     # AuthToken.verify_user_token(bearer_token.credentials)
-    return ProductController.get_product(product_id)
+    return cached_json_response(request, await ProductController.get_product(product_id, db_session))
 
 
 @product_router.post("/products", response_model=Product)
-async def add_product(product_name: ProductIn, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    return ProductController.add_product(product_name.model_dump())
+async def add_product(product_name: ProductIn, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    return ProductController.add_product(product_name.model_dump(), db_session)
 
 
 @product_router.delete('/products/{id}', response_model=Product)
-async def delete_product(id: int, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    return ProductController.delete_product(id)
+async def delete_product(id: int, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    return ProductController.delete_product(id, db_session)
 
 
 @product_router.put('/products/restore/{id}', response_model=Product)
-async def restore_product(id: int, bearer_token=Depends(bearerschema)):
-    AuthToken.verify_system_admin(bearer_token.credentials)
-    return ProductController.restore_product(id)
+async def restore_product(id: int, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
+    AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    return ProductController.restore_product(id, db_session)
 
 
@@ -1,35 +1,38 @@
 from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from controller.stations import StationController
 from schemas.stations import StationsOut
-from schemas.bdcs import DelMessage
+from schemas.bdcs import MasterDataSync
+from utils.reference_cache import cached_json_response
+from utils.session import get_async_db_session
 
 
 
 
 stations_router = APIRouter()
 
-@stations_router.get("/sync/stations", response_model=DelMessage)
-async def sync_stations():
+@stations_router.get("/sync/stations", response_model=MasterDataSync)
+async def sync_stations(dry_run: bool = False):
     """Sync Stations
-    This method syncs the stations
+    This method syncs the stations, or only reports the changes when dry_run is set
     """
-    return StationController.sync_stations()
+    return StationController.sync_stations(dry_run)
 
 @stations_router.get("/stations", response_model=List[StationsOut])
-async def get_stations():
+async def get_stations(request: Request, db_session: AsyncSession = Depends(get_async_db_session)):
     """Get all stations
-    This method gets all stations
+    This method gets all stations, answering 304 when If-None-Match has the current ETag
     """
-    return StationController.get_stations()
+    return cached_json_response(request, await StationController.get_stations(db_session))
 
 
 
 @stations_router.get("/stations/{station_id}", response_model=StationsOut)
-async def get_station_by_id(station_id: int):
+async def get_station_by_id(station_id: int, request: Request, db_session: AsyncSession = Depends(get_async_db_session)):
     """Get station by id
-    This method gets a station by id
+    This method gets a station by id, answering 304 when If-None-Match has the current ETag
     """
-    return StationController.get_station_by_id(station_id)
\ No newline at end of file
+    return cached_json_response(request, await StationController.get_station_by_id(station_id, db_session))
\ No newline at end of file
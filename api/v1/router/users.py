@@ -7,7 +7,10 @@ from schemas.users import (
     SystemAdminOut,
 )
 from controller.users import UserController
+from sqlalchemy.orm import Session
+
 from utils.auth import bearerschema, AuthToken
+from utils.session import get_db_session
 from errors.exception import AuthException
 
 
@@ -16,11 +19,11 @@ user_router = APIRouter()
 
 
 @user_router.post("/system-admin/login/", response_model=SystemAdminOut, description="Login System Admin")
-async def login_system_admin(data: UserLogin):
+async def login_system_admin(data: UserLogin, db_session: Session = Depends(get_db_session)):
     """Login System Admin
     This method logs in a system admin and returns a token
     """
-    user = UserController.login_system_admin(data)
+    user = UserController.login_system_admin(data, db_session)
     return user
 
 
@@ -34,11 +37,11 @@ async def login_system_admin(data: UserLogin):
 #     return user
 
 @user_router.post("/users/login", response_model=UserLoginOut, description="Login Company Admin, use this endpoint to login users")
-async def login(data: UserLogin):
+async def login(data: UserLogin, db_session: Session = Depends(get_db_session)):
     """Login Company Admin
     This method logs in a company admin and returns a token
     """
-    user = UserController.login(data)
+    user = UserController.login(data, db_session)
     return user
 
 
@@ -57,38 +60,38 @@ async def login(data: UserLogin):
 
 
 @user_router.post("/users", response_model=UserOut, description="Add User(company admin or usual user), requires company admin privileges or system admin privileges")
-async def add_user(data: CompanyUser, bearer_token=Depends(bearerschema)):
+async def add_user(data: CompanyUser, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
     """Add User
     This method adds a user to the database
     """
     if data.is_admin is True:
-        AuthToken.verify_system_admin(bearer_token.credentials)
+        AuthToken.verify_system_admin(bearer_token.credentials, db_session)
     else:
-        company_admin = AuthToken.verify_user_token(bearer_token.credentials)
+        company_admin = AuthToken.verify_user_token(bearer_token.credentials, db_session)
         if not company_admin.is_admin:
             raise AuthException("You are not authorized to add users")
     company_id = data.company_id if data.company_id else company_admin.company_id
     user_data = data.model_dump(exclude_none=True)
     user_data["company_id"] = company_id
-    user = UserController.add_user(data.model_dump())
+    user = UserController.add_user(data.model_dump(), db_session)
     return user
 
 
 
 @user_router.put("/users/{user_id}", response_model=UserOut, description="Update User(company admin or usual user), requires company admin privileges")
-async def update_user(user_id: int, data: CompanyUser, bearer_token=Depends(bearerschema)):
+async def update_user(user_id: int, data: CompanyUser, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
     company_admin = None
-    system_admin = AuthToken.just_verify_system_admin(bearer_token.credentials)
+    system_admin = AuthToken.just_verify_system_admin(bearer_token.credentials, db_session)
     if system_admin:
-        user =UserController.update_user(user_id, data.model_dump(exclude_unset=True), None)
+        user =UserController.update_user(user_id, data.model_dump(exclude_unset=True), None, db_session)
         return user
     else:
-        company_admin = AuthToken.verify_user_token(bearer_token.credentials)
+        company_admin = AuthToken.verify_user_token(bearer_token.credentials, db_session)
         if not company_admin.is_admin:
             raise AuthException("You are not authorized to update users")
     user_data = data.model_dump(exclude_none=True)
     user_data["name"] = None
-    user = UserController.update_user(user_id, user_data, company_admin.company_id if company_admin else None)
+    user = UserController.update_user(user_id, user_data, company_admin.company_id if company_admin else None, db_session)
     return user
 
 
@@ -98,30 +101,30 @@ async def update_user(user_id: int, data: CompanyUser, bearer_token=Depends(bear
 
 
 @user_router.get("/users", response_model=list[UserOut], description="Get all users, requires company admin privileges")
-def get_all_users(bearer_token=Depends(bearerschema), company_id: int = None):
+def get_all_users(bearer_token=Depends(bearerschema), company_id: int = None, db_session: Session = Depends(get_db_session)):
     """Get All Users
     This method returns all users from the database
     """
     if company_id:
-        company_admin = AuthToken.verify_user_token(bearer_token.credentials)
+        company_admin = AuthToken.verify_user_token(bearer_token.credentials, db_session)
         if not company_admin.is_admin or company_id != company_admin.company_id:
             raise AuthException("You are not authorized to get users")
         else:
-            AuthToken.verify_system_admin(bearer_token.credentials)
-    users = UserController.get_all_users(company_id)
+            AuthToken.verify_system_admin(bearer_token.credentials, db_session)
+    users = UserController.get_all_users(company_id, db_session)
     return users
 
 
 
 @user_router.get("/users/{user_id}", response_model=UserOut, description="Get user by ID, requires company  admin or normal user privileges")
-def get_user(user_id: int, bearer_token=Depends(bearerschema)):
+def get_user(user_id: int, bearer_token=Depends(bearerschema), db_session: Session = Depends(get_db_session)):
     """Get User
     This method returns a user from the database
     """
-    user_info = AuthToken.verify_user_token(bearer_token.credentials)
+    user_info = AuthToken.verify_user_token(bearer_token.credentials, db_session)
     if user_info.id != user_id:
         raise AuthException("You are not authorized to get this user")
-    user = UserController.get_user(user_id)
+    user = UserController.get_user(user_id, db_session)
     return user
     
 
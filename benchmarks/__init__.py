@@ -0,0 +1,4 @@
+"""Benchmarks package
+Each module can be run with ``python -m benchmarks.<name>`` against the
+database configured in the .env file.
+"""
@@ -0,0 +1,62 @@
+"""Benchmark concurrent reads on the event loop
+
+Runs the reference-data listing and a user lookup concurrently from
+coroutines, first through the blocking CreateDBSession (what the async
+routers used to do) and then through AsyncCreateDBSession.
+
+    python -m benchmarks.async_db --requests 1000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from models.bdcs import BDC, OMC
+from models.users import User
+from utils.session import AsyncCreateDBSession, CreateDBSession
+
+
+async def blocking_request() -> None:
+    with CreateDBSession() as db:
+        db.execute(select(BDC).filter_by(deleted_at=None)).scalars().all()
+        db.execute(select(OMC).filter_by(deleted_at=None)).scalars().all()
+        db.execute(select(User).limit(1)).scalars().first()
+
+
+async def async_request() -> None:
+    async with AsyncCreateDBSession() as db:
+        (await db.execute(select(BDC).filter_by(deleted_at=None))).scalars().all()
+        (await db.execute(select(OMC).filter_by(deleted_at=None))).scalars().all()
+        (await db.execute(select(User).limit(1))).scalars().first()
+
+
+async def run(name: str, handler, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded() -> None:
+        async with semaphore:
+            await handler()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    rps = requests / elapsed
+    print(f"{name:>8}: {requests} requests in {elapsed:.2f}s -> {rps:.1f} req/s")
+    return rps
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    blocking = await run("blocking", blocking_request, args.requests, args.concurrency)
+    non_blocking = await run("async", async_request, args.requests, args.concurrency)
+    print(f"speedup: {non_blocking / blocking:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
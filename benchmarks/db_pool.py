@@ -0,0 +1,60 @@
+"""Benchmark session creation
+
+Compares requests per second when every CreateDBSession builds a new
+DatabaseSetup (the old behaviour) against the shared process-wide pool.
+A simulated request opens two sessions, like token verification followed
+by a controller call.
+
+    python -m benchmarks.db_pool --requests 2000 --concurrency 16
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from core import setup
+from utils.session import CreateDBSession
+
+
+def legacy_request() -> None:
+    for _ in range(2):
+        db = setup.DatabaseSetup().get_session()()
+        try:
+            db.execute(text("SELECT 1"))
+        finally:
+            db.close()
+
+
+def pooled_request() -> None:
+    for _ in range(2):
+        with CreateDBSession() as db:
+            db.execute(text("SELECT 1"))
+
+
+def run(name: str, handler, requests: int, concurrency: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(handler) for _ in range(requests)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    rps = requests / elapsed
+    print(f"{name:>8}: {requests} requests in {elapsed:.2f}s -> {rps:.1f} req/s")
+    return rps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    legacy = run("legacy", legacy_request, args.requests, args.concurrency)
+    pooled = run("pooled", pooled_request, args.requests, args.concurrency)
+    print(f"speedup: {pooled / legacy:.2f}x")
+    print(f"pool stats: {setup.database.pool_stats()}")
+
+
+if __name__ == "__main__":
+    main()
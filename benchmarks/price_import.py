@@ -0,0 +1,91 @@
+"""Benchmark the bulk price import
+
+Generates a CSV of historical BDC and OMC prices (default 100k rows,
+about 1% of them invalid) and imports it through PriceImport, reporting
+throughput, the error count and the peak Python memory of the run.
+
+    python -m benchmarks.price_import --rows 100000 --batch-size 1000
+"""
+
+import argparse
+import csv
+import io
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from core import setup
+from models.bdcs import BDC, OMC
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from utils.price_import import IMPORT_COLUMNS, PriceImport, read_rows
+from utils.session import CreateDBSession
+
+BDCS = [f"import bench bdc {n}" for n in range(30)]
+OMCS = [f"import bench omc {n}" for n in range(50)]
+STATIONS = [(f"import bench station {n}", "accra") for n in range(200)]
+PRODUCTS = ("petrol", "diesel", "LPG")
+
+
+def seed() -> int:
+    setup.Base.metadata.create_all(setup.database.get_engine)
+    with CreateDBSession() as db:
+        company = Company(name="import bench", api_key="key", api_user="user", api_endpoint="bench.local")
+        user = User(email="import@bench.local", company=company, is_admin=True)
+        db.add_all([company, user])
+        db.add_all(BDC(name=name) for name in BDCS)
+        db.add_all(OMC(name=name) for name in OMCS)
+        db.add_all(Station(name=name, location=location) for name, location in STATIONS)
+        db.commit()
+        return user.id
+
+
+def write_csv(rows: int, file) -> None:
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(IMPORT_COLUMNS)
+    start = date(2022, 1, 1)
+    for n in range(rows):
+        day = (start + timedelta(days=n % 900)).isoformat()
+        window = random.choice(("1st_window", "2nd_window"))
+        product, price = random.choice(PRODUCTS), round(random.uniform(10, 20), 2)
+        if n % 100 == 99:
+            price = -price
+        if n % 2:
+            term = random.choice(("cash", "credit"))
+            credit = (price + 1, 30) if term == "credit" else ("", "")
+            writer.writerow(("bdc", day, window, random.choice(OMCS), random.choice(BDCS), "", "", "Tema", term, product, price, *credit))
+        else:
+            station, location = random.choice(STATIONS)
+            writer.writerow(("omc", day, window, random.choice(OMCS), "", station, location, "", "", product, price, "", ""))
+    text.detach()
+    file.seek(0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    user_id = seed()
+    with tempfile.TemporaryFile() as file:
+        write_csv(args.rows, file)
+        tracemalloc.start()
+        started = time.perf_counter()
+        with CreateDBSession() as db:
+            report = PriceImport(db, user_id, args.batch_size).run(read_rows(file, "prices.csv"))
+            db.commit()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"rows: {report['total_rows']} imported: {report['imported']} failed: {report['failed']}")
+    print(f"elapsed: {elapsed:.2f}s -> {report['total_rows'] / elapsed:.0f} rows/s, peak memory {peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark the price listing filters
+
+Seeds price entries (default one million) for a handful of collectors,
+then records the EXPLAIN plan and the median latency of the listing
+statement for every filter combination PriceEntryQuery supports.
+
+    python -m benchmarks.price_listing_plans --rows 1000000
+    python -m benchmarks.price_listing_plans --skip-seed
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, text
+
+from core import setup
+from models.bdcs import BDC, OMC, PriceEntry, ProductPrice
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from schemas.price_entry import OMCBDCFilterParams
+from utils.price_entry_filter import PriceEntryQuery
+from utils.session import CreateDBSession
+
+USERS = 20
+BATCH = 10000
+PRODUCTS = ("petrol", "diesel", "LPG")
+
+FILTERS = {
+    "default": {},
+    "product_type": {"product_type": "diesel"},
+    "window": {"window": "2nd_window"},
+    "bdc_transaction_term": {"seller_type": "bdc", "transaction_term": "credit"},
+    "created_at_range": {"from_date": "2025-03-01", "to_date": "2025-03-31"},
+    "business_date_range": {"from_date": "2025-03-01", "to_date": "2025-03-31", "date_field": "date"},
+    "window_and_range": {"window": "1st_window", "from_date": "2025-01-01", "to_date": "2025-06-30"},
+    "sort_date_asc": {"sort_by": "date", "sort_order": "asc"},
+}
+
+
+def seed(rows: int) -> list:
+    engine = setup.database.get_engine
+    setup.Base.metadata.create_all(engine)
+    with CreateDBSession() as db:
+        company = Company(name="bench", api_key="key", api_user="user", api_endpoint="bench.local")
+        users = [User(email=f"collector{n}@bench.local", company=company) for n in range(USERS)]
+        omc, bdc = OMC(name="bench omc"), BDC(name="bench bdc")
+        station = Station(name="bench station", location="accra")
+        db.add_all([company, omc, bdc, station, *users])
+        db.commit()
+        user_ids, omc_id, bdc_id, station_id = [u.id for u in users], omc.id, bdc.id, station.id
+        next_id = (db.execute(select(PriceEntry.id).order_by(PriceEntry.id.desc())).scalar() or 0) + 1
+
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, BATCH):
+            entries, prices = [], []
+            for entry_id in range(next_id + offset, next_id + min(offset + BATCH, rows)):
+                seller = random.choice(("OMC", "BDC"))
+                moment = start + timedelta(minutes=random.randint(0, 60 * 24 * 540))
+                entries.append({
+                    "id": entry_id,
+                    "user_id": random.choice(user_ids),
+                    "seller_type": seller,
+                    "window": random.choice(("FIRST_WINDOW", "SECOND_WINDOW")),
+                    "transaction_term": random.choice(("CASH", "CREDIT")) if seller == "BDC" else None,
+                    "omc_id": omc_id,
+                    "bdc_id": bdc_id if seller == "BDC" else None,
+                    "station_id": station_id if seller == "OMC" else None,
+                    "date": moment,
+                    "created_at": moment,
+                    "updated_at": moment,
+                })
+                prices.append({
+                    "price_entry_id": entry_id,
+                    "product_type": random.choice(PRODUCTS),
+                    "price": round(random.uniform(10, 20), 2),
+                    "unit_of_measurement": "Ghana Cedis per litre",
+                })
+            conn.execute(insert(PriceEntry.__table__), entries)
+            conn.execute(insert(ProductPrice.__table__), prices)
+            print(f"seeded {offset + len(entries)}/{rows}", end="\r")
+    print()
+    return user_ids
+
+
+def explain(conn, statement) -> str:
+    sql = str(statement.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    prefix = "EXPLAIN QUERY PLAN " if conn.engine.dialect.name == "sqlite" else "EXPLAIN (ANALYZE, BUFFERS) "
+    return "\n".join(" ".join(str(col) for col in row) for row in conn.execute(text(prefix + sql)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.rows)
+    with CreateDBSession() as db:
+        user_id = db.execute(select(User.id).filter(User.email.like("%@bench.local"))).scalar()
+        for name, filters in FILTERS.items():
+            params = OMCBDCFilterParams(**filters)
+            query = PriceEntryQuery(db, params, user_id)
+            timings = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                query.paginate()
+                timings.append((time.perf_counter() - started) * 1000)
+            deep = PriceEntryQuery(db, params.model_copy(update={"cursor": query.next_cursor}), user_id) if query.next_cursor else None
+            print(f"== {name}: median {statistics.median(timings):.2f} ms, p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:.2f} ms")
+            print(explain(db.connection(), (deep or query).page_statement()))
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark multi-product price submissions
+
+Submits one OMC price entry form carrying 1 to 20 products, each with the
+same images, first through the per-row add/flush loop the models used to
+run and then through PriceEntry.bulk_add_price_entries. Reports the median
+latency per submission and the number of statements sent.
+
+    python -m benchmarks.price_submission --repeat 50 --images 3
+"""
+
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+
+from sqlalchemy import event
+
+from core import setup
+from models.bdcs import OMC, PriceEntry, PriceEntryImage, ProductPrice, WindowType, compute_unit_of_measurement
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from utils.session import CreateDBSession
+
+PRODUCT_COUNTS = (1, 2, 5, 10, 20)
+PRODUCTS = ("petrol", "diesel", "LPG", "rfo")
+
+
+def seed() -> dict:
+    setup.Base.metadata.create_all(setup.database.get_engine)
+    with CreateDBSession() as db:
+        company = Company(name="submission bench", api_key="key", api_user="user", api_endpoint="bench.local")
+        user = User(email="submission@bench.local", company=company)
+        omc = OMC(name="submission bench omc")
+        station = Station(name="submission bench station", location="accra")
+        db.add_all([company, user, omc, station])
+        db.commit()
+        return {
+            "seller_type": "omc",
+            "user_id": user.id,
+            "omc_id": omc.id,
+            "window": WindowType.FIRST_WINDOW,
+            "station_id": station.id,
+        }
+
+
+def legacy_submission(db_session, base_data: dict, product, images: list) -> list:
+    """The per-product loop add_multiple_omc_price_entry used to run"""
+    price_entry_list = []
+    for product_price, product_type in zip(product.price.split(","), product.product_type.split(",")):
+        price_entry = PriceEntry(**base_data)
+        db_session.add(price_entry)
+        db_session.flush()
+        ProductPrice.add_product_price(db_session, price_entry.id, {
+            "product_type": product_type,
+            "price": float(product_price),
+            "unit_of_measurement": compute_unit_of_measurement(product_type),
+        })
+        PriceEntryImage.add_images(db_session, price_entry.id, images)
+        price_entry_list.append(price_entry)
+    db_session.commit()
+    return PriceEntry.get_price_entries_by_ids(db_session, [price_entry.id for price_entry in price_entry_list])
+
+
+def bulk_submission(db_session, base_data: dict, product, images: list) -> list:
+    price_entries = PriceEntry.add_multiple_omc_price_entry(db_session, base_data, product, images)
+    db_session.commit()
+    return price_entries
+
+
+def measure(handler, base_data: dict, products: int, images: int, repeat: int) -> tuple:
+    product = SimpleNamespace(
+        price=",".join(str(10 + n) for n in range(products)),
+        product_type=",".join(PRODUCTS[n % len(PRODUCTS)] for n in range(products)),
+    )
+    image_rows = [{"image_url": f"bench/image-{n}.jpg"} for n in range(images)]
+    statements = []
+    engine = setup.database.get_engine
+
+    def count(*_):
+        statements[-1] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        timings = []
+        for _ in range(repeat):
+            statements.append(0)
+            with CreateDBSession() as db:
+                started = time.perf_counter()
+                handler(db, base_data, product, image_rows)
+                timings.append(time.perf_counter() - started)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return statistics.median(timings), statistics.median(statements)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--images", type=int, default=3)
+    args = parser.parse_args()
+
+    base_data = seed()
+    print(f"{'products':>8} {'legacy ms':>10} {'stmts':>6} {'bulk ms':>10} {'stmts':>6} {'speedup':>8}")
+    for products in PRODUCT_COUNTS:
+        legacy, legacy_statements = measure(legacy_submission, base_data, products, args.images, args.repeat)
+        bulk, bulk_statements = measure(bulk_submission, base_data, products, args.images, args.repeat)
+        print(
+            f"{products:>8} {legacy * 1000:>10.2f} {legacy_statements:>6.0f} "
+            f"{bulk * 1000:>10.2f} {bulk_statements:>6.0f} {legacy / bulk:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark server-side image uploads for price submissions
+
+Uploads submissions of 1 to --max-images images of --size-kb each, first
+the way upload_multiple_images_to_s3 used to (a new client per submission,
+one upload_fileobj after another) and then through the shared client and
+the bounded upload executor. Reports milliseconds per submission.
+
+Runs against an in-process moto server (pip install "moto[server]"), or a
+MinIO / other S3 stand-in given with --endpoint-url:
+
+    python -m benchmarks.s3_uploads --submissions 20 --max-images 10 --size-kb 300
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import time
+import uuid
+from typing import List
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from config.setting import settings
+from services import s3
+
+
+def images(count: int, size_kb: int) -> List[UploadFile]:
+    body = os.urandom(size_kb * 1024)
+    return [
+        UploadFile(file=io.BytesIO(body), filename=f"pump-{n}.jpg", headers=Headers({"content-type": "image/jpeg"}))
+        for n in range(count)
+    ]
+
+
+def legacy(files: List[UploadFile]) -> None:
+    s3_client = s3.new_s3_client()
+    for file in files:
+        file.file.seek(0)
+        s3_client.upload_fileobj(file.file, settings.S3_BUCKET_NAME, f"omc-bdc/docs/{uuid.uuid4()}.jpg")
+
+
+def concurrent(files: List[UploadFile]) -> None:
+    asyncio.run(s3.upload_multiple_images_to_s3(files))
+
+
+def per_submission(upload, submissions: int, count: int, size_kb: int) -> float:
+    batches = [images(count, size_kb) for _ in range(submissions)]
+    started = time.perf_counter()
+    for files in batches:
+        upload(files)
+    return (time.perf_counter() - started) * 1000 / submissions
+
+
+def run(args: argparse.Namespace) -> None:
+    s3.get_s3_client().create_bucket(Bucket=settings.S3_BUCKET_NAME)
+    print(f"{'images':>6}  {'legacy ms':>10}  {'concurrent ms':>13}  speedup")
+    for count in range(1, args.max_images + 1):
+        before = per_submission(legacy, args.submissions, count, args.size_kb)
+        after = per_submission(concurrent, args.submissions, count, args.size_kb)
+        print(f"{count:>6}  {before:>10.1f}  {after:>13.1f}  {before / after:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--submissions", type=int, default=20)
+    parser.add_argument("--max-images", type=int, default=10)
+    parser.add_argument("--size-kb", type=int, default=300)
+    parser.add_argument("--endpoint-url", help="S3 stand-in to use instead of an in-process moto server")
+    args = parser.parse_args()
+
+    settings.S3_BUCKET_NAME = f"bench-{uuid.uuid4().hex[:8]}"
+    if args.endpoint_url:
+        settings.S3_ENDPOINT_URL = args.endpoint_url
+        run(args)
+        return
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    try:
+        host, port = server.get_host_and_port()
+        settings.S3_ENDPOINT_URL = f"http://{host}:{port}"
+        settings.AWS_ACCESS_KEY = settings.AWS_SECRET_KEY = "bench"
+        run(args)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark sync delivery to company endpoints
+
+Starts local stand-in company endpoints that answer after --latency
+seconds, then sends --items price payloads spread across them, first one
+at a time with requests.post (what SendController used to do) and then
+through the pooled, concurrent SyncDispatcher. Reports items per second.
+
+    python -m benchmarks.sync_dispatch --items 500 --companies 4 --latency 0.05
+"""
+
+import argparse
+import time
+from contextlib import ExitStack
+
+import requests
+
+from services.sync_dispatcher import SyncDispatcher, SyncRequest
+from tests.stand_in_server import StandInServer
+
+PAYLOAD = {"product_name": "diesel", "omc_name": "bench omc", "date": "2025-01-01", "cash_price": 14.5}
+
+
+def sequential(servers, items: int) -> float:
+    started = time.perf_counter()
+    for n in range(items):
+        server = servers[n % len(servers)]
+        requests.post(f"{server.url}/omc", json=PAYLOAD, headers={"API-KEY": "bench"})
+    return items / (time.perf_counter() - started)
+
+
+def dispatched(servers, items: int, dispatcher: SyncDispatcher) -> float:
+    batch = [
+        SyncRequest(n, servers[n % len(servers)].address, "POST", f"{servers[n % len(servers)].url}/omc", {"API-KEY": "bench"}, PAYLOAD)
+        for n in range(items)
+    ]
+    started = time.perf_counter()
+    results = dispatcher.dispatch(batch)
+    elapsed = time.perf_counter() - started
+    assert all(result.ok for result in results)
+    return items / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--companies", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--company-concurrency", type=int, default=4)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        servers = [stack.enter_context(StandInServer(latency=args.latency)) for _ in range(args.companies)]
+        dispatcher = SyncDispatcher(args.max_concurrency, args.company_concurrency)
+        try:
+            legacy = sequential(servers, args.items)
+            pooled = dispatched(servers, args.items, dispatcher)
+        finally:
+            dispatcher.close()
+    print(f"sequential: {legacy:.1f} items/s")
+    print(f"dispatcher: {pooled:.1f} items/s")
+    print(f"speedup: {pooled / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Union
+from typing import Optional, Union
 
 from pydantic_settings import BaseSettings
 
@@ -20,12 +20,32 @@ class Settings(BaseSettings):
     APP_DESCRIPTION: str = "This is the API for the BDC-OMC Price Service"
     DATABASE_URL: str = "sqlite:///./test.db"
     POSTGRES_URL: str 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
     TESTING: bool = True
     AWS_ACCESS_KEY: str 
     AWS_SECRET_KEY: str 
     S3_ENDPOINT_URL: str
     S3_BUCKET_NAME: str = "omc-bdc-price"
     S3_REGION : str = "S3_REGION"
+    S3_UPLOAD_URL_EXPIRATION: int = 900
+    S3_MAX_IMAGE_BYTES: int = 10 * 1024 * 1024
+    PRICE_ENTRY_MAX_IMAGES: int = 10
+    S3_UPLOAD_CONCURRENCY: int = 8
+    S3_MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+    S3_MULTIPART_CHUNKSIZE: int = 8 * 1024 * 1024
+    S3_MULTIPART_CONCURRENCY: int = 4
+    S3_CONNECT_TIMEOUT: float = 5
+    S3_READ_TIMEOUT: float = 60
+    PRESIGNED_URL_EXPIRATION: int = 3600
+    # cached URLs are dropped this long before they expire, so clients always get time to use them
+    PRESIGNED_URL_CACHE_MARGIN: int = 300
+    PRESIGNED_URL_CACHE_MAXSIZE: int = 10000
+    # "memory" (per worker) or "redis" (shared, uses the REDIS_* settings)
+    PRESIGNED_URL_CACHE_BACKEND: str = "memory"
     X_SUBSCRIPTION_KEY: str=  "tester"
     AUTH_SERVICE_API_USER: str = "tester"
     AUTH_SERVICE_API_KEY: str = "tester"
@@ -36,6 +56,43 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str 
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE: int = 3600
+    AUTH_CACHE_MAXSIZE: int = 10000
+    AUTH_CACHE_TTL: int = 300
+    # identity caches are per worker: other workers keep a changed identity until it expires,
+    # so identities with admin rights are kept for at most this long
+    AUTH_ADMIN_CACHE_TTL: int = 30
+    COMPANY_CONFIG_CACHE_MAXSIZE: int = 10000
+    COMPANY_CONFIG_CACHE_TTL: int = 300
+    REFERENCE_CACHE_TTL: int = 300
+    REFERENCE_CHANGES_OVERLAP_SECONDS: float = 5
+    EXPORT_BATCH_SIZE: int = 1000
+    IMPORT_BATCH_SIZE: int = 1000
+    SYNC_OUTBOX_POLL_SECONDS: int = 5
+    SYNC_OUTBOX_BATCH_SIZE: int = 100
+    SYNC_OUTBOX_LEASE_SECONDS: int = 120
+    SYNC_BACKOFF_BASE_SECONDS: float = 5
+    SYNC_BACKOFF_MAX_SECONDS: float = 3600
+    SYNC_MAX_CONCURRENCY: int = 32
+    SYNC_COMPANY_CONCURRENCY: int = 4
+    SYNC_CONNECT_TIMEOUT: float = 5
+    SYNC_READ_TIMEOUT: float = 15
+    SYNC_KEEPALIVE_EXPIRY: float = 30
+    SYNC_BATCH_MAX_ITEMS: int = 50
+    SYNC_BREAKER_FAILURES: int = 5
+    SYNC_BREAKER_RESET_SECONDS: float = 30
+    SYNC_LATENCY_WINDOW: int = 200
+    SYNC_LATENCY_MAX_AGE_SECONDS: float = 300
+    SYNC_TIMEOUT_MIN_SAMPLES: int = 20
+    SYNC_TIMEOUT_MULTIPLIER: float = 3
+    SYNC_TIMEOUT_MIN: float = 1
+    SYNC_RATE_LIMIT_MAX_WAIT: float = 5
+    SYNC_BATCH_PATH_SUFFIX: str = "/batch"
+    UPSTREAM_CONNECT_TIMEOUT: float = 5
+    UPSTREAM_READ_TIMEOUT: float = 60
+    UPSTREAM_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+    SCHEDULER_LEASE_SECONDS: float = 30
+    SCHEDULER_RENEW_SECONDS: float = 10
+    SCHEDULER_NODE_ID: Optional[str] = None
     DEFAULT_PASSWORD: str = "123456789"
     LDAP_SERVER: str 
     OMC_BDC_URL: str
@@ -1,12 +1,16 @@
-from typing import Dict, Union
-import requests
+from datetime import datetime
+from typing import Dict, Optional, Union
 
 from schemas.bdcs import BDCIn, OMCIn
 from models.bdcs import BDC, OMC
 from utils import sql
-from utils.session import CreateDBSession
+from utils.session import CreateDBSession, on_commit
 from fastapi import HTTPException
-from utils.common import remove_dict_dulicates
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from services.upstream import sync_dataset
+from utils.reference_cache import BDC_OMC_ALL, BDC_OMC_LIST, CachedResponse, reference_cache, reference_snapshot, serialise
 from fastapi.exceptions import HTTPException
 from config.setting import settings
 
@@ -16,15 +20,10 @@ from config.setting import settings
 OMC_URL = settings.OMC_SYNC_URL
 BDC_URL = settings.BDC_SYNC_URL
 
-HEADERS = {
-    "Content-Type": "application/json",
-    "API-KEY": ""
-}
-
 class BDCOMCController:
 
     @staticmethod
-    def add_bdc_omc(bdc_data: Union[BDCIn, OMCIn]) -> Dict:
+    def add_bdc_omc(bdc_data: Union[BDCIn, OMCIn], db_session: Optional[Session] = None) -> Dict:
         """Add a new BDC to the database
 
         :param bdc_data: The BDC data to be added
@@ -32,51 +31,59 @@ class BDCOMCController:
         :return: The BDC data that was added
         :rtype: Dict
         """
-        bdc_ob = BDC(**bdc_data.model_dump()) if isinstance(bdc_data, BDCIn) else OMC(**bdc_data.model_dump())
-        bdc = sql.add_object_to_database(bdc_ob)
+        model = BDC if isinstance(bdc_data, BDCIn) else OMC
+        with CreateDBSession(db_session) as database_session:
+            # deletes are soft, so a name that comes back restores its row
+            bdc = database_session.scalar(select(model).where(model.name == bdc_data.name, model.deleted_at.is_not(None)))
+            if bdc is None:
+                bdc = sql.add_object_to_database(model(**bdc_data.model_dump()), db_session)
+            else:
+                bdc.restore()
+                sql.save_changes(database_session, db_session)
+                database_session.refresh(bdc)
+        # other sessions only see the row once the request commits
+        on_commit(db_session, reference_cache.invalidate)
         return bdc
     
 
     @staticmethod
-    def all_bdcs_omcs(param: str) -> Dict:
-        """Get all BDCs or OMCs from the database
+    async def all_bdcs_omcs(param: str, db_session: Optional[AsyncSession] = None) -> CachedResponse:
+        """Get all BDCs or OMCs from the reference cache
 
         :param param: The parameter to query
         :type param: str
-        :return: The BDCs or OMCs
-        :rtype: Dict
+        :return: The serialised BDCs, OMCs or both
+        :rtype: CachedResponse
         """
-        with CreateDBSession() as db_session:
-            if param == "bdc":
-                bdcs = db_session.query(BDC).filter_by(deleted_at=None).all()
-                return bdcs
-            elif param == "omc":
-                omcs = db_session.query(OMC).filter_by(deleted_at=None).all()
-                return omcs
-            else:
-                bdcs = db_session.query(BDC).filter_by(deleted_at=None).all()
-                omcs = db_session.query(OMC).filter_by(deleted_at=None).all()
-                return {"bdcs": bdcs, "omcs": omcs}
+        data = await reference_snapshot(db_session)
+        if param in ("bdc", "omc"):
+            return data.response(("bdcs_omcs", param), lambda: serialise(BDC_OMC_LIST, data.rows[param]))
+        return data.response(
+            ("bdcs_omcs", None),
+            lambda: serialise(BDC_OMC_ALL, {"bdcs": data.rows["bdc"], "omcs": data.rows["omc"]}),
+        )
         
 
 
     @staticmethod
-    def delete_bdc_omc(bdc_id: int = None, omc_id: int = None) -> Dict:
-        """Delete a BDC from the database
+    def delete_bdc_omc(bdc_id: int = None, omc_id: int = None, db_session: Optional[Session] = None) -> Dict:
+        """Soft-delete a BDC or an OMC, so delta sync clients see it go
 
         :param bdc_id: The BDC ID to be deleted
         :type bdc_id: int
         :return: The BDC data that was deleted
         :rtype: Dict
         """
-        with CreateDBSession() as db_session:
+        with CreateDBSession(db_session) as db_session:
             if bdc_id:
-                db_session.query(BDC).filter(BDC.id == bdc_id).delete()
+                db_session.query(BDC).filter(BDC.id == bdc_id, BDC.deleted_at.is_(None)).update({BDC.deleted_at: datetime.now()})
                 db_session.commit()
+                reference_cache.invalidate()
                 return {"message": "BDC deleted successfully", "status": True}
             elif omc_id:
-                db_session.query(OMC).filter(OMC.id == omc_id).delete()
+                db_session.query(OMC).filter(OMC.id == omc_id, OMC.deleted_at.is_(None)).update({OMC.deleted_at: datetime.now()})
                 db_session.commit()
+                reference_cache.invalidate()
                 return {"message": "OMC deleted successfully", "status": True}
             else:
                 raise HTTPException(status_code=400, detail="Either bdc_id or omc_id must be provided")
@@ -85,43 +92,33 @@ class BDCOMCController:
 
     @staticmethod
 
-    def sync_omcs() -> Dict:
+    def sync_omcs(dry_run: bool = False) -> Dict:
         """Sync OMCs with the database
 
-        :return: The OMC data that was synced
+        :param dry_run: Only report what the sync would change
+        :type dry_run: bool
+        :return: The added, removed and restored OMCs
         :rtype: Dict
         """
-        HEADERS["API-KEY"] = settings.OMC_API_KEY
-        response = requests.get(OMC_URL, headers=HEADERS)
-        if response.status_code == 200:
-             omcs= remove_dict_dulicates(response.json())
-             with CreateDBSession() as db_session:	 
-                sync_omcs = OMC.sync_omcs(db_session,omcs)
-                return {
-                    "message": f"{len(sync_omcs)} OMCs synced successfully",
-                    "status": True,
-                }
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+        summary = sync_dataset("omcs", OMC_URL, settings.OMC_API_KEY, ("name",), OMC.sync_omcs, "OMCs", dry_run)
+        if not dry_run:
+            reference_cache.invalidate()
+        return summary
     
 
     @staticmethod
-    def sync_bdcs() -> Dict:
+    def sync_bdcs(dry_run: bool = False) -> Dict:
         """Sync BDCs with the database
 
-        :return: The BDC data that was synced
+        :param dry_run: Only report what the sync would change
+        :type dry_run: bool
+        :return: The added, removed and restored BDCs
         :rtype: Dict
         """
-        HEADERS["API-KEY"] = settings.BDC_API_KEY
-        response = requests.get(BDC_URL, headers=HEADERS)
-        if response.status_code == 200:
-            bdcs = remove_dict_dulicates(response.json())
-            with CreateDBSession() as db_session:
-                sync_bdcs = BDC.sync_bdcs(db_session, bdcs)
-                return {
-                    "message": f"{len(sync_bdcs)} BDCs synced successfully",
-                    "status": True,
-                }
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+        summary = sync_dataset("bdcs", BDC_URL, settings.BDC_API_KEY, ("name",), BDC.sync_bdcs, "BDCs", dry_run)
+        if not dry_run:
+            reference_cache.invalidate()
+        return summary
     
 
     @staticmethod
@@ -131,16 +128,10 @@ class BDCOMCController:
         :return: The BDCs and OMCs data that was synced
         :rtype: Dict
         """
-        response = requests.get(BDC_URL, headers=HEADERS)
-        if response.status_code == 200:
-            bdcs = remove_dict_dulicates(response.json())
-            with CreateDBSession() as db_session:
-                sync_bdcs = BDC.sync_bdcs(db_session, bdcs)
-                return {
-                    "message": f"{len(sync_bdcs)} BDCs synced successfully",
-                    "status": True,
-                }
-        raise HTTPException(status_code=response.status_code, detail=response.text)
+        return {
+            "bdcs": BDCOMCController.sync_bdcs(),
+            "omcs": BDCOMCController.sync_omcs(),
+        }
 
         
 
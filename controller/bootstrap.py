@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config.setting import settings
+from models.bdcs import BDC, OMC
+from models.products import Product
+from models.stations import Station
+from schemas.bootstrap import Bootstrap
+from utils.reference_cache import CachedResponse, reference_snapshot, serialise
+from utils.session import AsyncCreateDBSession
+
+
+BOOTSTRAP = TypeAdapter(Bootstrap)
+
+# response key, model and the columns its clients need
+CHANGE_FEEDS = (
+    ("bdcs", BDC, ("id", "name", "created_at")),
+    ("omcs", OMC, ("id", "name", "created_at")),
+    ("stations", Station, ("id", "name", "location")),
+    ("products", Product, ("id", "name")),
+)
+
+
+class BootstrapController:
+
+    @staticmethod
+    async def get_bootstrap(db_session: Optional[AsyncSession] = None) -> CachedResponse:
+        """Get the reference data the price submission forms need, in one bundle
+
+        The bundle is serialised and gzipped once per reference snapshot, so it is
+        rebuilt only after a BDC, OMC, station or product change.
+
+        :return: The serialised and gzipped bundle
+        :rtype: CachedResponse
+        """
+        data = await reference_snapshot(db_session)
+
+        def build() -> bytes:
+            return serialise(BOOTSTRAP, {
+                "bdcs": data.rows["bdc"],
+                "omcs": data.rows["omc"],
+                "stations": [station for station in data.rows["station"] if station["deleted_at"] is None],
+                "products": [product for product in data.rows["product"] if product["deleted_at"] is None],
+            })
+
+        return data.response(("bootstrap", None), build, compress=True)
+
+    @staticmethod
+    async def get_changes(since: Optional[datetime] = None, db_session: Optional[AsyncSession] = None) -> Dict:
+        """Get the BDCs, OMCs, stations and products changed since a cursor
+
+        :param since: The cursor of the previous call, None for every live row
+        :type since: datetime
+        :return: The updated rows and deleted ids per dataset, and the next cursor
+        :rtype: Dict
+        """
+        async with AsyncCreateDBSession(db_session) as db_session:
+            return await db_session.run_sync(BootstrapController.load_changes, since)
+
+    @staticmethod
+    def load_changes(db_session: Session, since: Optional[datetime] = None) -> Dict:
+        changes, cursor = {"cursor": since}, since
+        for key, model, columns in CHANGE_FEEDS:
+            rows = model.changes_since(db_session, columns, since, settings.REFERENCE_CHANGES_OVERLAP_SECONDS)
+            changes[key] = {
+                "updated": [row for row in rows if row["deleted_at"] is None],
+                "deleted": [row["id"] for row in rows if row["deleted_at"] is not None],
+            }
+            updated_at = [row["updated_at"] for row in rows if row["updated_at"] is not None]
+            if updated_at and (cursor is None or max(updated_at) > cursor):
+                cursor = max(updated_at)
+        changes["cursor"] = cursor
+        return changes
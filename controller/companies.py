@@ -1,15 +1,20 @@
-from typing import Dict, Union
+from typing import Dict, Optional, Union
+
+from sqlalchemy.orm import Session
 
 from schemas.companies import CompanyIn, CompanyUpdate
 from utils import sql 
 from models.companies import Company
+from utils.auth import AuthToken
+from utils.session import on_commit
+from controller.sync import SendController
 
 
 
 
 class CompanyController:
     @staticmethod
-    def add_company(company_data: CompanyIn) -> Dict:
+    def add_company(company_data: CompanyIn, db_session: Optional[Session] = None) -> Dict:
         """Add a new company to the database
 
         :param company_data: The company data to be added
@@ -18,12 +23,12 @@ class CompanyController:
         :rtype: Dict
         """
         company_ob = Company(**company_data.model_dump())
-        company = sql.add_object_to_database(company_ob)
+        company = sql.add_object_to_database(company_ob, db_session)
         return company
     
 
     @staticmethod
-    def get_company(company_id: str) -> Union[Dict, None]:
+    def get_company(company_id: str, db_session: Optional[Session] = None) -> Union[Dict, None]:
         """Get a company from the database
 
         :param company_id: The ID of the company to be retrieved
@@ -31,7 +36,7 @@ class CompanyController:
         :return: The company data that was retrieved or None if not found
         :rtype: Union[Dict, None]
         """
-        company = sql.get_object_by_id_from_database(Company, company_id)
+        company = sql.get_object_by_id_from_database(Company, company_id, db_session)
         if not company:
             raise ValueError(f"Company with ID {company_id} not found")
         return company
@@ -39,17 +44,17 @@ class CompanyController:
 
 
     @staticmethod
-    def get_all_companies() -> list[Dict]:
+    def get_all_companies(db_session: Optional[Session] = None) -> list[Dict]:
         """Get all companies from the database
 
         :return: A list of all companies in the database
         :rtype: list[Dict]
         """
-        companies = sql.get_all_objects_from_database(Company)
+        companies = sql.get_all_objects_from_database(Company, db_session)
         return companies
     
     @staticmethod
-    def update_company(company_id: str, company_data: CompanyUpdate) -> Union[Dict, None]:
+    def update_company(company_id: str, company_data: CompanyUpdate, db_session: Optional[Session] = None) -> Union[Dict, None]:
         """Update a company in the database
 
         :param company_id: The ID of the company to be updated
@@ -59,9 +64,12 @@ class CompanyController:
         :return: The updated company data or None if not found
         :rtype: Union[Dict, None]
         """
-        company = sql.update_object_in_database(Company, "id", company_id, company_data.model_dump(exclude_unset=True))
+        company = sql.update_object_in_database(Company, "id", company_id, company_data.model_dump(exclude_unset=True), db_session)
         if not company:
             raise ValueError(f"Company with ID {company_id} not found")
+        company_id = company.id
+        on_commit(db_session, lambda: AuthToken.invalidate_company_identities(company_id))
+        on_commit(db_session, lambda: SendController.invalidate_company_configs(company_id))
         return company
     
 
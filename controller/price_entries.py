@@ -1,15 +1,23 @@
-from typing import Dict, Union, List
+import json
+from typing import IO, Dict, Iterator, Union, List, Optional, Tuple
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from schemas.price_entry import OMCPriceEntryCreate, BDCPriceEntryCreate
+from schemas.price_entry import OMCPriceEntryCreate, BDCPriceEntryCreate, ImageUploadIn
+from schemas.users import VerifiedIdentity
 from models.bdcs import PriceEntry, PriceEntryImage
 from utils import sql
-from utils.session import CreateDBSession
+from utils.session import AsyncCreateDBSession, CreateDBSession
 from utils.price_entry_filter import PriceEntryQuery
+from utils.export import csv_chunk, export_value
+from utils.price_import import PriceImport, read_rows
+from utils.reference_cache import reference_cache
 from services import s3
 from models.users import User
 from fastapi import UploadFile
-from controller.sync import  SendController
+from starlette.concurrency import run_in_threadpool
+from controller.sync import  SyncController
 from fastapi.background import BackgroundTasks
 from config.setting import settings
 
@@ -67,61 +75,82 @@ class PriceEntryController:
         
 
     @staticmethod
-    async def add_price_entry(user: "User", price_entry_data: Union[OMCPriceEntryCreate, BDCPriceEntryCreate], bg:BackgroundTasks, price_entry_images: List[UploadFile] = None) -> Dict:
+    async def add_price_entry(user: "User", price_entry_data: Union[OMCPriceEntryCreate, BDCPriceEntryCreate], bg:BackgroundTasks, price_entry_images: List[UploadFile] = None, db_session: Optional[AsyncSession] = None, image_keys: List[str] = None) -> Dict:
         """Add a new price entry to the database
 
         :param price_entry_data: The price entry data to be added
         :type price_entry_data: Union[OMCPriceEntryCreate, BDCPriceEntryCreate]
+        :param db_session: The request-scoped asyncio session
+        :type db_session: AsyncSession
+        :param image_keys: Keys of images already uploaded through presigned URLs
+        :type image_keys: List[str]
         :return: The price entry data that was added
         :rtype: Dict
         """
 
+        if len(price_entry_images or []) + len(image_keys or []) > settings.PRICE_ENTRY_MAX_IMAGES:
+            raise ValueError(f"A price entry takes at most {settings.PRICE_ENTRY_MAX_IMAGES} images")
         if price_entry_images:
             price_entry_images = await  s3.upload_multiple_images_to_s3(price_entry_images)
-        with CreateDBSession() as db_session:
-            if isinstance(price_entry_data, OMCPriceEntryCreate):
-                omc_base_data = {
-                    "seller_type": "omc",
-                    "user_id": user.id,
-                    "omc_id": price_entry_data.omc_id,
-                    "window": price_entry_data.window,
-                    "station_id": price_entry_data.station_id,
-                }
-                
-                price_entry = PriceEntry.add_multiple_omc_price_entry(
-                    db_session, 
-                    omc_base_data,
-                    price_entry_data.product,
-                    price_entry_images)
-                bg.add_task(
-                    SendController.send_omc_data_to_company_config,user.id,
-                      [pr.omc_sync_json() for pr in price_entry], f"{settings.OMC_BDC_URL}/omc"
-                      )
-            else:
-                bdc_base_data = {
-                    "seller_type": "bdc",
-                    "user_id": user.id,
-                    "bdc_id": price_entry_data.bdc_id,
-                    "window": price_entry_data.window,
-                    "town_of_loading": price_entry_data.town_of_loading,
-                    "transaction_term": price_entry_data.transaction_term,
-                    "omc_id": price_entry_data.source_id,
-                }
-                price_entry = PriceEntry.add_multiple_bdc_price_entry(
-                    db_session, 
-                    bdc_base_data,
-                    price_entry_data.product,
-                    price_entry_images
-                    )
-                bg.add_task(
-                    SendController.send_omc_data_to_company_config,user.id,
-                      [pr.bdc_sync_json() for pr in price_entry], f"{settings.OMC_BDC_URL}/bdc"
-                      )
+        if image_keys:
+            uploaded = await s3.run_in_upload_executor(s3.verify_uploaded_images, s3.get_s3_client(), user.id, image_keys)
+            price_entry_images = (price_entry_images or []) + uploaded
+        async with AsyncCreateDBSession(db_session) as database_session:
+            price_entry = await database_session.run_sync(
+                PriceEntryController.save_price_entries, user.id, price_entry_data, price_entry_images
+            )
+            # the request session is committed by get_async_db_session, before background tasks run
+            if db_session is None:
+                await database_session.commit()
+        # the entries are already queued in the outbox, this only delivers them sooner
+        bg.add_task(SyncController.drain_outbox, [entry.id for entry in price_entry])
+        return price_entry
+
+    @staticmethod
+    def save_price_entries(db_session: Session, user_id: int, price_entry_data: Union[OMCPriceEntryCreate, BDCPriceEntryCreate], price_entry_images: List[dict] = None) -> List[PriceEntry]:
+        """Write a price submission and queue it for the company sync
+
+        Runs on a blocking session, either directly or through AsyncSession.run_sync.
+
+        :return: The created price entries
+        :rtype: List[PriceEntry]
+        """
+        if isinstance(price_entry_data, OMCPriceEntryCreate):
+            reference_cache.require(db_session, omc=price_entry_data.omc_id, station=price_entry_data.station_id)
+            omc_base_data = {
+                "seller_type": "omc",
+                "user_id": user_id,
+                "omc_id": price_entry_data.omc_id,
+                "window": price_entry_data.window,
+                "station_id": price_entry_data.station_id,
+            }
+            price_entry = PriceEntry.add_multiple_omc_price_entry(
+                db_session, 
+                omc_base_data,
+                price_entry_data.product,
+                price_entry_images)
             return price_entry
+        reference_cache.require(db_session, bdc=price_entry_data.bdc_id, omc=price_entry_data.source_id)
+        bdc_base_data = {
+            "seller_type": "bdc",
+            "user_id": user_id,
+            "bdc_id": price_entry_data.bdc_id,
+            "window": price_entry_data.window,
+            "town_of_loading": price_entry_data.town_of_loading,
+            "transaction_term": price_entry_data.transaction_term,
+            "omc_id": price_entry_data.source_id,
+        }
+        price_entry = PriceEntry.add_multiple_bdc_price_entry(
+            db_session, 
+            bdc_base_data,
+            price_entry_data.product,
+            price_entry_images
+            )
+        return price_entry
         
 
     @staticmethod
-    async def update_price_entry(price_entry_data: Union[OMCPriceEntryCreate, BDCPriceEntryCreate], price_entry_id: int, seller_type: str ,bg: BackgroundTasks, new_price_entry_images: List[UploadFile] = None) -> Dict:
+    async def update_price_entry(price_entry_data: Union[OMCPriceEntryCreate, BDCPriceEntryCreate], price_entry_id: int, seller_type: str ,bg: BackgroundTasks, new_price_entry_images: List[UploadFile] = None, db_session: Optional[Session] = None) -> Dict:
         """Update a price entry in the database
 
         :param price_entry_data: The price entry data to be updated
@@ -131,20 +160,15 @@ class PriceEntryController:
         """
         if new_price_entry_images:
             new_price_entry_images = await  s3.upload_multiple_images_to_s3(new_price_entry_images)
-        
-        seller_type_path = {
-            "omc": f"{settings.OMC_BDC_URL}/omc/{price_entry_id}",
-            "bdc": f"{settings.OMC_BDC_URL}/bdc/{price_entry_id}",
-        }
 
-        with CreateDBSession() as db_session:
+        with CreateDBSession(db_session) as database_session:
             
             omc_bdc_price_entry_fields = price_entry_data.model_dump(exclude=["product", "images"], exclude_unset=True)
             if omc_bdc_price_entry_fields.get('source_id', None):
                 omc_bdc_price_entry_fields['omc_id'] = omc_bdc_price_entry_fields.get('source_id')
                 omc_bdc_price_entry_fields.pop('source_id')
             price_entry = PriceEntry.update_omc_price_entry(
-                db_session=db_session, 
+                db_session=database_session, 
                 price_entry_id=price_entry_id,
                 seller_type=seller_type,
                 product=price_entry_data.product,
@@ -154,46 +178,118 @@ class PriceEntryController:
                 )
             if not price_entry:
                 raise ValueError("Price entry not found")
-            bg.add_task(
-                SendController.update_omc_data_to_company_config, price_entry.user_id,
-                [price_entry.omc_sync_json() if seller_type == 'omc' else price_entry.bdc_sync_json()], seller_type_path[seller_type]
-            )
+            sql.save_changes(database_session, db_session)
+            bg.add_task(SyncController.drain_outbox, [price_entry.id])
             return price_entry
         
 
     @staticmethod
-    def get_price_entries(params: BaseModel,user_id: int ) -> Dict:
+    async def get_price_entries(params: BaseModel,user_id: int, db_session: Optional[AsyncSession] = None) -> Tuple[List[PriceEntry], Optional[str]]:
         """Get price entries from the database
 
         :param params: The parameters to filter the price entries
         :type params: OMCBDCFilterParams
-        :return: The price entries
-        :rtype: Dict
+        :return: One page of price entries and the cursor of the next page
+        :rtype: Tuple[List[PriceEntry], Optional[str]]
         """
 
-        with CreateDBSession() as db_session:
-            price_entries = PriceEntryQuery(db_session, params, user_id).paginate()
-            return price_entries
-        
+        async with AsyncCreateDBSession(db_session) as db_session:
+            query = PriceEntryQuery(db_session, params, user_id)
+            price_entries = await query.paginate_async()
+        await run_in_threadpool(s3.sign_price_entry_images, price_entries)
+        return price_entries, query.next_cursor
 
     @staticmethod
-    def get_presigned_url(image_names: List[str]) -> Dict:
-        """Get a presigned URL for an image
+    def export_price_entries(params: BaseModel, user: VerifiedIdentity) -> Iterator[str]:
+        """Stream price entries as CSV or NDJSON chunks
+
+        Company admins export every collector of their company, other users
+        only their own entries. The filters are checked before the first
+        chunk is sent; the rows are read afterwards on a session owned by
+        the returned generator.
+
+        :param params: The filters and export format
+        :type params: PriceEntryExportParams
+        :param user: The verified caller
+        :type user: VerifiedIdentity
+        :return: Text chunks, one per fetched batch
+        :rtype: Iterator[str]
+        """
+        if user.is_admin:
+            user_id, company_id = None, user.company_id
+        else:
+            user_id, company_id = user.id, None
+        statement = PriceEntryQuery(None, params, user_id, company_id).export_statement()
+        columns = [column.name for column in statement.selected_columns]
+
+        def chunks() -> Iterator[str]:
+            with CreateDBSession() as db_session:
+                query = PriceEntryQuery(db_session, params, user_id, company_id)
+                if params.format == "csv":
+                    yield csv_chunk([columns])
+                for rows in query.stream(settings.EXPORT_BATCH_SIZE):
+                    rows = [[export_value(value) for value in row] for row in rows]
+                    if params.format == "csv":
+                        yield csv_chunk(rows)
+                    else:
+                        yield "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+        return chunks()
 
-        :param image_name: The name of the image
-        :type image_name: str
-        :return: The presigned URL
+    @staticmethod
+    def import_price_entries(user: VerifiedIdentity, file: IO[bytes], filename: str, db_session: Optional[Session] = None) -> Dict:
+        """Bulk import price entries from a CSV or XLSX upload
+
+        Valid rows are attributed to the uploader and written in batches,
+        invalid rows are skipped and reported. Imported entries have no
+        external_id yet, so the sync outbox sends them to the company.
+
+        :param user: The verified company admin
+        :type user: VerifiedIdentity
+        :param file: The uploaded file
+        :type file: IO[bytes]
+        :param filename: The uploaded file name, its extension picks the parser
+        :type filename: str
+        :return: The per-row import report
         :rtype: Dict
         """
+        rows = read_rows(file, filename)
+        with CreateDBSession(db_session) as database_session:
+            report = PriceImport(database_session, user.id, settings.IMPORT_BATCH_SIZE).run(rows)
+            sql.save_changes(database_session, db_session)
+            return report
+
+
+    @staticmethod
+    def get_presigned_url(user_id: int, images: List[ImageUploadIn]) -> List[Dict]:
+        """Get presigned PUT URLs for uploading images straight to S3
+
+        :param user_id: The id of the uploading user, part of every key
+        :type user_id: int
+        :param images: The names and content types of the images
+        :type images: List[ImageUploadIn]
+        :return: The key, URL and required headers per image
+        :rtype: List[Dict]
+        """
+        if len(images) > settings.PRICE_ENTRY_MAX_IMAGES:
+            raise ValueError(f"A price entry takes at most {settings.PRICE_ENTRY_MAX_IMAGES} images")
+        s3_client = s3.get_s3_client()
         presigned_url_list  = []
-        for image in image_names:
-            url = s3.generate_url_for_frontend_upload(s3.get_s3_client(), image, 3600)
-            presigned_url_list.append({"image_name": image, "url": url})
+        for image in images:
+            image_key = s3.upload_key(user_id, image.image_name)
+            url = s3.generate_url_for_frontend_upload(s3_client, image_key, settings.S3_UPLOAD_URL_EXPIRATION, image.content_type)
+            presigned_url_list.append({
+                "image_name": image.image_name,
+                "image_key": image_key,
+                "url": url,
+                "headers": {"Content-Type": image.content_type, "x-amz-acl": "public-read"},
+                "expires_in": settings.S3_UPLOAD_URL_EXPIRATION,
+            })
         return presigned_url_list
     
 
     @staticmethod
-    def get_price_entry(price_entry_id: int) -> Dict:
+    async def get_price_entry(price_entry_id: int, db_session: Optional[AsyncSession] = None) -> Dict:
         """Get a price entry from the database
 
         :param price_entry_id: The id of the price entry
@@ -202,7 +298,9 @@ class PriceEntryController:
         :rtype: Dict
         """
         
-        price_entry = sql.get_object_by_id_from_database(PriceEntry, price_entry_id)
+        async with AsyncCreateDBSession(db_session) as db_session:
+            price_entry = await db_session.get(PriceEntry, price_entry_id, options=PriceEntry.load_profile("detail"))
+        await run_in_threadpool(s3.sign_price_entry_images, [price_entry])
         return price_entry
 
 
@@ -218,7 +316,7 @@ class PriceEntryController:
         return url
     
     @staticmethod
-    async def delete_price_entry_image(entry_id: int, image_id: int) -> Dict:
+    async def delete_price_entry_image(entry_id: int, image_id: int, db_session: Optional[Session] = None) -> Dict:
         """Delete a price entry image from the database
 
         :param entry_id: The id of the price entry
@@ -228,18 +326,18 @@ class PriceEntryController:
         :return: The deleted image data
         :rtype: Dict
         """
-        with CreateDBSession() as db_session:
-            price_entry = db_session.query(PriceEntry).filter(PriceEntry.id == entry_id).first()
+        with CreateDBSession(db_session) as database_session:
+            price_entry = database_session.query(PriceEntry).filter(PriceEntry.id == entry_id).first()
             if not price_entry:
                 raise ValueError("Price entry not found")
-            image = db_session.query(PriceEntryImage).filter(PriceEntryImage.id == image_id).first()
+            image = database_session.query(PriceEntryImage).filter(PriceEntryImage.id == image_id).first()
             if not image:
                 raise ValueError("Image not found")
             if image.image_url:
                response = await s3.delete_from_s3(image.image_url)
-            db_session.delete(image)
-            db_session.commit()
-            db_session.refresh(price_entry)
+            database_session.delete(image)
+            sql.save_changes(database_session, db_session)
+            database_session.refresh(price_entry)
             return {
                 "message": "Image deleted successfully",
                 "status": True
@@ -1,55 +1,64 @@
 from datetime import datetime
-from typing import Dict, Union
+from typing import Dict, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from models.products import Product
-from utils.session import CreateDBSession
+from utils.session import on_commit
+from utils.reference_cache import PRODUCT, PRODUCT_LIST, CachedResponse, reference_cache, reference_snapshot, serialise
 from utils.sql import add_object_to_database, update_object_in_database
 
 class ProductController:
 
 
     @staticmethod
-    def get_product(product_id: int) -> Union[Dict, None]:
-        """Get a product from the database
+    async def get_product(product_id: int, db_session: Optional[AsyncSession] = None) -> CachedResponse:
+        """Get a product from the reference cache
 
         :param product_id: The ID of the product to be retrieved
         :type product_id: int
-        :return: The product data that was retrieved or None if not found
-        :rtype: Union[Dict, None]
+        :return: The serialised product
+        :rtype: CachedResponse
         """
-        with CreateDBSession() as db_session:
-            product = Product.get_product_by_id(db_session, product_id)
-            if not product:
-                raise ValueError(f"Product with ID {product_id} not found")
-            return product
+        data = await reference_snapshot(db_session)
+        product = data.by_id["product"].get(product_id)
+        if not product:
+            raise ValueError(f"Product with ID {product_id} not found")
+        return data.response(("products", product_id), lambda: serialise(PRODUCT, product))
         
     @staticmethod
-    def get_all_products() -> list[Dict]:
-        """Get all products from the database
+    async def get_all_products(db_session: Optional[AsyncSession] = None) -> CachedResponse:
+        """Get all products from the reference cache
 
-        :return: A list of all products in the database
-        :rtype: list[Dict]
+        :return: The serialised products
+        :rtype: CachedResponse
         """
-        with CreateDBSession() as db_session:
-            products = Product.get_products(db_session)
-            return products
+        data = await reference_snapshot(db_session)
+        return data.response(("products", None), lambda: serialise(PRODUCT_LIST, data.rows["product"]))
         
 
     @staticmethod
-    def add_product(product_name:dict)-> dict:
+    def add_product(product_name:dict, db_session: Optional[Session] = None)-> dict:
         product = Product(name=product_name.get('name'))
-        return add_object_to_database(product)
+        product = add_object_to_database(product, db_session)
+        on_commit(db_session, reference_cache.invalidate)
+        return product
     
 
     @staticmethod
-    def delete_product(id: int):
+    def delete_product(id: int, db_session: Optional[Session] = None):
         data = {'deleted_at': datetime.now()}
-        return update_object_in_database(Product, 'id', id, data)
+        product = update_object_in_database(Product, 'id', id, data, db_session)
+        on_commit(db_session, reference_cache.invalidate)
+        return product
     
 
     @staticmethod
-    def restore_product(id: int):
+    def restore_product(id: int, db_session: Optional[Session] = None):
         data = {'deleted_at': None}
-        return update_object_in_database(Product, 'id', id, data)
+        product = update_object_in_database(Product, 'id', id, data, db_session)
+        on_commit(db_session, reference_cache.invalidate)
+        return product
 
 
 
@@ -1,11 +1,12 @@
-import requests
-import json
+from typing import Optional
 
 from fastapi.exceptions import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.stations import Station
-from utils.session import CreateDBSession
 
 from config.setting import settings
+from services.upstream import sync_dataset
+from utils.reference_cache import STATION, STATION_LIST, CachedResponse, reference_cache, reference_snapshot, serialise
 
 
 
@@ -14,45 +15,34 @@ STATIONS_URL = settings.STATIONS_SYNC_URL
 class StationController:
 
     @staticmethod
-    def sync_stations():
+    def sync_stations(dry_run: bool = False):
         """Sync Stations
-        This method syncs the stations
+        This method syncs the stations, or only reports the changes when dry_run is set
         """
-        headers = {
-            "Content-Type": "application/json",
-            "API-KEY": settings.STATIONS_API_KEY,
-        }
-        response = requests.get(STATIONS_URL, headers=headers)
-        if response.status_code == 200:
-            stations = response.json()
-            with CreateDBSession() as db_session:
-                stations = list({json.dumps(d, sort_keys=True) for d in stations}) 
-                stations = [json.loads(d) for d in stations]	 
-                sync_stations = Station.sync_stations(db_session,stations)
-                return sync_stations
-        raise HTTPException(
-            status_code=response.status_code,
-            detail=f"Error syncing stations: {response.text}"
-        )
+        summary = sync_dataset("stations", STATIONS_URL, settings.STATIONS_API_KEY, ("name", "location"), Station.sync_stations, "stations", dry_run)
+        if not dry_run:
+            reference_cache.invalidate()
+        return summary
 
 
     @staticmethod
-    def get_stations():
+    async def get_stations(db_session: Optional[AsyncSession] = None) -> CachedResponse:
         """Get all stations
-        This method gets all stations
+        This method gets all active stations from the reference cache
         """
-        with CreateDBSession() as db_session:
-            stations = Station.get_stations(db_session)
-            return stations
+        data = await reference_snapshot(db_session)
+        return data.response(
+            ("stations", None),
+            lambda: serialise(STATION_LIST, [station for station in data.rows["station"] if station["deleted_at"] is None]),
+        )
 
     @staticmethod
-    def get_station_by_id(station_id: int):
+    async def get_station_by_id(station_id: int, db_session: Optional[AsyncSession] = None) -> CachedResponse:
         """Get station by id
-        This method gets a station by id
+        This method gets a station by id from the reference cache
         """
-        with CreateDBSession() as db_session:
-            station = Station.get_station_by_id(db_session, station_id)
-            if not station:
-                raise HTTPException(status_code=404, detail="Station not found")
-            return station
-        
\ No newline at end of file
+        data = await reference_snapshot(db_session)
+        station = data.by_id["station"].get(station_id)
+        if not station:
+            raise HTTPException(status_code=404, detail="Station not found")
+        return data.response(("stations", station_id), lambda: serialise(STATION, station))
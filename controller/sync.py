@@ -1,16 +1,33 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
 import requests
+from sqlalchemy import exists, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
 
 from utils.session import CreateDBSession
 from models.bdcs import PriceEntry
-from apscheduler.schedulers.background import BackgroundScheduler
+from models.sync_outbox import SyncOperation, SyncOutbox
+from models.companies import Company
+from services.scheduler import coordinator
+from services.sync_dispatcher import SyncRequest, SyncResult, dispatcher
 from models.users import User
 from tools.log import Log
+from utils.cache import TTLCache
 from config.setting import settings
 
 
 
 sync_logger = Log(f"{__name__}")
 
+# Company config URLs keyed by user id, None for unknown users and users without a company
+company_config_cache = TTLCache(settings.COMPANY_CONFIG_CACHE_MAXSIZE, settings.COMPANY_CONFIG_CACHE_TTL)
+MISSING = object()
+
+# answers to a batch POST meaning the endpoint only takes single items
+BATCH_UNSUPPORTED_STATUS_CODES = (404, 405, 501)
+
 
 
 
@@ -63,89 +80,216 @@ class SyncController:
         
 
     @staticmethod
-    def save_successful_request_to_db(resource_id: int, request_data: dict[str, str], response_data: dict) -> None:
+    def save_successful_request_to_db(resource_id: int, request_data: dict[str, str], response_data: dict, db_session=None) -> None:
         """
-        Save the failed request to the database.
+        Save the successful request to the database.
+        A caller passing its session commits; entries it already loaded are not queried again.
         """
-        with CreateDBSession() as db:
-            price_entry = db.query(PriceEntry).filter_by(
-                id=resource_id,
-            ).first()
+        with CreateDBSession(db_session) as db:
+            price_entry = db.get(PriceEntry, resource_id)
             price_entry.external_id =  response_data.get("id")
             price_entry.update_sync_status = True
-            db.commit()
-            db.refresh(price_entry)
+            if db_session is None:
+                db.commit()
             return price_entry
         
 
     @staticmethod
-    def retry_failed_bdcs() -> None:
+    def outbox_payload(item: SyncOutbox, price_entry: PriceEntry) -> Tuple[str, str, dict]:
         """
-        Retry all failed dbcs syncs.
+        Build the method, path and body that deliver one outbox item.
         """
-        with CreateDBSession() as db:
-            failed_bdcs = PriceEntry.get_all_failed_price_entries(db, "bdc")
-            bdcs_to_create = failed_bdcs.get("to_create")
-            bdcs_to_update = failed_bdcs.get("to_update")
-            if bdcs_to_create:
-                for bdc in bdcs_to_create:
-                    data = bdc.failed_bdc_sync_json()
-                    user_id = data.pop("user_id")
-                    external_id = data.pop("external_id", None)
-                    SendController.send_omc_data_to_company_config(user_id, [data], f"{settings.OMC_BDC_URL}/bdc")
-            if bdcs_to_update:
-                for bdc in bdcs_to_update:
-                    data = bdc.failed_bdc_sync_json()
-                    user_id = data.pop("user_id")
-                    external_id = data.pop("external_id", None)
-                    SendController.update_omc_data_to_company_config(user_id, [data], f"{settings.OMC_BDC_URL}/bdc/{external_id}")
-                
+        seller_type = price_entry.seller_type.value
+        data = price_entry.failed_omc_sync_json() if seller_type == "omc" else price_entry.failed_bdc_sync_json()
+        data.pop("id", None)
+        data.pop("user_id", None)
+        external_id = data.pop("external_id", None)
+        path = f"{settings.OMC_BDC_URL}/{seller_type}"
+        if item.operation == SyncOperation.UPDATE:
+            return "put", f"{path}/{external_id}", data
+        return "post", path, data
+
+
+    @staticmethod
+    def single_outcome(result: SyncResult) -> Tuple[Optional[bool], Any]:
+        """(ok, response body or error); ok is None when the request was not sent at all"""
+        if result.skipped:
+            return None, result.describe()
+        return (True, result.body) if result.ok else (False, result.describe())
+
 
     @staticmethod
-    def retry_failed_omcs() -> None:
+    def batch_outcomes(result: SyncResult) -> Dict[int, Tuple[Optional[bool], Any]]:
         """
-        Retry all failed dbcs syncs.
+        Split a batch response into one outcome per item.
+        The company answers with an array in request order, {"id": ...} for
+        every created item and {"error": ...} for every rejected one.
         """
-        with CreateDBSession() as db:
-            failed_omcs = PriceEntry.get_all_failed_price_entries(db, "omc")
-            omcs_to_create = failed_omcs.get("to_create")
-            omcs_to_update = failed_omcs.get("to_update")
-            if omcs_to_create:
-                sync_logger.info(f"Retrying failed omcs: {omcs_to_create}")
-                for omc in omcs_to_create if omcs_to_create else None:
-                    data = omc.failed_omc_sync_json()
-                    user_id = data.pop("user_id")
-                    data.pop("external_id", None)	
-                    SendController.send_omc_data_to_company_config(user_id, [data], f"{settings.OMC_BDC_URL}/omc")
-            if omcs_to_update:
-                sync_logger.info(f"Retrying failed omcs: {omcs_to_update}")
-                for omc in omcs_to_update if omcs_to_update else None:
-                    data = omc.failed_omc_sync_json()
-                    user_id = data.pop("user_id")
-                    external_id = data.pop("external_id", None)
-                    SendController.update_omc_data_to_company_config(user_id, [data], f"{settings.OMC_BDC_URL}/omc/{external_id}")
-        
-                
+        item_ids = result.key
+        if result.skipped:
+            return {item_id: (None, result.describe()) for item_id in item_ids}
+        if not result.ok:
+            return {item_id: (False, result.describe()) for item_id in item_ids}
+        body = result.body.get("results") if isinstance(result.body, dict) else result.body
+        if not isinstance(body, list) or len(body) != len(item_ids):
+            return {item_id: (False, f"Malformed batch response: {str(result.body)[:200]}") for item_id in item_ids}
+        outcomes = {}
+        for item_id, item_result in zip(item_ids, body):
+            if isinstance(item_result, dict) and item_result.get("id") is not None and not item_result.get("error"):
+                outcomes[item_id] = (True, item_result)
+            else:
+                outcomes[item_id] = (False, f"Rejected in batch: {str(item_result)[:200]}")
+        return outcomes
 
 
+    @staticmethod
+    def send_outbox_items(db, items: List[SyncOutbox], price_entries: Dict[int, PriceEntry]) -> Dict[int, Tuple[Optional[bool], Any]]:
+        """
+        Send claimed outbox items and return (ok, response body or error) per item id,
+        ok being None for items held back by an open circuit or a rate limit.
+        Creates bound for the same batch-capable company and path are coalesced
+        into array payloads of up to SYNC_BATCH_MAX_ITEMS; everything else, and
+        companies whose endpoint turns out not to support batches, is sent one by one.
+        """
+        company_config_urls = SendController.get_users_config_urls(db, {price_entry.user_id for price_entry in price_entries.values()})
+        outcomes: Dict[int, Tuple[Optional[bool], Any]] = {}
+        payloads: Dict[int, Tuple[dict, str, str, dict]] = {}
+        batches: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        requests_to_send = []
+        for item in items:
+            price_entry = price_entries[item.price_entry_id]
+            company_config_url = company_config_urls.get(price_entry.user_id)
+            if company_config_url is None:
+                outcomes[item.id] = (False, f"User {price_entry.user_id} has no company config")
+                continue
+            method, path, data = SyncController.outbox_payload(item, price_entry)
+            payloads[item.id] = (company_config_url, method, path, data)
+            if method == "post" and company_config_url.get("supports_batch_sync"):
+                batches[(company_config_url["api_endpoint"], path)].append(item.id)
+            else:
+                requests_to_send.append(SendController.company_request(item.id, company_config_url, method, path, data))
+
+        for (api_endpoint, path), item_ids in batches.items():
+            for start in range(0, len(item_ids), settings.SYNC_BATCH_MAX_ITEMS):
+                chunk = item_ids[start:start + settings.SYNC_BATCH_MAX_ITEMS]
+                company_config_url = payloads[chunk[0]][0]
+                if len(chunk) == 1:
+                    requests_to_send.append(SendController.company_request(chunk[0], company_config_url, "post", path, payloads[chunk[0]][3]))
+                    continue
+                requests_to_send.append(SendController.company_request(
+                    tuple(chunk), company_config_url, "post", f"{path}{settings.SYNC_BATCH_PATH_SUFFIX}",
+                    [payloads[item_id][3] for item_id in chunk],
+                ))
+
+        fallback, unsupported = [], set()
+        for result in dispatcher.dispatch(requests_to_send):
+            if not isinstance(result.key, tuple):
+                outcomes[result.key] = SyncController.single_outcome(result)
+            elif result.status_code in BATCH_UNSUPPORTED_STATUS_CODES:
+                unsupported.add(payloads[result.key[0]][0]["api_endpoint"])
+                fallback.extend(
+                    SendController.company_request(item_id, *payloads[item_id]) for item_id in result.key
+                )
+            else:
+                outcomes.update(SyncController.batch_outcomes(result))
+        if unsupported:
+            sync_logger.info(f"Batch sync not supported by {sorted(unsupported)}, sending single items")
+            db.query(Company).filter(Company.api_endpoint.in_(unsupported)).update(
+                {Company.supports_batch_sync: False}, synchronize_session=False,
+            )
+            company_config_cache.invalidate_where(
+                lambda user_id, config: config is not None and config["api_endpoint"] in unsupported
+            )
+        for result in dispatcher.dispatch(fallback):
+            outcomes[result.key] = SyncController.single_outcome(result)
+        return outcomes
 
 
-            
-                
+    @staticmethod
+    def drain_outbox(price_entry_ids: Optional[List[int]] = None) -> int:
+        """
+        Deliver due outbox items, a batch at a time, until none are due.
+        Each batch is sent concurrently through the sync dispatcher; failed
+        items are rescheduled with exponential backoff and jitter, items that
+        were not sent (circuit open, rate limited) are postponed without
+        counting the attempt.
+        price_entry_ids restricts the run to entries that were just queued.
+        """
+        processed = 0
+        while True:
+            with CreateDBSession() as db:
+                items = SyncOutbox.claim(db, settings.SYNC_OUTBOX_BATCH_SIZE, settings.SYNC_OUTBOX_LEASE_SECONDS, price_entry_ids)
+                if not items:
+                    return processed
+                price_entries = {
+                    price_entry.id: price_entry
+                    for price_entry in PriceEntry.get_price_entries_by_ids(db, [item.price_entry_id for item in items], "sync_payload")
+                }
+                outcomes = SyncController.send_outbox_items(db, items, price_entries)
+
+                delivered = []
+                for item in items:
+                    ok, response = outcomes[item.id]
+                    if ok:
+                        if item.operation == SyncOperation.CREATE and isinstance(response, dict):
+                            SyncController.save_successful_request_to_db(item.price_entry_id, None, response, db)
+                        else:
+                            price_entries[item.price_entry_id].update_sync_status = True
+                        delivered.append(item.id)
+                        continue
+                    if ok is None:
+                        SyncOutbox.postpone(db, item, str(response), settings.SYNC_BREAKER_RESET_SECONDS)
+                        continue
+                    sync_logger.error(f"Failed to sync price entry {item.price_entry_id} (attempt {item.attempts}): {response}")
+                    SyncOutbox.failed(db, item, str(response), settings.SYNC_BACKOFF_BASE_SECONDS, settings.SYNC_BACKOFF_MAX_SECONDS)
+                SyncOutbox.delivered(db, delivered)
+                db.commit()
+            processed += len(items)
+            if len(items) < settings.SYNC_OUTBOX_BATCH_SIZE:
+                return processed
 
-                
-                    
+
+    @staticmethod
+    def enqueue_unsynced_entries() -> None:
+        """
+        Queue price entries that never reached their company and are not in the outbox,
+        e.g. entries created before the outbox existed.
+        """
+        queued = exists().where(SyncOutbox.price_entry_id == PriceEntry.id, SyncOutbox.operation == SyncOperation.CREATE)
+        unsynced = select(
+            PriceEntry.id,
+            literal(SyncOperation.CREATE, SyncOutbox.operation.type),
+            literal(0),
+            literal(datetime.utcnow(), SyncOutbox.enqueued_at.type),
+            literal(datetime.utcnow(), SyncOutbox.next_attempt_at.type),
+        ).where(PriceEntry.external_id.is_(None), ~queued)
+        with CreateDBSession() as db:
+            try:
+                db.execute(insert(SyncOutbox).from_select(
+                    ["price_entry_id", "operation", "attempts", "enqueued_at", "next_attempt_at"], unsynced,
+                ))
+                db.commit()
+            except IntegrityError:
+                # another worker queued them first
+                db.rollback()
+
+
+    @staticmethod
+    def outbox_stats() -> dict:
+        with CreateDBSession() as db:
+            return SyncOutbox.stats(db)
 
 
     @staticmethod
     def schedule_retry():
         """
-        Schedule the retry_failed_requests function to run at 12 AM every day.
+        Drain the sync outbox every SYNC_OUTBOX_POLL_SECONDS on the elected scheduler leader.
+        Every worker schedules the jobs but only the lease holder runs them; the
+        outbox leases still keep request-triggered drains from sending an item twice.
         """
-        scheduler = BackgroundScheduler()
-        scheduler.add_job(SyncController.retry_failed_bdcs, "cron", hour=0, minute=0)
-        scheduler.add_job(SyncController.retry_failed_omcs, "cron", hour=0, minute=0)
-        scheduler.start()
+        coordinator.on_elected(SyncController.enqueue_unsynced_entries)
+        coordinator.add_job(SyncController.drain_outbox, "interval", seconds=settings.SYNC_OUTBOX_POLL_SECONDS)
+        coordinator.start()
 
 
 
@@ -164,10 +308,62 @@ class SendController:
         Get the user's specific company config URL.
         """
         with CreateDBSession() as db_session:
-            user = db_session.query(User).filter_by(id=user_id).first()
-            company_config_url = user.config_url()
-            return company_config_url
-            
+            return SendController.get_users_config_urls(db_session, {user_id}).get(user_id)
+
+
+    @staticmethod
+    def get_users_config_urls(db_session, user_ids: set[int]) -> dict[int, dict[str, str]]:
+        """
+        Get the company config URL of several users, from the cache where possible
+        and in one query for the rest. Unknown users and users without a company are left out.
+        """
+        configs, missing = {}, []
+        for user_id in user_ids:
+            config = company_config_cache.get(user_id, MISSING)
+            if config is MISSING:
+                missing.append(user_id)
+            elif config is not None:
+                configs[user_id] = config
+        if missing:
+            configs.update(SendController.load_users_config_urls(db_session, missing))
+        return configs
+
+
+    @staticmethod
+    def load_users_config_urls(db_session, user_ids) -> dict[int, dict[str, str]]:
+        """
+        Load and cache the company config URL of users, None being cached for users
+        without a company and for ids with no user.
+        """
+        version = company_config_cache.version
+        rows = db_session.execute(
+            select(User.id, Company).outerjoin(Company, Company.id == User.company_id).where(User.id.in_(user_ids))
+        ).all()
+        configs = {}
+        for user_id, company in rows:
+            config = company.sync_config() if company is not None else None
+            company_config_cache.set(user_id, config, version=version)
+            if config is not None:
+                configs[user_id] = config
+        for user_id in set(user_ids).difference(user_id for user_id, _ in rows):
+            company_config_cache.set(user_id, None, version=version)
+        return configs
+
+
+    @staticmethod
+    def invalidate_company_configs(company_id: int) -> int:
+        """Forget cached config URLs of every user of a company"""
+        return company_config_cache.invalidate_where(
+            lambda user_id, config: config is not None and config["company_id"] == company_id
+        )
+
+
+    @staticmethod
+    def invalidate_user_configs(*user_ids: int) -> None:
+        """Forget cached config URLs of users whose company changed"""
+        for user_id in user_ids:
+            company_config_cache.invalidate(user_id)
+
 
     @staticmethod
     def send_data_to_company_config(user_id: int, data: dict[str, str]
@@ -192,54 +388,64 @@ class SendController:
 
 
     @staticmethod
-    def send_omc_data_to_company_config(user_id:int, data: list[dict[str, str]], path: str
+    def company_request(key, company_config_url: dict[str, str], method: str, path: str, data: dict) -> SyncRequest:
+        """
+        Build a request to a company endpoint, pooled per api_endpoint.
+        """
+        return SyncRequest(
+            key=key,
+            company=company_config_url["api_endpoint"],
+            method=method.upper(),
+            url=f"http://{company_config_url['api_endpoint']}{path}",
+            headers={
+                "Content-Type": "application/json",
+                "API-KEY": company_config_url["api_key"],
+            },
+            json=data,
+            rate_limit=company_config_url.get("sync_rate_limit"),
+            burst=company_config_url.get("sync_burst"),
+        )
+
+
+    @staticmethod
+    def send_omc_data_to_company_config(user_id:int, data: list[dict[str, str]], path: str, company_config_url: dict[str, str] = None
     ) -> None:
         """
         Send data to the user's specific company config.
+        The config can be resolved by the caller so background sends don't open a session.
         """
-        company_config_url = SendController.get_user_config_url(user_id)
-        url = f"http://{company_config_url['api_endpoint']}{path}"
-        headers = {
-            "Content-Type": "application/json",
-            "API-KEY": company_config_url["api_key"],
-        }
-        for d in data:
-            id = d.pop("id", None)
-            response =  requests.post(
-                url=url,
-                headers=headers,
-                json=d,
-            )
-            if response.status_code == 200:
-                SyncController.save_successful_request_to_db(id, d, response.json())
-            sync_logger.error(f"Failed to send data {d}: {response.text}")
+        if company_config_url is None:
+            company_config_url = SendController.get_user_config_url(user_id)
+        payloads = {d.pop("id", None): d for d in data}
+        results = dispatcher.dispatch([
+            SendController.company_request(id, company_config_url, "post", path, d) for id, d in payloads.items()
+        ])
+        for result in results:
+            if result.ok:
+                SyncController.save_successful_request_to_db(result.key, payloads[result.key], result.body)
+                continue
+            sync_logger.error(f"Failed to send data {payloads[result.key]}: {result.describe()}")
 
 
     @staticmethod
-    def update_omc_data_to_company_config(user_id: int, data: list[dict[str, str]], path: str
+    def update_omc_data_to_company_config(user_id: int, data: list[dict[str, str]], path: str, company_config_url: dict[str, str] = None
     ) -> None:
         """
         Send data to the user's specific company config.
         """
 
-        company_config_url = SendController.get_user_config_url(user_id)
-        url = f"http://{company_config_url['api_endpoint']}{path}"
-        headers = {
-            "Content-Type": "application/json",
-            "API-KEY": company_config_url["api_key"],
-        }
-        for d in data:
-            id = d.pop("id", None)
-            response =  requests.put(
-                url=url,
-                headers=headers,
-                json=d,
-            )
-            if response.status_code == 200:
-                sync_logger.info(f"Successfully updated data {d}: {response.text}")
-                return
-            sync_logger.error(f"Failed to update data {d}: {response.text}")
-            SendController.save_failed_to_update_request_to_db(id, d, False)
+        if company_config_url is None:
+            company_config_url = SendController.get_user_config_url(user_id)
+        payloads = {d.pop("id", None): d for d in data}
+        results = dispatcher.dispatch([
+            SendController.company_request(id, company_config_url, "put", path, d) for id, d in payloads.items()
+        ])
+        for result in results:
+            if result.ok:
+                sync_logger.info(f"Successfully updated data {payloads[result.key]}: {result.body}")
+                continue
+            sync_logger.error(f"Failed to update data {payloads[result.key]}: {result.describe()}")
+            SendController.save_failed_to_update_request_to_db(result.key, payloads[result.key], False)
 
 
     @staticmethod
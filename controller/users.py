@@ -1,12 +1,15 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from sqlalchemy.orm import Session
 from utils import sql as sql
 
 
 from schemas.users import  UserLogin
 from utils.common import  verify_password
 from models.users import User, SystemAdmin
-from utils.session import CreateDBSession
+from utils.session import CreateDBSession, on_commit
 from utils.auth import AuthToken
+from controller.sync import SendController
 from errors.exception import AuthException
 from config.setting import settings
 from utils.ldap import LDAPAuth
@@ -33,7 +36,7 @@ class UserController:
     
 
     @staticmethod
-    def add_user(user_data: dict) -> Dict:
+    def add_user(user_data: dict, db_session: Optional[Session] = None) -> Dict:
         """Add a new user to the database
 
         :param user_data: The user data to be added
@@ -42,7 +45,7 @@ class UserController:
         :rtype: dict
         """
         user_ob = User(**user_data)
-        user = sql.add_object_to_database(user_ob)
+        user = sql.add_object_to_database(user_ob, db_session)
         return user
     
 
@@ -50,7 +53,7 @@ class UserController:
     
 
     @staticmethod
-    def login(data: UserLogin) -> Dict:
+    def login(data: UserLogin, db_session: Optional[Session] = None) -> Dict:
         """Login a user and return a token
 
         :param data: The user data to be logged in
@@ -58,13 +61,14 @@ class UserController:
         :return: The user data that was logged in
         :rtype: dict
         """
-        with CreateDBSession() as db_session:
-            db_user = User.get_user_by_email(data.email)
+        with CreateDBSession(db_session) as database_session:
+            db_user = User.get_user_by_email(data.email, database_session)
             if not db_user: 
                 raise AuthException(msg="User not found", code = 404)
             user = LDAPAuth.authenticate_user(data.email, data.password)
             if not db_user.name:
-                sql.update_object_in_database(User, "email", data.email, {"name": user["name"]})
+                sql.update_object_in_database(User, "email", data.email, {"name": user["name"]}, db_session)
+                on_commit(db_session, lambda: AuthToken.invalidate_identity(data.email))
             token = AuthToken.encode_auth_token_for_user(user)
             return {
                 "token": token, 
@@ -73,7 +77,7 @@ class UserController:
         
 
     @staticmethod
-    def login_system_admin(data: UserLogin) -> Dict:
+    def login_system_admin(data: UserLogin, db_session: Optional[Session] = None) -> Dict:
         """Login a system admin and return a token
 
         :param data: The user data to be logged in
@@ -81,7 +85,7 @@ class UserController:
         :return: The user data that was logged in
         :rtype: dict
         """
-        db_user = SystemAdmin.get_system_admin_by_email(data.email)
+        db_user = SystemAdmin.get_system_admin_by_email(data.email, db_session)
         if not db_user: 
             raise AuthException(msg="User not found", code = 404)
         if not verify_password(data.password, db_user.password):
@@ -94,7 +98,7 @@ class UserController:
     
 
 
-    def get_all_users(company_id: int = None) -> List[Dict]:
+    def get_all_users(company_id: int = None, db_session: Optional[Session] = None) -> List[Dict]:
         """Get all users from the database
 
         :param company_id: The company id to get users from
@@ -102,15 +106,15 @@ class UserController:
         :return: The user data that was retrieved
         :rtype: list
         """
-        with CreateDBSession() as db_session:
-            query = db_session.query(User)
+        with CreateDBSession(db_session) as db_session:
+            query = db_session.query(User).options(*User.load_profile("listing"))
             if company_id:
                 query = query.filter(User.company_id == company_id)
             users = query.all()
             return [user for user in users]
         
     @staticmethod
-    def get_user(user_id: int) -> Dict:
+    def get_user(user_id: int, db_session: Optional[Session] = None) -> Dict:
         """Get a user from the database
 
         :param user_id: The user id to get
@@ -118,14 +122,14 @@ class UserController:
         :return: The user data that was retrieved
         :rtype: dict
         """
-        user = sql.get_object_by_id_from_database(User, user_id)
+        user = sql.get_object_by_id_from_database(User, user_id, db_session)
         if not user:
             raise AuthException(msg="User not found", code = 404)
         return user
     
 
     @staticmethod
-    def update_user(user_id: int, user_data: dict, company_id: Union[int, None]) -> Dict:
+    def update_user(user_id: int, user_data: dict, company_id: Union[int, None], db_session: Optional[Session] = None) -> Dict:
         """Update a user in the database
 
         :param user_id: The user id to be updated
@@ -135,12 +139,17 @@ class UserController:
         :return: The updated user data or None if not found
         :rtype: dict
         """
-        if company_id:
-            user = sql.get_object_by_id_from_database(User, user_id)
-            if not user or user.company_id != company_id:
-                raise AuthException(msg="User not found", code = 404)
-        user = sql.update_object_in_database(User, "id", user_id, user_data)
+        user = sql.get_object_by_id_from_database(User, user_id, db_session)
+        if not user or (company_id and user.company_id != company_id):
+            raise AuthException(msg="User not found", code = 404)
+        previous_email = user.email
+        user = sql.update_object_in_database(User, "id", user_id, user_data, db_session)
         if not user:
             raise AuthException(msg="User not found", code = 404)
+        # a cache reload before the commit would store the old role under the new version
+        email, user_id = user.email, user.id
+        on_commit(db_session, lambda: AuthToken.invalidate_identity(previous_email, email))
+        if "company_id" in user_data:
+            on_commit(db_session, lambda: SendController.invalidate_user_configs(user_id))
         return user
 
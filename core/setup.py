@@ -4,11 +4,15 @@ This module shows how to setup and
 instantiate a database connection
 """
 
-from typing import Any
+import threading
+import time
+from typing import Any, Dict
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 
 from config import setting
@@ -16,16 +20,103 @@ from config import setting
 settings = setting.Settings()
 
 
+class WaitTimingMixin:
+    """Records how long callers wait for a pooled connection"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # checkouts run on many threads, and += on the counters is not atomic
+        self._wait_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+    def wait_stats(self) -> Dict[str, Any]:
+        """A consistent snapshot of the wait counters"""
+        with self._wait_lock:
+            checkouts, total_wait, max_wait = self.checkouts, self.total_wait, self.max_wait
+        return {
+            "checkouts": checkouts,
+            "total_wait_seconds": round(total_wait, 6),
+            "avg_wait_seconds": round(total_wait / checkouts, 6) if checkouts else 0.0,
+            "max_wait_seconds": round(max_wait, 6),
+        }
+
+
+class TimedQueuePool(WaitTimingMixin, QueuePool):
+    """QueuePool for the blocking engine"""
+
+
+class TimedAsyncQueuePool(WaitTimingMixin, AsyncAdaptedQueuePool):
+    """QueuePool for the asyncio engine"""
+
+
+def async_url(url: str) -> str:
+    """Map a database url to its asyncio driver
+
+    postgresql urls use asyncpg and sqlite urls use aiosqlite
+    """
+    scheme, _, rest = url.partition("://")
+    driver = scheme.split("+")[0]
+    if driver in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def engine_options(url: str, poolclass: type = TimedQueuePool) -> Dict[str, Any]:
+    """Build the pool options for a database url
+
+    SQLite in-memory databases live inside a single connection,
+    so they keep SQLAlchemy's default pool.
+    """
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    options = {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if url.startswith("sqlite") and poolclass is TimedQueuePool:
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def pool_stats(engine: Any) -> Dict[str, Any]:
+    """Collect connection pool usage for an engine"""
+    pool = engine.pool
+    if not isinstance(pool, WaitTimingMixin):
+        return {"pool": pool.status()}
+    return {
+        "pool": pool.status(),
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        **pool.wait_stats(),
+    }
+
+
 class DatabaseSetup:
     def __init__(self) -> None:
         """Construct an Database Operator"""
-        if settings.TESTING:
-            self._engine = create_engine(
-                settings.POSTGRES_URL,  # type: ignore
-                # connect_args={"check_same_thread": False},
-            )
-        else:
-            self._engine = create_engine(settings.DATABASE_URL)
+        url = settings.POSTGRES_URL if settings.TESTING else settings.DATABASE_URL
+        self._engine = create_engine(url, **engine_options(url))  # type: ignore
         self._session_maker = sessionmaker(
             bind=self._engine, autocommit=False, autoflush=False
         )
@@ -63,6 +154,60 @@ class DatabaseSetup:
         """
         return self._engine
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Grant pool statistics
+
+            This method returns the current
+            connection pool usage
+        Returns:
+            dict: pool statistics
+        """
+        return pool_stats(self._engine)
+
+
+class AsyncDatabaseSetup:
+    def __init__(self) -> None:
+        """Construct an asyncio Database Operator
+
+        Shares the url and pool settings of DatabaseSetup
+        and the declarative Base of the blocking engine.
+        """
+        url = async_url(settings.POSTGRES_URL if settings.TESTING else settings.DATABASE_URL)
+        self._engine = create_async_engine(url, **engine_options(url, TimedAsyncQueuePool))
+        self._session_maker = async_sessionmaker(
+            bind=self._engine, autoflush=False, expire_on_commit=False
+        )
+
+    def get_session(self) -> async_sessionmaker:
+        """Grant async session
+
+            This method returns the asyncio
+            database session
+        Returns:
+            object: database session
+        """
+        return self._session_maker
+
+    @property
+    def get_engine(self) -> Any:
+        """Grant async engine
+
+        Returns:
+            object: database engine
+        """
+        return self._engine
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Grant pool statistics
+
+        Returns:
+            dict: pool statistics
+        """
+        return pool_stats(self._engine.sync_engine)
+
 
+# One engine, pool and sessionmaker per process, shared by every CreateDBSession
 database = DatabaseSetup()
-Base = database.get_base
\ No newline at end of file
+Base = database.get_base
+# asyncio counterpart used by AsyncCreateDBSession and the async routes
+async_database = AsyncDatabaseSetup()
\ No newline at end of file
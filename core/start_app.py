@@ -6,7 +6,7 @@ from sqlalchemy.exc import DBAPIError, IntegrityError
 
 
 
-from api.v1.router import health, users, bdcs_omcs, price_entries, companies, stations, products
+from api.v1.router import health, users, bdcs_omcs, price_entries, companies, stations, products, bootstrap
 from config.setting import Settings
 from core import setup as db_setup
 from errors.exception import AuthException, InternalProcessingError
@@ -64,6 +64,11 @@ class AppBuilder:
             prefix=settings.API_PREFIX,
             tags=["Products"],
         )
+        self._app.include_router(
+            bootstrap.bootstrap_router,
+            prefix=settings.API_PREFIX,
+            tags=["Bootstrap"],
+        )
 
 
 
@@ -103,6 +108,8 @@ class AppBuilder:
         db_setup.Base.metadata.create_all(
             bind=db_setup.database.get_engine  # type : ignore
         )
+        # create_all only creates missing tables; columns and indexes added to
+        # existing tables ship as reviewed DDL in migrations/
 
     def get_app(self):
         self.register_routes()
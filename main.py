@@ -4,7 +4,9 @@ This is the main file of the project. It is the entry point of the application.
 """
 
 from controller.sync import SyncController
-from services import on_start
+from services.scheduler import coordinator
+from services.sync_dispatcher import dispatcher
+from services import on_start, s3
 
 
 
@@ -23,4 +25,13 @@ async def startup_event():
     SyncController.schedule_retry()
     on_start.create_default_admin()
 
-    
\ No newline at end of file
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Hand the scheduler lease over, close the pooled connections to company endpoints
+    and let in-flight image uploads finish.
+    """
+    coordinator.shutdown()
+    dispatcher.close()
+    s3.upload_executor.shutdown(wait=True)
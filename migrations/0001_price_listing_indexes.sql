@@ -0,0 +1,18 @@
+-- Composite indexes for the price entry listing filters and keyset pagination
+-- (user_id, seller_type, optional window, then the sort column and id as tie-breaker)
+-- and for loading product prices and images by price entry.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_price_entries_user_seller_created
+    ON price_entries (user_id, seller_type, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_price_entries_user_seller_date
+    ON price_entries (user_id, seller_type, date, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_price_entries_user_seller_window_created
+    ON price_entries (user_id, seller_type, "window", created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_prices_price_entry_product
+    ON product_prices (price_entry_id, product_type);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_price_entry_images_price_entry_id
+    ON price_entry_images (price_entry_id);
@@ -0,0 +1,6 @@
+-- Per-company outbound sync rate limit (requests per second) and burst size.
+-- Both stay null, meaning unlimited, until set for a company.
+
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS sync_rate_limit FLOAT;
+
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS sync_burst INTEGER;
@@ -0,0 +1,9 @@
+-- (updated_at, id) indexes behind the reference data changes-since feed.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bdcs_updated_at ON bdcs (updated_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_omcs_updated_at ON omcs (updated_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_stations_updated_at ON stations (updated_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_products_updated_at ON products (updated_at, id);
@@ -0,0 +1,4 @@
+-- Whether a company endpoint accepts an array of items on {path}/batch.
+-- Existing companies start on single-item sync; the server default fills them in.
+
+ALTER TABLE companies ADD COLUMN IF NOT EXISTS supports_batch_sync BOOLEAN NOT NULL DEFAULT false;
@@ -1,26 +1,31 @@
 from typing import Optional
 
-from sqlalchemy import String, or_
+from sqlalchemy import String, insert, or_
 
 from sqlalchemy.orm import Mapped, Session
 from sqlalchemy.orm import mapped_column
 from datetime import datetime
 from enum import Enum
-from typing import List, Literal
+from typing import Dict, List, Literal
 
 
 
 
-from sqlalchemy import ForeignKey, Float, DateTime, Boolean, Integer
-from sqlalchemy.orm import  Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, Float, DateTime, Boolean, Integer, Index
+from sqlalchemy.orm import  Mapped, joinedload, mapped_column, relationship, selectinload
 from sqlalchemy import Enum as SQLAlchemyEnum
 
 
 from models.custom_base import CustomBase
+from models.stations import Station
+from models.sync_outbox import SyncOperation, SyncOutbox
 
 
 class BDC(CustomBase):
     __tablename__ = "bdcs"
+    __table_args__ = (
+        Index("ix_bdcs_updated_at", "updated_at", "id"),
+    )
 
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     price_entries: Mapped[List["PriceEntry"]] = relationship(back_populates="bdc")
@@ -35,34 +40,24 @@ class BDC(CustomBase):
         return bdc
     
     @classmethod
-    def sync_bdcs(cls, db_session: Session, bdc_data: List[dict]):
-
-
-
-
+    def sync_bdcs(cls, db_session: Session, bdc_data: List[dict], dry_run: bool = False) -> Dict[str, List[dict]]:
         """
         Sync BDCs with the database.
-        This method will add or update BDCs based on the provided data.
-        remove bdcs that are not in the list of bdc_data
-        add all new bdcs, do not update existing bdcs
+        BDCs that are not in bdc_data are soft-deleted, soft-deleted BDCs that are
+        back are restored and new BDCs are added; existing BDCs are not updated.
+        Returns the added, removed and restored names; dry_run applies nothing.
         """
-        existing_bdc_names = {(bdc.name) for bdc in db_session.query(cls).all()}
-        new_bdc_names = {(bdc["name"]) for bdc in bdc_data}
-        for bdc in existing_bdc_names - new_bdc_names:
-            bdc_instance = db_session.query(cls).filter(cls.name == bdc).first()
-            if bdc_instance and bdc_instance.deleted_at is None:
-                bdc_instance.soft_delete()
-            else:
-                bdc_instance.restore()
-                # db_session.delete(bdc_instance)
-        for bdc_name in new_bdc_names - existing_bdc_names:
-            cls.add_bdc(db_session, bdc_name)
-        db_session.commit()
-        return db_session.query(cls).all()
+        diff = cls.sync_by_keys(db_session, ("name",), bdc_data, dry_run=dry_run)
+        if not dry_run:
+            db_session.commit()
+        return diff
 
 
 class OMC(CustomBase):
     __tablename__ = "omcs"
+    __table_args__ = (
+        Index("ix_omcs_updated_at", "updated_at", "id"),
+    )
 
 
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
@@ -78,26 +73,17 @@ class OMC(CustomBase):
     
 
     @classmethod
-    def sync_omcs(cls, db_session: Session, omc_data: List[dict]):
+    def sync_omcs(cls, db_session: Session, omc_data: List[dict], dry_run: bool = False) -> Dict[str, List[dict]]:
         """
         Sync OMCs with the database.
-        This method will add or update OMCs based on the provided data.
-        remove omcs that are not in the list of omc_data
-        add all new omcs, do not update existing omcs
+        OMCs that are not in omc_data are soft-deleted, soft-deleted OMCs that are
+        back are restored and new OMCs are added; existing OMCs are not updated.
+        Returns the added, removed and restored names; dry_run applies nothing.
         """
-        existing_omc_names = {(omc.name) for omc in db_session.query(cls).all()}
-        new_omc_names = {(omc["name"]) for omc in omc_data}
-        for omc in existing_omc_names - new_omc_names:
-            omc_instance = db_session.query(cls).filter(cls.name == omc).first()
-            if omc_instance and omc_instance.deleted_at is None:
-                omc_instance.soft_delete()
-            else:
-                omc_instance.restore()
-                # db_session.delete(omc_instance)
-        for omc_name in new_omc_names - existing_omc_names:
-            cls.add_omc(db_session, omc_name)
-        db_session.commit()
-        return db_session.query(cls).all()
+        diff = cls.sync_by_keys(db_session, ("name",), omc_data, dry_run=dry_run)
+        if not dry_run:
+            db_session.commit()
+        return diff
 
 
 class ProductType(str, Enum):
@@ -122,6 +108,13 @@ class TransactionTerm(str, Enum):
 
 class PriceEntry(CustomBase):
     __tablename__ = "price_entries"
+    # Match PriceEntryQuery: every listing is scoped to a user and seller type,
+    # then ranged and keyset-paginated on created_at or the business date.
+    __table_args__ = (
+        Index("ix_price_entries_user_seller_created", "user_id", "seller_type", "created_at", "id"),
+        Index("ix_price_entries_user_seller_date", "user_id", "seller_type", "date", "id"),
+        Index("ix_price_entries_user_seller_window_created", "user_id", "seller_type", "window", "created_at", "id"),
+    )
 
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     seller_type: Mapped[SellerType] = mapped_column(SQLAlchemyEnum(SellerType), nullable=False)
@@ -136,17 +129,54 @@ class PriceEntry(CustomBase):
     town_of_loading: Mapped[Optional[str]] = mapped_column(String)
     transaction_term: Mapped[Optional[TransactionTerm]] = mapped_column(SQLAlchemyEnum(TransactionTerm))
     station_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("stations.id"), nullable=True)
-    station: Mapped[Optional["Station"]] = relationship(back_populates="price_entries_station", lazy="selectin")
+    station: Mapped[Optional["Station"]] = relationship(back_populates="price_entries_station")
 
-    user: Mapped["User"] = relationship(back_populates="price_entries", lazy="selectin")
-    omc: Mapped[Optional["OMC"]] = relationship(back_populates="price_entries", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="price_entries")
+    omc: Mapped[Optional["OMC"]] = relationship(back_populates="price_entries")
     # source_omc: Mapped[Optional["OMC"]] = relationship(foreign_keys=[source_id],lazy="selectin")
-    bdc: Mapped[Optional["BDC"]] = relationship(back_populates="price_entries", lazy="selectin")
-    product_price: Mapped["ProductPrice"] = relationship(back_populates="price_entry", lazy="selectin")
-    images: Mapped[List["PriceEntryImage"]] = relationship(back_populates="price_entry", lazy="selectin")
+    bdc: Mapped[Optional["BDC"]] = relationship(back_populates="price_entries")
+    # entries written per product have one price each; older entries may have several, the first is used
+    product_price: Mapped["ProductPrice"] = relationship(back_populates="price_entry", order_by="ProductPrice.id")
+    images: Mapped[List["PriceEntryImage"]] = relationship(back_populates="price_entry")
     external_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     update_sync_status: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    __loader_profiles__ = {
+        # OMCPriceEntryOut / BDCPriceEntryOut
+        "listing": lambda: (
+            joinedload(PriceEntry.product_price),
+            joinedload(PriceEntry.station),
+            selectinload(PriceEntry.images),
+        ),
+        "detail": lambda: (
+            joinedload(PriceEntry.product_price),
+            joinedload(PriceEntry.station),
+            joinedload(PriceEntry.omc),
+            joinedload(PriceEntry.bdc),
+            selectinload(PriceEntry.images),
+        ),
+        # omc_sync_json / bdc_sync_json and their failed_* variants
+        "sync_payload": lambda: (
+            joinedload(PriceEntry.product_price),
+            joinedload(PriceEntry.station),
+            joinedload(PriceEntry.omc),
+            joinedload(PriceEntry.bdc),
+        ),
+    }
+
+    @staticmethod
+    def get_price_entries_by_ids(db_session: Session, price_entry_ids: List[int], profile: str = "detail") -> List["PriceEntry"]:
+        """Reload price entries with a loader profile, refreshing any copy already in the session"""
+        price_entries = (
+            db_session.query(PriceEntry)
+            .options(*PriceEntry.load_profile(profile))
+            .filter(PriceEntry.id.in_(price_entry_ids))
+            .order_by(PriceEntry.id)
+            .populate_existing()
+            .all()
+        )
+        return price_entries
+
     @staticmethod
     def add_omc_price_entry(db_session: Session, user_id: int, omc_id: int, window: WindowType, product: dict,  station_location: str, images: Optional[List[str]]):
         price_entry = PriceEntry(seller_type= "omc", user_id=user_id, omc_id=omc_id, window=window, station_location=station_location)
@@ -169,49 +199,68 @@ class PriceEntry(CustomBase):
         return price_entry
 
     @staticmethod
-    def add_multiple_omc_price_entry(db_session: Session,omc_base_data : dict, product: dict, images: Optional[List[str]]):
-        prince_entry_list = []
+    def bulk_add_price_entries(db_session: Session, base_data: dict, product_price_rows: List[dict], images: Optional[List[dict]]) -> List["PriceEntry"]:
+        """
+        Write one price entry per product, its product price and the shared images
+        as three set-based INSERTs, then reload the entries in one query.
+        """
+        if not product_price_rows:
+            return []
+        # The entry rows are identical, so any pairing of ids and products is correct
+        # and RETURNING need not follow parameter order. Asking for that order makes
+        # SQLite fall back to one INSERT per row; without it every dialect batches.
+        price_entry_ids = sorted(db_session.scalars(
+            insert(PriceEntry).returning(PriceEntry.id),
+            [dict(base_data) for _ in product_price_rows],
+        ).all())
+        db_session.execute(
+            insert(ProductPrice),
+            [{**row, "price_entry_id": price_entry_id} for price_entry_id, row in zip(price_entry_ids, product_price_rows)],
+        )
+        if images:
+            db_session.execute(
+                insert(PriceEntryImage),
+                [
+                    {"price_entry_id": price_entry_id, "image_url": image["image_url"]}
+                    for price_entry_id in price_entry_ids
+                    for image in images
+                ],
+            )
+        SyncOutbox.enqueue(db_session, price_entry_ids, SyncOperation.CREATE, new_entries=True)
+        # the caller commits, with the rest of its unit of work
+        db_session.flush()
+        return PriceEntry.get_price_entries_by_ids(db_session, price_entry_ids)
 
+    @staticmethod
+    def add_multiple_omc_price_entry(db_session: Session,omc_base_data : dict, product: dict, images: Optional[List[str]]):
         product_prices = product.price.split(",")
         product_types = product.product_type.split(",")
-        for product_price,product_type in zip(product_prices, product_types):
-            product_price_data = {
+        product_price_rows = [
+            {
                 "product_type": product_type,
                 "price": float(product_price),
                 "unit_of_measurement": compute_unit_of_measurement(product_type),
             }
-            price_entry = PriceEntry(**omc_base_data)
-            db_session.add(price_entry)
-            db_session.flush()
-            ProductPrice.add_product_price(db_session, price_entry.id, product_price_data)
-            prince_entry_list.append(price_entry)
-            PriceEntryImage.add_images(db_session, price_entry.id, images)
-        db_session.commit()
-        db_session.refresh(price_entry)
-        return prince_entry_list
+            for product_price, product_type in zip(product_prices, product_types)
+        ]
+        return PriceEntry.bulk_add_price_entries(db_session, omc_base_data, product_price_rows, images)
 
     @staticmethod
     def add_multiple_bdc_price_entry(db_session: Session, bdc_base_data: dict, product: dict, images: Optional[List[str]]):
-        price_entry_list = []
         product_prices = product.price.split(",")
         product_types = product.product_type.split(",")
-        for product_price,product_type in zip(product_prices, product_types):
-            product_price_data = {
+        is_credit = bdc_base_data['transaction_term'] == TransactionTerm.CREDIT
+        product_price_rows = [
+            {
                 "product_type": product_type,
                 "price": float(product_price),
                 "unit_of_measurement": compute_unit_of_measurement(product_type),
-                "credit_price": product.credit_price if bdc_base_data['transaction_term'] == TransactionTerm.CREDIT else None,
-                "credit_days": product.credit_days if bdc_base_data['transaction_term'] == TransactionTerm.CREDIT else None,
+                "credit_price": product.credit_price if is_credit else None,
+                "credit_days": product.credit_days if is_credit else None,
             }
-            price_entry = PriceEntry(**bdc_base_data)
-            db_session.add(price_entry)
-            db_session.flush()
-            ProductPrice.add_product_price(db_session, price_entry.id, product_price_data)
-            PriceEntryImage.add_images(db_session, price_entry.id, images)
-            price_entry_list.append(price_entry)
-        db_session.commit()
-        db_session.refresh(price_entry)
-        return price_entry_list
+            for product_price, product_type in zip(product_prices, product_types)
+        ]
+        return PriceEntry.bulk_add_price_entries(db_session, bdc_base_data, product_price_rows, images)
 
     @staticmethod
     def add_bdc_price_entry(db_session: Session, user_id: int, bdc_id: int, window: WindowType, product: dict, town_of_loading: str, transaction_term: TransactionTerm, images: Optional[List[str]]):
@@ -266,7 +315,7 @@ class PriceEntry(CustomBase):
 
     @staticmethod
     def update_omc_price_entry(db_session: Session, price_entry_id: int, seller_type: Literal["omc", "bdc"], product: dict, images: List[str], basic_fields: dict, new_price_entry_images: List[str] = None) -> Optional["PriceEntry"]:
-        price_entry = db_session.query(PriceEntry).filter(PriceEntry.id == price_entry_id, PriceEntry.seller_type == seller_type).first()
+        price_entry = db_session.query(PriceEntry).options(*PriceEntry.load_profile("detail")).filter(PriceEntry.id == price_entry_id, PriceEntry.seller_type == seller_type).first()
         if price_entry:
             PriceEntry.update_basic_fields(db_session, price_entry, basic_fields)
             if product:
@@ -275,9 +324,11 @@ class PriceEntry(CustomBase):
                 PriceEntryImage.update_images(db_session, price_entry_id, images)
             if new_price_entry_images:
                 PriceEntryImage.add_images(db_session, price_entry_id, new_price_entry_images)
-            db_session.commit()
-            db_session.refresh(price_entry)
-            return price_entry
+            # not yet delivered: the pending create will carry the new values
+            operation = SyncOperation.UPDATE if price_entry.external_id else SyncOperation.CREATE
+            SyncOutbox.enqueue(db_session, [price_entry.id], operation)
+            db_session.flush()
+            return PriceEntry.get_price_entries_by_ids(db_session, [price_entry.id])[0]
         return None
 
     def omc_sync_json(self):
@@ -334,52 +385,12 @@ class PriceEntry(CustomBase):
             "external_id": self.external_id if self.external_id else None,
         }
 
-    @staticmethod
-    def get_all_failed_price_entries(db: Session, omc_or_bdc: Literal["omc", "bdc"]):
-        """
-        Get all price entries that have failed to sync with the BDC or OMC
-        """
-        if omc_or_bdc == "omc":
-            failed_omcs = (
-                db.query(PriceEntry)
-                .filter(
-                    PriceEntry.seller_type == SellerType.OMC,
-                    PriceEntry.external_id.is_(None),
-                    or_(
-                        PriceEntry.seller_type == SellerType.OMC,
-                        PriceEntry.update_sync_status is False,
-
-                    ),
-                )
-                .all()
-            )
-            return group_by_external_id(failed_omcs)
-        failed_bcds = (
-            db.query(PriceEntry)
-            .filter(
-                PriceEntry.seller_type == SellerType.BDC,
-                PriceEntry.external_id.is_(None),
-                or_(
-                    PriceEntry.seller_type == SellerType.BDC,
-                    PriceEntry.update_sync_status is False,
-                ),
-            )
-            .all()
-        )
-        return group_by_external_id(failed_bcds)
-
-
-def group_by_external_id(price_entries: List[PriceEntry]) -> dict:
-
-    grouped_entries = {
-        "to_update": [entry for entry in price_entries if entry.external_id],
-        "to_create": [entry for entry in price_entries if not entry.external_id]
-    }
-    return grouped_entries
-
 
 class ProductPrice(CustomBase):
     __tablename__ = "product_prices"
+    __table_args__ = (
+        Index("ix_product_prices_price_entry_product", "price_entry_id", "product_type"),
+    )
     
     price_entry_id: Mapped[int] = mapped_column(ForeignKey("price_entries.id"))
     product_type: Mapped[str] = mapped_column(nullable=False)
@@ -429,12 +440,14 @@ class ProductPrice(CustomBase):
 class PriceEntryImage(CustomBase):
     __tablename__ = "price_entry_images"
     
-    price_entry_id: Mapped[int] = mapped_column(ForeignKey("price_entries.id"))
+    price_entry_id: Mapped[int] = mapped_column(ForeignKey("price_entries.id"), index=True)
     image_url: Mapped[str] = mapped_column(String, nullable=False)
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     
     price_entry: Mapped["PriceEntry"] = relationship(back_populates="images")
 
+    # presigned GET URL, set on loaded images by s3.sign_price_entry_images; not a column
+    signed_url = None
 
     @staticmethod
     def add_images(db_session: Session, price_entry_id: int, images: List[str]):
@@ -480,8 +493,8 @@ class PriceEntryImage(CustomBase):
             db_session.add(img)
             kept_images.append(img)
 
-        # Commit changes
-        db_session.commit()
+        # Write the changes, the caller commits
+        db_session.flush()
 
         # Refresh all kept images to ensure we have current state
         for img in kept_images:
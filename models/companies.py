@@ -1,6 +1,6 @@
 from typing import Optional, List
 
-from sqlalchemy import String, ForeignKey, Integer
+from sqlalchemy import Boolean, Float, String, ForeignKey, Integer, false
 from sqlalchemy.orm import Session
 
 from sqlalchemy.orm import Mapped
@@ -20,10 +20,32 @@ class Company(CustomBase):
     __tablename__ = "companies"
 
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
-    allowed_users: Mapped[List["User"]] = relationship("User", back_populates="company", lazy="selectin", cascade="all, delete-orphan")
+    allowed_users: Mapped[List["User"]] = relationship("User", back_populates="company", cascade="all, delete-orphan")
     api_key: Mapped[str] = mapped_column(String)
     api_user: Mapped[str] = mapped_column(String)
     api_endpoint: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    # endpoint accepts an array of items on {path}/batch
+    supports_batch_sync: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
+    # outbound sync rate limit in requests per second and burst size, unlimited when null
+    sync_rate_limit: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    sync_burst: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    __loader_profiles__ = {
+        "listing": lambda: (),
+        "detail": lambda: (),
+    }
+
+    def sync_config(self) -> dict:
+        """Endpoint, credentials and limits used to send price entries to this company"""
+        return {
+            "company_id": self.id,
+            "api_key": self.api_key,
+            "api_user": self.api_user,
+            "api_endpoint": self.api_endpoint,
+            "supports_batch_sync": bool(self.supports_batch_sync),
+            "sync_rate_limit": self.sync_rate_limit,
+            "sync_burst": self.sync_burst,
+        }
 
 
 
@@ -1,15 +1,20 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 
 
-from sqlalchemy import func, TIMESTAMP, Integer
-from sqlalchemy.orm import Mapped
+from sqlalchemy import Column, MetaData, String, Table, and_, exists, func, insert, select, update, TIMESTAMP, Integer
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Mapped, Session
 from sqlalchemy.orm import mapped_column
 
 
 from core import setup
 
+# INSERT constructs supporting ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
 class CustomBase(setup.Base):
     __abstract__ = True
 
@@ -27,6 +32,96 @@ class CustomBase(setup.Base):
 
 
     
+    # Named loader profiles, e.g. {"listing": lambda: (selectinload(Model.items),)}
+    # Relationships default to lazy loading; queries opt in to what they serialize.
+    __loader_profiles__: Dict[str, Callable[[], Tuple]] = {}
+
+    @classmethod
+    def load_profile(cls, name: str) -> Tuple:
+        """Loader options for a named profile, to pass to query.options()"""
+        profile = cls.__loader_profiles__.get(name)
+        if profile is None:
+            raise ValueError(f"Unknown loader profile '{name}' for {cls.__name__}")
+        return profile()
+
+    @classmethod
+    def sync_by_keys(
+        cls,
+        db_session: Session,
+        keys: Sequence[str],
+        rows: List[dict],
+        dry_run: bool = False,
+        remove_missing: bool = True,
+    ) -> Dict[str, List[dict]]:
+        """
+        Make the table match rows, identified by the key columns, in a few set-based statements
+        and without committing. The rows go into a temporary staging table, then
+        - rows missing from the list are soft-deleted (unless remove_missing is False),
+        - soft-deleted rows back in the list are restored,
+        - new rows are inserted in one INSERT ... SELECT guarded by ON CONFLICT DO NOTHING.
+        Returns the added, removed and restored keys; dry_run only computes them.
+        """
+        staging = Table(
+            f"staging_{cls.__tablename__}", MetaData(),
+            *(Column(key, String) for key in keys),
+            prefixes=["TEMPORARY"],
+        )
+        target = cls.__table__
+        connection = db_session.connection()
+        # created inside the transaction, so a rollback removes it as well
+        staging.create(connection)
+        unique_rows = {tuple(row[key] for key in keys) for row in rows}
+        if unique_rows:
+            connection.execute(insert(staging), [dict(zip(keys, row)) for row in unique_rows])
+        matches = and_(*(target.c[key] == staging.c[key] for key in keys))
+        target_keys = [target.c[key] for key in keys]
+        listed = exists().where(matches)
+        added = select(*staging.c).where(~exists().where(matches))
+        removed = select(*target_keys).where(target.c.deleted_at.is_(None), ~listed)
+        restored = select(*target_keys).where(target.c.deleted_at.is_not(None), listed)
+        diff = {
+            "added": [dict(row._mapping) for row in connection.execute(added)],
+            "removed": [dict(row._mapping) for row in connection.execute(removed)] if remove_missing else [],
+            "restored": [dict(row._mapping) for row in connection.execute(restored)],
+        }
+        if not dry_run:
+            if diff["removed"]:
+                connection.execute(update(target).where(target.c.deleted_at.is_(None), ~listed).values(deleted_at=datetime.now()))
+            if diff["restored"]:
+                connection.execute(update(target).where(target.c.deleted_at.is_not(None), listed).values(deleted_at=None))
+            if diff["added"]:
+                dialect_insert = UPSERT_INSERTS.get(connection.dialect.name)
+                if dialect_insert is not None:
+                    connection.execute(dialect_insert(target).from_select(keys, added).on_conflict_do_nothing())
+                else:
+                    connection.execute(insert(target).from_select(keys, added))
+        staging.drop(connection)
+        return diff
+
+    @classmethod
+    def changes_since(
+        cls,
+        db_session: Session,
+        columns: Sequence[str],
+        since: Optional[datetime] = None,
+        overlap: float = 0,
+    ) -> List[dict]:
+        """
+        Rows inserted, updated or soft-deleted since a cursor, as dicts of columns plus
+        updated_at and deleted_at, oldest first; without a cursor, all live rows.
+        The cursor is moved back by overlap seconds, so rows whose transaction started
+        before the cursor was handed out but committed after it are still returned.
+        Meant for tables with an (updated_at, id) index, like the reference tables.
+        """
+        target = cls.__table__
+        statement = select(*(target.c[column] for column in columns), target.c.updated_at, target.c.deleted_at)
+        if since is None:
+            statement = statement.where(target.c.deleted_at.is_(None))
+        else:
+            statement = statement.where(target.c.updated_at >= since - timedelta(seconds=overlap))
+        statement = statement.order_by(target.c.updated_at, target.c.id)
+        return [dict(row._mapping) for row in db_session.execute(statement)]
+
     def soft_delete(self) -> None:
         """Mark a record as soft-deleted."""
         self.deleted_at = datetime.now()
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Index, Integer, String, select
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from models.custom_base import CustomBase
+
+
+class MasterDataSyncRun(CustomBase):
+    """
+    One run of a master-data sync (BDCs, OMCs, stations) against its upstream.
+    Applied runs also keep the upstream validators (ETag, Last-Modified) and
+    the content hash, so the next run can skip an unchanged dataset.
+    """
+    __tablename__ = "master_data_sync_runs"
+    __table_args__ = (
+        Index("ix_master_data_sync_runs_dataset", "dataset", "id"),
+    )
+
+    dataset: Mapped[str] = mapped_column(String, nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    duration_seconds: Mapped[float] = mapped_column(Float, default=0, nullable=False)
+    bytes_fetched: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # "not_modified" (304), "unchanged" (same content hash), "applied" or "dry_run"
+    outcome: Mapped[str] = mapped_column(String, nullable=False)
+    applied: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    etag: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    rows_received: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    added: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    removed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    restored: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    @staticmethod
+    def last_applied(db_session: Session, dataset: str) -> Optional["MasterDataSyncRun"]:
+        """The latest run whose content is in the database, the source of the validators"""
+        return db_session.scalar(
+            select(MasterDataSyncRun)
+            .where(MasterDataSyncRun.dataset == dataset, MasterDataSyncRun.applied.is_(True))
+            .order_by(MasterDataSyncRun.id.desc())
+            .limit(1)
+        )
+
+    @staticmethod
+    def recent(db_session: Session, limit: int) -> List["MasterDataSyncRun"]:
+        return db_session.scalars(select(MasterDataSyncRun).order_by(MasterDataSyncRun.id.desc()).limit(limit)).all()
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Dict, List, Optional
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 
 from sqlalchemy.orm import Mapped, Session
 from sqlalchemy.orm import mapped_column
@@ -11,25 +11,26 @@ from models.custom_base import CustomBase
 
 class Product(CustomBase):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_updated_at", "updated_at", "id"),
+    )
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
 
 
 
 
     @classmethod
-    def sync_products(cls, db_session: Session, products: list) -> None:
+    def sync_products(cls, db_session: Session, products: list, dry_run: bool = False) -> Dict[str, List[dict]]:
         """
         Sync products with the database.
-        If a product exists in the database but not in the provided list, it will be deleted.
-        If a product exists in the provided list but not in the database, it will be added.
+        Products in the provided list but not in the database are added and soft-deleted ones are restored;
+        products missing from the list are kept, as they can also be created by hand.
+        Returns the added and restored products; dry_run applies nothing.
         """
-        for product in products:
-            existing_product = db_session.query(cls).filter_by(name=product['name']).first()
-            if not existing_product:
-                new_product = cls(name=product['name'])
-                db_session.add(new_product)
-        db_session.commit()
-        return db_session.query(cls).all()
+        diff = cls.sync_by_keys(db_session, ("name",), products, dry_run=dry_run, remove_missing=False)
+        if not dry_run:
+            db_session.commit()
+        return diff
     
 
     @classmethod
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, String, case, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from models.custom_base import CustomBase
+
+
+class SchedulerLease(CustomBase):
+    """
+    Time-bound leadership of a named group of scheduled jobs.
+    The holder renews the lease well before it expires; when it stops
+    renewing (crash, shutdown, lost database) any other node can take
+    the lease over once it has expired.
+    """
+    __tablename__ = "scheduler_leases"
+
+    name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    holder: Mapped[str] = mapped_column(String, nullable=False)
+    acquired_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    @staticmethod
+    def acquire(db_session: Session, name: str, holder: str, ttl_seconds: float) -> bool:
+        """
+        Take or renew the lease and commit; True when holder owns it afterwards.
+        A single conditional UPDATE decides between competing nodes, the
+        INSERT only runs the first time the lease is ever taken.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl_seconds)
+        taken = db_session.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == name, or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now))
+            .values(
+                holder=holder,
+                expires_at=expires_at,
+                # a renewal keeps the original acquisition time, a takeover starts a new one
+                acquired_at=case((SchedulerLease.holder == holder, SchedulerLease.acquired_at), else_=now),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        if not taken and db_session.scalar(select(SchedulerLease.id).where(SchedulerLease.name == name)) is None:
+            db_session.add(SchedulerLease(name=name, holder=holder, acquired_at=now, expires_at=expires_at))
+            try:
+                db_session.commit()
+            except IntegrityError:
+                # another node inserted it first
+                db_session.rollback()
+                return False
+            return True
+        db_session.commit()
+        return taken
+
+    @staticmethod
+    def release(db_session: Session, name: str, holder: str) -> None:
+        """Expire the lease now if holder owns it, so another node takes over without waiting"""
+        db_session.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+            .execution_options(synchronize_session=False)
+        )
+        db_session.commit()
+
+    @staticmethod
+    def current(db_session: Session, name: str) -> Optional["SchedulerLease"]:
+        return db_session.scalar(select(SchedulerLease).where(SchedulerLease.name == name))
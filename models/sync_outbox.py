@@ -0,0 +1,135 @@
+import random
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import List, Optional
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, delete, func, insert, select, update
+from sqlalchemy import Enum as SQLAlchemyEnum
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
+
+from models.custom_base import CustomBase
+
+
+class SyncOperation(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Exponential backoff with equal jitter: half the delay fixed, half random"""
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class SyncOutbox(CustomBase):
+    """
+    Price entries waiting to reach their company's system.
+    Rows are written in the same transaction as the price entry and
+    deleted once delivered, so the table only ever holds pending work.
+    """
+    __tablename__ = "sync_outbox"
+    __table_args__ = (
+        Index("ix_sync_outbox_next_attempt", "next_attempt_at", "id"),
+        UniqueConstraint("price_entry_id", "operation", name="uq_sync_outbox_price_entry_operation"),
+    )
+
+    price_entry_id: Mapped[int] = mapped_column(ForeignKey("price_entries.id"))
+    operation: Mapped[SyncOperation] = mapped_column(SQLAlchemyEnum(SyncOperation), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    price_entry: Mapped["PriceEntry"] = relationship()
+
+    @staticmethod
+    def enqueue(db_session: Session, price_entry_ids: List[int], operation: SyncOperation, new_entries: bool = False) -> None:
+        """
+        Queue price entries for delivery, without committing.
+        An entry that already waits for the same operation is made due again
+        instead of being queued twice; the payload is built at send time.
+        new_entries skips that lookup for entries created in this transaction.
+        """
+        if not price_entry_ids:
+            return
+        now = datetime.utcnow()
+        queued = set() if new_entries else set(db_session.scalars(
+            update(SyncOutbox)
+            .where(SyncOutbox.price_entry_id.in_(price_entry_ids), SyncOutbox.operation == operation)
+            .values(next_attempt_at=now)
+            .returning(SyncOutbox.price_entry_id),
+            execution_options={"synchronize_session": False},
+        ).all())
+        rows = [
+            {"price_entry_id": price_entry_id, "operation": operation, "attempts": 0, "enqueued_at": now, "next_attempt_at": now}
+            for price_entry_id in price_entry_ids
+            if price_entry_id not in queued
+        ]
+        if rows:
+            db_session.execute(insert(SyncOutbox), rows)
+
+    @staticmethod
+    def claim(db_session: Session, limit: int, lease_seconds: float, price_entry_ids: Optional[List[int]] = None) -> List["SyncOutbox"]:
+        """
+        Lease up to limit due rows and commit, so other workers skip them.
+        A row whose worker dies becomes due again when the lease runs out.
+        """
+        now = datetime.utcnow()
+        query = (
+            select(SyncOutbox)
+            .where(SyncOutbox.next_attempt_at <= now)
+            .order_by(SyncOutbox.next_attempt_at, SyncOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if price_entry_ids is not None:
+            query = query.where(SyncOutbox.price_entry_id.in_(price_entry_ids))
+        items = db_session.scalars(query).all()
+        for item in items:
+            item.attempts += 1
+            item.next_attempt_at = now + timedelta(seconds=lease_seconds)
+        claimed_ids = [item.id for item in items]
+        db_session.commit()
+        # the commit expired the leased rows, reload them in one query rather than one per item
+        return db_session.scalars(
+            select(SyncOutbox).where(SyncOutbox.id.in_(claimed_ids)).order_by(SyncOutbox.next_attempt_at, SyncOutbox.id)
+        ).all() if claimed_ids else []
+
+    @staticmethod
+    def delivered(db_session: Session, item_ids: List[int]) -> None:
+        if item_ids:
+            db_session.execute(
+                delete(SyncOutbox).where(SyncOutbox.id.in_(item_ids)),
+                execution_options={"synchronize_session": False},
+            )
+
+    @staticmethod
+    def failed(db_session: Session, item: "SyncOutbox", error: str, base: float, cap: float) -> None:
+        item.last_error = error[:1000]
+        item.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(item.attempts, base, cap))
+
+    @staticmethod
+    def postpone(db_session: Session, item: "SyncOutbox", reason: str, delay: float) -> None:
+        """Put back an item that was never sent, without counting its claim as an attempt"""
+        item.attempts -= 1
+        item.last_error = reason[:1000]
+        item.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    @staticmethod
+    def stats(db_session: Session) -> dict:
+        """Queue depth, due items and the age of the oldest item, in one query"""
+        now = datetime.utcnow()
+        depth, due, oldest, max_attempts = db_session.execute(
+            select(
+                func.count(SyncOutbox.id),
+                func.count(SyncOutbox.id).filter(SyncOutbox.next_attempt_at <= now),
+                func.min(SyncOutbox.enqueued_at),
+                func.max(SyncOutbox.attempts),
+            )
+        ).one()
+        return {
+            "depth": depth,
+            "due": due,
+            "oldest_age_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+            "max_attempts": max_attempts or 0,
+        }
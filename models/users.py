@@ -1,11 +1,13 @@
 from typing import Optional
 
+from sqlalchemy.orm import Session
+
 from sqlalchemy import String, Integer
 
 from typing import List
 
 from sqlalchemy import  ForeignKey
-from sqlalchemy.orm import  Mapped, mapped_column, relationship
+from sqlalchemy.orm import  Mapped, joinedload, mapped_column, relationship
 from utils.session import CreateDBSession
 from utils.common import get_password_hash
 
@@ -22,16 +24,22 @@ class User(CustomBase):
     email: Mapped[str] = mapped_column(String, unique=True, index=True)
     name: Mapped[str] = mapped_column(String, nullable=True)
     company_id: Mapped[int] = mapped_column(Integer, ForeignKey("companies.id"))
-    company: Mapped["Company"] = relationship("Company", back_populates="allowed_users", lazy="selectin", uselist=False)
+    company: Mapped["Company"] = relationship("Company", back_populates="allowed_users", uselist=False)
     is_admin: Mapped[bool] = mapped_column(default=False)
-    price_entries: Mapped[List["PriceEntry"]] = relationship(back_populates="user", lazy="selectin")
+    price_entries: Mapped[List["PriceEntry"]] = relationship(back_populates="user")
+
+    __loader_profiles__ = {
+        "auth": lambda: (joinedload(User.company),),
+        "listing": lambda: (),
+        "detail": lambda: (joinedload(User.company),),
+    }
 
 
 
     @staticmethod
-    def get_user_by_email( email: str):
-        with CreateDBSession() as db_session:
-            user = db_session.query(User).filter(User.email == email).first()
+    def get_user_by_email( email: str, db_session: Optional[Session] = None):
+        with CreateDBSession(db_session) as db_session:
+            user = db_session.query(User).options(*User.load_profile("detail")).filter(User.email == email).first()
             return user
         
 
@@ -41,11 +49,7 @@ class User(CustomBase):
         :return: The configuration URL
         :rtype: dict
         """
-        return {
-            "api_key": self.company.api_key,
-            "api_user": self.company.api_user,
-            "api_endpoint": self.company.api_endpoint,
-        }
+        return self.company.sync_config()
         
 
 
@@ -70,8 +74,8 @@ class SystemAdmin(CustomBase):
             return system_admin
         
     @staticmethod
-    def get_system_admin_by_email(email: str) -> Optional["SystemAdmin"]:
-        with CreateDBSession() as db_session:
+    def get_system_admin_by_email(email: str, db_session: Optional[Session] = None) -> Optional["SystemAdmin"]:
+        with CreateDBSession(db_session) as db_session:
             system_admin = db_session.query(SystemAdmin).filter(SystemAdmin.email == email).first()
             return system_admin
         
@@ -26,4 +26,10 @@ class BDCOMCAllOut(BaseModel):
 class DelMessage(BaseModel):
     message: str
     status: bool
+
+
+class MasterDataSync(DelMessage):
+    added: list[dict] = []
+    removed: list[dict] = []
+    restored: list[dict] = []
     
\ No newline at end of file
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from schemas.bdcs import BDCOMCOut
+from schemas.products import Product
+from schemas.stations import StationsOut
+
+
+class Bootstrap(BaseModel):
+    bdcs: List[BDCOMCOut]
+    omcs: List[BDCOMCOut]
+    stations: List[StationsOut]
+    products: List[Product]
+
+
+class BDCOMCChanges(BaseModel):
+    updated: List[BDCOMCOut] = []
+    deleted: List[int] = []
+
+
+class StationChanges(BaseModel):
+    updated: List[StationsOut] = []
+    deleted: List[int] = []
+
+
+class ProductChanges(BaseModel):
+    updated: List[Product] = []
+    deleted: List[int] = []
+
+
+class ReferenceChanges(BaseModel):
+    # pass back as since on the next call; None until the tables have rows
+    cursor: Optional[datetime] = None
+    bdcs: BDCOMCChanges
+    omcs: BDCOMCChanges
+    stations: StationChanges
+    products: ProductChanges
@@ -9,6 +9,9 @@ class CompanyIn(BaseModel):
     api_key: str = Field(..., description="API key for the company")
     api_user: str = Field(..., description="API user for the company")
     api_endpoint: str = Field(..., description="API endpoint for the company")
+    supports_batch_sync: bool = Field(False, description="Endpoint accepts batched sync payloads")
+    sync_rate_limit: Optional[float] = Field(None, gt=0, description="Outbound sync requests per second, unlimited when empty")
+    sync_burst: Optional[int] = Field(None, ge=1, description="Outbound sync burst size")
 
     
 
@@ -20,6 +23,9 @@ class CompanyOut(BaseModel):
     api_key: Optional[str] = Field(..., description="API key for the company")
     api_user: str = Field(..., description="API user for the company")
     api_endpoint: str = Field(..., description="API endpoint for the company")
+    supports_batch_sync: bool = Field(False, description="Endpoint accepts batched sync payloads")
+    sync_rate_limit: Optional[float] = Field(None, gt=0, description="Outbound sync requests per second, unlimited when empty")
+    sync_burst: Optional[int] = Field(None, ge=1, description="Outbound sync burst size")
     created_at: datetime = Field(..., description="Creation date of the company")
 
 
@@ -49,4 +55,7 @@ class CompanyUpdate(BaseModel):
     api_key: Optional[str] = Field(None, description="API key for the company")
     api_user: Optional[str] = Field(None, description="API user for the company")
     api_endpoint: Optional[str] = Field(None, description="API endpoint for the company")
+    supports_batch_sync: Optional[bool] = Field(None, description="Endpoint accepts batched sync payloads")
+    sync_rate_limit: Optional[float] = Field(None, gt=0, description="Outbound sync requests per second")
+    sync_burst: Optional[int] = Field(None, ge=1, description="Outbound sync burst size")
 
@@ -1,4 +1,6 @@
 import enum
+from datetime import datetime
+from typing import List, Optional
 
 import pydantic
 
@@ -12,4 +14,67 @@ class Status(str, enum.Enum):
 class Health(pydantic.BaseModel):
     status: Status
     version: str
-    releaseId: str
\ No newline at end of file
+    releaseId: str
+
+
+class PoolStats(pydantic.BaseModel):
+    pool: str
+    size: Optional[int] = None
+    checked_in: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    total_wait_seconds: Optional[float] = None
+    avg_wait_seconds: Optional[float] = None
+    max_wait_seconds: Optional[float] = None
+
+
+class CacheStats(pydantic.BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class SyncOutboxStats(pydantic.BaseModel):
+    depth: int
+    due: int
+    oldest_age_seconds: float
+    max_attempts: int
+
+
+class CompanyLinkStats(pydantic.BaseModel):
+    company: str
+    circuit: str
+    consecutive_failures: int
+    latency_p50_seconds: Optional[float] = None
+    latency_p99_seconds: Optional[float] = None
+    read_timeout_seconds: float
+    rate_limit: Optional[float] = None
+    burst: int
+
+
+class SchedulerStatus(pydantic.BaseModel):
+    name: str
+    node: str
+    is_leader: bool
+    leader: Optional[str] = None
+    acquired_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
+class MasterDataSyncRunStats(pydantic.BaseModel):
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    dataset: str
+    started_at: datetime
+    duration_seconds: float
+    bytes_fetched: int
+    outcome: str
+    rows_received: int
+    added: int
+    removed: int
+    restored: int
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 from pydantic import BaseModel, Field, field_validator, ConfigDict, HttpUrl
 from models.bdcs import ProductType, SellerType, WindowType, TransactionTerm
 
@@ -175,6 +175,7 @@ class ProductPriceOut(BaseModel):
 class PriceEntryImageOut(PriceEntryImageBase):
     id: int
     uploaded_at: datetime
+    signed_url: Optional[str] = Field(None, description="Presigned GET URL, valid for PRESIGNED_URL_EXPIRATION seconds")
 
 
 
@@ -255,7 +256,7 @@ class BDCPriceEntryOut(BaseModel):
     updated_at: datetime
 
 
-class OMCBDCFilterParams(BaseModel):
+class PriceEntryFilterParams(BaseModel):
     seller_type: SellerType = Field("omc", description="Filter by seller type")
     product_type: Optional[ProductType] = None 
     window: Optional[WindowType] = None
@@ -264,12 +265,46 @@ class OMCBDCFilterParams(BaseModel):
     sort_order: Optional[str] = "desc"
     from_date: Optional[str] = None
     to_date: Optional[str] = None
+    date_field: Literal["created_at", "date"] = Field("created_at", description="Column the from_date/to_date range applies to")
 
 
+class OMCBDCFilterParams(PriceEntryFilterParams):
+    limit: int = Field(50, ge=1, le=500, description="Page size")
+    cursor: Optional[str] = Field(None, description="Opaque cursor from the X-Next-Cursor header of the previous page")
+
+
+class PriceEntryExportParams(PriceEntryFilterParams):
+    format: Literal["csv", "ndjson"] = Field("csv", description="Export file format")
+
+
+class PriceImportRowError(BaseModel):
+    row: int = Field(..., description="Row number in the uploaded file, the header being row 1")
+    errors: List[str]
+
+
+class PriceImportReport(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[PriceImportRowError]
+
+
+
+class ImageUploadIn(BaseModel):
+    image_name: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., pattern=r"^image/[\w.+-]+$", description="Must be sent as Content-Type with the PUT")
+
+
+class ImageUploadsIn(BaseModel):
+    images: List[ImageUploadIn] = Field(..., min_length=1)
+
 
 class PresignedUrlItem(BaseModel):
     image_name: str
+    image_key: str = Field(..., description="Send back in price_entries_image_keys once uploaded")
     url: HttpUrl
+    headers: Dict[str, str] = Field(..., description="Headers the PUT must carry to match the signature")
+    expires_in: int
 
 
 
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional
-from pydantic import BaseModel, EmailStr, field_validator, Field
+from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator, Field
 
 class UserType(str, Enum):
     MARKETING_STAFF = "marketing_staff"
@@ -244,5 +244,34 @@ class CompanyUserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     is_admin: Optional[bool] = False
     company_id: Optional[int] = None
-    
+
+
+
+class VerifiedIdentity(BaseModel):
+    """Identity resolved from a token, cached in place of the ORM user"""
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    email: str
+    name: Optional[str] = None
+    company_id: Optional[int] = None
+    is_admin: bool = False
+    is_system_admin: bool = False
+    company_config: Optional[dict] = None
+
+    @classmethod
+    def from_user(cls, user: Any, is_system_admin: bool = False) -> "VerifiedIdentity":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            company_id=getattr(user, "company_id", None),
+            is_admin=bool(getattr(user, "is_admin", False)),
+            is_system_admin=is_system_admin,
+            company_config=None if is_system_admin or user.company is None else user.config_url(),
+        )
+
+    def config_url(self) -> dict:
+        """Company endpoint configuration, same shape as User.config_url"""
+        return dict(self.company_config or {})
 
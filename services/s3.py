@@ -1,14 +1,20 @@
+import asyncio
+import threading
 import uuid
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, Iterable, List, Optional
 
 
 from boto3 import session
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import  ClientError
 from fastapi import UploadFile
 
 
 from tools.log import Log
 from config.setting import settings
+from utils.cache import RedisCache, TTLCache
 
 
 
@@ -16,23 +22,79 @@ from config.setting import settings
 new_session = session.Session()
 s3_logger = Log(name=f"{__name__}")
 
+# direct uploads go to UPLOAD_PREFIX/<user id>/, so a price entry can only claim its user's uploads
+UPLOAD_PREFIX = "omc-bdc/uploads"
 
 
 
-def get_s3_client():
-    """Get an S3 client"""
+
+# large images are sent as multipart uploads, whose parts go up in parallel
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+    max_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+)
+
+# blocking boto3 calls run here instead of on the event loop
+upload_executor = ThreadPoolExecutor(max_workers=settings.S3_UPLOAD_CONCURRENCY, thread_name_prefix="s3-upload")
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def new_s3_client():
+    """Create an S3 client, with a connection pool sized for the upload executor"""
     try:
         return new_session.client('s3',
         aws_access_key_id=settings.AWS_ACCESS_KEY,
         aws_secret_access_key=settings.AWS_SECRET_KEY,
         endpoint_url=settings.S3_ENDPOINT_URL,
+        config=Config(
+            max_pool_connections=settings.S3_UPLOAD_CONCURRENCY * settings.S3_MULTIPART_CONCURRENCY,
+            connect_timeout=settings.S3_CONNECT_TIMEOUT,
+            read_timeout=settings.S3_READ_TIMEOUT,
+            retries={"mode": "standard", "max_attempts": 3},
+        ),
     )
     except Exception as e: 
         s3_logger.error(f"Could not establish s3 connection: {str(e)}")
         raise Exception("Cold not establish S3 connection")
 
 
-def generate_url_for_frontend_upload(s3_session: session.Session, object_name: str, expiration=3600) -> str:
+def get_s3_client():
+    """Get the process-wide S3 client; boto3 clients are thread-safe, so it is shared"""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = new_s3_client()
+    return _s3_client
+
+
+def new_url_cache():
+    """The presigned GET URL cache, in Redis when PRESIGNED_URL_CACHE_BACKEND is "redis" and redis is installed"""
+    ttl = settings.PRESIGNED_URL_EXPIRATION - settings.PRESIGNED_URL_CACHE_MARGIN
+    if settings.PRESIGNED_URL_CACHE_BACKEND == "redis":
+        try:
+            import redis
+        except ImportError:
+            s3_logger.error("PRESIGNED_URL_CACHE_BACKEND is redis but redis is not installed, caching in memory")
+        else:
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=int(settings.REDIS_PORT),
+                db=int(settings.REDIS_DB),
+                password=settings.REDIS_PASSWORD or None,
+                socket_timeout=1,
+            )
+            return RedisCache(client, "presigned-url:", ttl)
+    return TTLCache(settings.PRESIGNED_URL_CACHE_MAXSIZE, ttl)
+
+
+url_cache = new_url_cache()
+
+
+def generate_url_for_frontend_upload(s3_session: session.Session, object_name: str, expiration=3600, content_type: Optional[str] = None) -> str:
     """Generate a presigned URL for frontend upload
     
     :param s3_session: The S3 session
@@ -41,11 +103,16 @@ def generate_url_for_frontend_upload(s3_session: session.Session, object_name: s
     :type object_name: str
     :param expiration: The expiration time, defaults to 3600
     :type expiration: int, optional
+    :param content_type: The Content-Type the upload must be sent with, signed into the URL
+    :type content_type: str, optional
     :return: The presigned URL
     :rtype: str
     """
+    params = {'Bucket':settings.S3_BUCKET_NAME,'Key': object_name, 'ACL': 'public-read'}
+    if content_type:
+        params['ContentType'] = content_type
     try:
-        response = s3_session.generate_presigned_url('put_object',Params={'Bucket':settings.S3_BUCKET_NAME,'Key': object_name, 'ACL': 'public-read'},ExpiresIn=expiration)
+        response = s3_session.generate_presigned_url('put_object',Params=params,ExpiresIn=expiration)
 
     except ClientError as e:
         s3_logger.error(f"Error generating presigned URL: {str(e)}")
@@ -54,17 +121,69 @@ def generate_url_for_frontend_upload(s3_session: session.Session, object_name: s
 
         
 
+def upload_key(user_id: int, filename: str) -> str:
+    """A fresh object key for a direct upload, under the uploading user's prefix"""
+    extention = filename.split(".")[-1]
+    return f"{UPLOAD_PREFIX}/{user_id}/{uuid.uuid4()}.{extention}"
+
+
+def object_url(s3_key: str) -> str:
+    """The stored image_url of an object, as for server-side uploads"""
+    return f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/{s3_key}"
+
+
+def verify_uploaded_images(s3_client, user_id: int, s3_keys: List[str]) -> List[dict]:
+    """Check with a HEAD request that each direct upload exists, belongs to the user and is
+    an image within S3_MAX_IMAGE_BYTES; blocking, so async callers run it in a thread.
+
+    :return: The images, in the shape upload_multiple_images_to_s3 returns
+    :rtype: List[dict]
+    """
+    images = []
+    for s3_key in s3_keys:
+        if not s3_key.startswith(f"{UPLOAD_PREFIX}/{user_id}/"):
+            raise ValueError(f"Image {s3_key} was not issued to this user")
+        try:
+            head = s3_client.head_object(Bucket=settings.S3_BUCKET_NAME, Key=s3_key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise ValueError(f"Image {s3_key} has not been uploaded")
+            s3_logger.error(f"Error checking uploaded file in S3: {str(e)}")
+            raise Exception("Error checking uploaded file in S3")
+        if head["ContentLength"] > settings.S3_MAX_IMAGE_BYTES:
+            raise ValueError(f"Image {s3_key} is larger than {settings.S3_MAX_IMAGE_BYTES} bytes")
+        if not head.get("ContentType", "").startswith("image/"):
+            raise ValueError(f"Image {s3_key} is not an image")
+        images.append({"image_url": object_url(s3_key)})
+    return images
+
+
 async def convert_image_to_base64(file: UploadFile) -> str:
     base_b4_file = await file.read().decode("utf-8")
     return base_b4_file
 
 
+def upload_fileobj(fileobj: IO[bytes], s3_key: str, content_type: Optional[str] = None) -> str:
+    """Stream a file to S3 with the shared client, multipart above S3_MULTIPART_THRESHOLD.
+    Request files are already spooled to disk by Starlette above its in-memory limit,
+    so the upload reads them in chunks without holding them in memory.
+    """
+    fileobj.seek(0)
+    extra_args = {"ContentType": content_type} if content_type else None
+    get_s3_client().upload_fileobj(fileobj, settings.S3_BUCKET_NAME, s3_key, ExtraArgs=extra_args, Config=TRANSFER_CONFIG)
+    return s3_key
+
+
+async def run_in_upload_executor(function, *args):
+    """Run a blocking S3 call on the upload executor"""
+    return await asyncio.get_running_loop().run_in_executor(upload_executor, function, *args)
+
+
 async def upload_to_s3(file: UploadFile ) -> str:
-    s3_client = get_s3_client()
     try:
         extention = file.filename.split(".")[-1]
         s3_key = f"omc-bdc/docs/{uuid.uuid4()}.{extention}"
-        s3_client.upload_fileobj(file.file,settings.S3_BUCKET_NAME, s3_key)
+        await run_in_upload_executor(upload_fileobj, file.file, s3_key, file.content_type)
         return {
             "s3_key": s3_key,
         }
@@ -75,44 +194,92 @@ async def upload_to_s3(file: UploadFile ) -> str:
 
 
 async def upload_multiple_images_to_s3(files: list[UploadFile]) -> list[dict]:
-    s3_client = get_s3_client()
-    uploaded_files = []
-    for file in files:
-        try:
-            extention = file.filename.split(".")[-1]
-            s3_key = f"omc-bdc/docs/{uuid.uuid4()}.{extention}"
-            s3_client.upload_fileobj(file.file,settings.S3_BUCKET_NAME, s3_key)
-            full_image_path = f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/{s3_key}"
-            uploaded_files.append({
-                "image_url": full_image_path,
-            })
-        except ClientError as e:
-            s3_logger.error(f"Error uploading file to S3: {str(e)}")
-            raise Exception("Error uploading file to S3")
-        
-    return uploaded_files
+    """Upload the images concurrently, at most S3_UPLOAD_CONCURRENCY at a time per process.
+    If any upload fails, the ones that succeeded are deleted and the whole batch fails.
+    """
+    s3_keys = [f"omc-bdc/docs/{uuid.uuid4()}.{file.filename.split('.')[-1]}" for file in files]
+    results = await asyncio.gather(
+        *(run_in_upload_executor(upload_fileobj, file.file, s3_key, file.content_type) for file, s3_key in zip(files, s3_keys)),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        s3_logger.error(f"Error uploading file to S3: {str(errors[0])}")
+        uploaded = [{"Key": result} for result in results if not isinstance(result, BaseException)]
+        if uploaded:
+            await run_in_upload_executor(delete_objects, uploaded)
+        raise Exception("Error uploading file to S3")
+    return [{"image_url": object_url(s3_key)} for s3_key in s3_keys]
+
+
+def delete_objects(objects: List[Dict[str, str]]) -> None:
+    """Delete objects left behind by a failed batch, logging rather than raising"""
+    try:
+        get_s3_client().delete_objects(Bucket=settings.S3_BUCKET_NAME, Delete={"Objects": objects, "Quiet": True})
+    except ClientError as e:
+        s3_logger.error(f"Error deleting files from S3: {str(e)}")
     
 
 def create_presigned_url (s3_session: session.Session, object_name: str, expiration=3600):
-    if cacher.get_value(object_name):
-        return cacher.get_value(object_name)
+    """Get a presigned GET URL for an object, from the URL cache when it has one"""
+    return sign_get_urls([object_name], expiration, s3_session)[object_name]
+
+
+def sign_get_urls(s3_keys: Iterable[str], expiration: int = settings.PRESIGNED_URL_EXPIRATION, s3_session=None) -> Dict[str, str]:
+    """Presigned GET URLs for many objects: one cache lookup for all keys, then the
+    misses are signed locally and cached until PRESIGNED_URL_CACHE_MARGIN before they expire.
+    A failing cache backend only costs the signing, it never fails the request.
+
+    :return: The URL per object key
+    :rtype: Dict[str, str]
+    """
+    s3_keys = list(dict.fromkeys(s3_keys))
+    cache_keys = {f"{expiration}:{s3_key}": s3_key for s3_key in s3_keys}
+    try:
+        cached = url_cache.get_many(cache_keys)
+    except Exception as e:
+        s3_logger.error(f"Error reading presigned URL cache: {str(e)}")
+        cached = {}
+    urls = {cache_keys[cache_key]: url for cache_key, url in cached.items()}
+    s3_session = s3_session or get_s3_client()
+    signed = {}
     try:
-        response = s3_session.generate_presigned_url('get_object',Params={'Bucket':settings.S3_BUCKET_NAME,'Key': object_name},ExpiresIn=expiration)
-        cacher.set_value(object_name, response, expiration - 2)
+        for cache_key, s3_key in cache_keys.items():
+            if s3_key not in urls:
+                signed[cache_key] = urls[s3_key] = s3_session.generate_presigned_url('get_object',Params={'Bucket':settings.S3_BUCKET_NAME,'Key': s3_key},ExpiresIn=expiration)
     except ClientError as e:
         s3_logger.error(f"Error generating presigned URL: {str(e)}")
         raise Exception("Error generating presigned URL")
-    return response
+    ttl = expiration - settings.PRESIGNED_URL_CACHE_MARGIN
+    if signed and ttl > 0:
+        try:
+            url_cache.set_many(signed, ttl)
+        except Exception as e:
+            s3_logger.error(f"Error writing presigned URL cache: {str(e)}")
+    return urls
+
+
+def object_key(image_url: str) -> str:
+    """The object key of a stored image_url"""
+    return image_url.split(f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/")[-1]
+
+
+def sign_price_entry_images(price_entries: Iterable, expiration: int = settings.PRESIGNED_URL_EXPIRATION) -> None:
+    """Set signed_url on every image of a page of price entries in one pass, so
+    OMCPriceEntryOut / BDCPriceEntryOut serialise them with their GET URLs"""
+    images = [image for price_entry in price_entries if price_entry is not None for image in price_entry.images]
+    urls = sign_get_urls((object_key(image.image_url) for image in images), expiration)
+    for image in images:
+        image.signed_url = urls[object_key(image.image_url)]
 
 
 
 async def delete_from_s3(image_url: str) -> bool:
     """Delete a file from S3
     """
-    s3_key = image_url.split(f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET_NAME}/")[-1]
+    s3_key = object_key(image_url)
     try:
-        s3_client = get_s3_client()
-        s3_client.delete_object(Bucket=settings.S3_BUCKET_NAME,Key=s3_key)
+        await run_in_upload_executor(lambda: get_s3_client().delete_object(Bucket=settings.S3_BUCKET_NAME,Key=s3_key))
         return True
     except ClientError as e:
         s3_logger.error(f"Error deleting file from S3: {str(e)}")
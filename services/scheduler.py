@@ -0,0 +1,134 @@
+"""Leader-elected background jobs
+
+Every API worker starts a SchedulerCoordinator, but only the worker that
+holds the database lease runs the jobs. The lease is renewed every
+SCHEDULER_RENEW_SECONDS and is valid for SCHEDULER_LEASE_SECONDS, so when
+the leader dies another worker takes over within one lease period; a
+clean shutdown releases the lease for an immediate handover.
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from config.setting import settings
+from models.scheduler_lease import SchedulerLease
+from tools.log import Log
+from utils.session import CreateDBSession
+
+
+scheduler_logger = Log(name=f"{__name__}")
+
+
+def node_id() -> str:
+    return settings.SCHEDULER_NODE_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SchedulerCoordinator:
+    def __init__(
+        self,
+        name: str = "sync",
+        node: Optional[str] = None,
+        lease_seconds: float = settings.SCHEDULER_LEASE_SECONDS,
+        renew_seconds: float = settings.SCHEDULER_RENEW_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.node = node or node_id()
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = renew_seconds
+        self.clock = clock
+        # local deadline of the lease, measured before asking the database so it never outlives the row
+        self._valid_until = 0.0
+        self._on_elected: List[Callable[[], Any]] = []
+        self._lock = threading.Lock()
+        self.scheduler: Optional[BackgroundScheduler] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.clock() < self._valid_until
+
+    def heartbeat(self) -> bool:
+        """Take or renew the lease; runs the on_elected callbacks when leadership is gained"""
+        with self._lock:
+            was_leader = self.is_leader
+            started = self.clock()
+            try:
+                with CreateDBSession() as db:
+                    leader = SchedulerLease.acquire(db, self.name, self.node, self.lease_seconds)
+            except Exception as e:
+                scheduler_logger.error(f"Scheduler lease {self.name} could not be renewed: {e}")
+                leader = False
+            # give the lease up locally a renewal period early rather than risk two leaders
+            self._valid_until = started + self.lease_seconds - self.renew_seconds if leader else 0.0
+        if leader and not was_leader:
+            scheduler_logger.info(f"{self.node} is now the leader of {self.name} jobs")
+            for callback in self._on_elected:
+                callback()
+        elif was_leader and not leader:
+            scheduler_logger.error(f"{self.node} lost the leadership of {self.name} jobs")
+        return leader
+
+    def leader_only(self, job: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a job so it only does work on the leader"""
+        def run(*args, **kwargs):
+            if self.is_leader:
+                return job(*args, **kwargs)
+            return None
+        run.__name__ = getattr(job, "__name__", "job")
+        return run
+
+    def on_elected(self, callback: Callable[[], Any]) -> None:
+        """Run callback every time this node becomes the leader"""
+        self._on_elected.append(callback)
+
+    def add_job(self, job: Callable[..., Any], trigger: str, **trigger_args) -> None:
+        """Schedule job on every node; it only runs where the lease is held"""
+        self._ensure_scheduler().add_job(self.leader_only(job), trigger, max_instances=1, coalesce=True, **trigger_args)
+
+    def _ensure_scheduler(self) -> BackgroundScheduler:
+        if self.scheduler is None:
+            self.scheduler = BackgroundScheduler()
+            self.scheduler.add_job(
+                self.heartbeat, "interval", seconds=self.renew_seconds,
+                max_instances=1, coalesce=True, next_run_time=datetime.now(),
+            )
+        return self.scheduler
+
+    def start(self) -> None:
+        self._ensure_scheduler().start()
+
+    def shutdown(self) -> None:
+        if self.scheduler is not None and self.scheduler.running:
+            self.scheduler.shutdown(wait=True)
+        self.scheduler = None
+        if self._valid_until:
+            self._valid_until = 0.0
+            try:
+                with CreateDBSession() as db:
+                    SchedulerLease.release(db, self.name, self.node)
+            except Exception as e:
+                scheduler_logger.error(f"Scheduler lease {self.name} could not be released: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """This node, and the node holding the lease according to the database"""
+        with CreateDBSession() as db:
+            lease = SchedulerLease.current(db, self.name)
+            now = datetime.utcnow()
+            return {
+                "name": self.name,
+                "node": self.node,
+                "is_leader": self.is_leader,
+                "leader": lease.holder if lease is not None and lease.expires_at > now else None,
+                "acquired_at": lease.acquired_at if lease is not None else None,
+                "expires_at": lease.expires_at if lease is not None else None,
+            }
+
+
+# One coordinator for the sync jobs per process
+coordinator = SchedulerCoordinator()
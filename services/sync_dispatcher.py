@@ -0,0 +1,330 @@
+"""Concurrent HTTP dispatcher for company sync endpoints
+
+Keeps one keep-alive connection pool per company endpoint and sends
+requests on a private event loop thread, so the blocking sync jobs can
+hand over a whole batch and wait for all of it. Concurrency is bounded
+per company and across companies, and every request has explicit
+connect/read/write/pool timeouts.
+
+Each company endpoint also gets a circuit breaker, a read timeout that
+follows its observed latency and an optional token-bucket rate limit,
+so one slow or failing company cannot hold up the others.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import httpx
+
+from config.setting import settings
+from tools.log import Log
+
+
+dispatcher_logger = Log(name=f"{__name__}")
+
+
+@dataclass
+class SyncRequest:
+    key: Hashable
+    company: str
+    method: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    json: Any = None
+    # requests per second and burst size, None for no limit
+    rate_limit: Optional[float] = None
+    burst: Optional[int] = None
+
+
+@dataclass
+class SyncResult:
+    key: Hashable
+    status_code: Optional[int] = None
+    body: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    # not sent: circuit open or rate limited, the item should simply be retried later
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    def describe(self) -> str:
+        if self.error:
+            return self.error
+        return f"{self.status_code}: {str(self.body)[:500]}"
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_timeout seconds, then lets a single probe through (half-open):
+    its success closes the circuit, its failure opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic, name: str = "") -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self.state, self._probing = self.HALF_OPEN, False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state, self.failures, self._probing = self.CLOSED, 0, False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                dispatcher_logger.error(f"Circuit for {self.name} opened after {self.failures} failures")
+            self.state, self.opened_at, self._probing = self.OPEN, self.clock(), False
+
+
+class TokenBucket:
+    """Allows rate tokens per second with bursts of up to burst tokens"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.rate: Optional[float] = None
+        self.burst = 1
+        self.tokens = 0.0
+        self.updated_at = clock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: Optional[float], burst: Optional[int]) -> None:
+        burst = max(int(burst or 1), 1)
+        if (rate, burst) != (self.rate, self.burst):
+            self.rate, self.burst = rate, burst
+            self.tokens = float(burst)
+            self.updated_at = self.clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available, 0 when one is available now"""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take a token, waiting up to max_wait seconds for one"""
+        if not self.rate:
+            return True
+        deadline = self.clock() + max_wait
+        while True:
+            wait = self.wait_time()
+            if wait == 0:
+                self.tokens -= 1
+                return True
+            if self.clock() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class LatencyWindow:
+    """
+    Recent response times of one endpoint, including failed and timed-out
+    requests, so a company that slows down raises its own timeout instead of
+    timing out for good. Samples older than max_age seconds are dropped, and
+    a timeout relaxes the next timeouts for max_age seconds.
+    """
+
+    def __init__(self, size: int, max_age: float = settings.SYNC_LATENCY_MAX_AGE_SECONDS, clock: Callable[[], float] = time.monotonic) -> None:
+        self.samples = deque(maxlen=size)
+        self.max_age = max_age
+        self.clock = clock
+        self.relaxed = 0.0
+        self.relaxed_at = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.samples.append((self.clock(), elapsed))
+
+    def add_timeout(self, timeout: float) -> None:
+        """Record a request that hit timeout, and allow the next ones SYNC_TIMEOUT_MULTIPLIER times longer"""
+        self.add(timeout)
+        self.relaxed, self.relaxed_at = timeout * settings.SYNC_TIMEOUT_MULTIPLIER, self.clock()
+
+    def _expire(self) -> None:
+        cutoff = self.clock() - self.max_age
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+    def percentile(self, percent: float) -> Optional[float]:
+        self._expire()
+        if not self.samples:
+            return None
+        ordered = sorted(elapsed for _, elapsed in self.samples)
+        # rounded up, so a few slow responses are not hidden by the bulk of fast ones
+        return ordered[min(len(ordered) - 1, math.ceil(percent / 100 * (len(ordered) - 1)))]
+
+    def timeout(self, default: float) -> float:
+        """p99 times SYNC_TIMEOUT_MULTIPLIER, or the relaxed timeout after a timeout, within [SYNC_TIMEOUT_MIN, default]"""
+        p99 = self.percentile(99)
+        if len(self.samples) < settings.SYNC_TIMEOUT_MIN_SAMPLES:
+            return default
+        adaptive = p99 * settings.SYNC_TIMEOUT_MULTIPLIER
+        if self.clock() - self.relaxed_at < self.max_age:
+            adaptive = max(adaptive, self.relaxed)
+        return max(settings.SYNC_TIMEOUT_MIN, min(default, adaptive))
+
+
+class CompanyLink:
+    """Connection pool and health of one company endpoint"""
+
+    def __init__(self, company: str, client: httpx.AsyncClient, concurrency: int) -> None:
+        self.client = client
+        self.limit = asyncio.Semaphore(concurrency)
+        self.breaker = CircuitBreaker(settings.SYNC_BREAKER_FAILURES, settings.SYNC_BREAKER_RESET_SECONDS, name=company)
+        self.latency = LatencyWindow(settings.SYNC_LATENCY_WINDOW)
+        self.bucket = TokenBucket()
+
+
+class SyncDispatcher:
+    def __init__(
+        self,
+        max_concurrency: int = settings.SYNC_MAX_CONCURRENCY,
+        company_concurrency: int = settings.SYNC_COMPANY_CONCURRENCY,
+        timeout: Optional[httpx.Timeout] = None,
+        keepalive_expiry: float = settings.SYNC_KEEPALIVE_EXPIRY,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.company_concurrency = company_concurrency
+        self.timeout = timeout or httpx.Timeout(
+            settings.SYNC_READ_TIMEOUT,
+            connect=settings.SYNC_CONNECT_TIMEOUT,
+            pool=settings.SYNC_READ_TIMEOUT,
+        )
+        self.keepalive_expiry = keepalive_expiry
+        self._links: Dict[str, CompanyLink] = {}
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="sync-dispatcher", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _link(self, company: str) -> CompanyLink:
+        link = self._links.get(company)
+        if link is None:
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.company_concurrency,
+                    max_keepalive_connections=self.company_concurrency,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+            link = self._links[company] = CompanyLink(company, client, self.company_concurrency)
+        return link
+
+    async def send(self, request: SyncRequest) -> SyncResult:
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        link = self._link(request.company)
+        link.bucket.configure(request.rate_limit, request.burst)
+        if not await link.bucket.acquire(settings.SYNC_RATE_LIMIT_MAX_WAIT):
+            return SyncResult(request.key, error=f"Rate limited: {request.company}", skipped=True)
+        async with link.limit:
+            # checked once a company slot is free, so queued requests see a circuit opened meanwhile
+            if not link.breaker.allow():
+                return SyncResult(request.key, error=f"Circuit open: {request.company}", skipped=True)
+            read_timeout = link.latency.timeout(self.timeout.read)
+            async with self._global_limit:
+                started = time.perf_counter()
+                try:
+                    response = await link.client.request(
+                        request.method, request.url, json=request.json, headers=request.headers,
+                        timeout=httpx.Timeout(read_timeout, connect=self.timeout.connect, pool=self.timeout.pool),
+                    )
+                except httpx.HTTPError as e:
+                    link.breaker.record_failure()
+                    if isinstance(e, httpx.TimeoutException):
+                        link.latency.add_timeout(read_timeout)
+                    return SyncResult(request.key, error=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - started)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 500:
+            link.breaker.record_failure()
+        else:
+            link.breaker.record_success()
+        link.latency.add(elapsed)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        return SyncResult(request.key, response.status_code, body, elapsed=elapsed)
+
+    async def dispatch_async(self, requests: List[SyncRequest]) -> List[SyncResult]:
+        return await asyncio.gather(*(self.send(request) for request in requests))
+
+    def dispatch(self, requests: List[SyncRequest]) -> List[SyncResult]:
+        """Send a batch from blocking code and wait for every result, in request order"""
+        if not requests:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self.dispatch_async(requests), self._ensure_loop())
+        return future.result()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Breaker state, latency and rate limit of every company endpoint seen by this worker"""
+        stats = []
+        for company, link in list(self._links.items()):
+            p50, p99 = link.latency.percentile(50), link.latency.percentile(99)
+            stats.append({
+                "company": company,
+                "circuit": link.breaker.state,
+                "consecutive_failures": link.breaker.failures,
+                "latency_p50_seconds": round(p50, 6) if p50 is not None else None,
+                "latency_p99_seconds": round(p99, 6) if p99 is not None else None,
+                "read_timeout_seconds": round(link.latency.timeout(self.timeout.read), 3),
+                "rate_limit": link.bucket.rate,
+                "burst": link.bucket.burst,
+            })
+        return stats
+
+    def close(self) -> None:
+        if self._loop is None:
+            return
+
+        async def close_clients() -> None:
+            await asyncio.gather(*(link.client.aclose() for link in self._links.values()))
+            self._links.clear()
+
+        asyncio.run_coroutine_threadsafe(close_clients(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop, self._thread, self._global_limit = None, None, None
+
+
+# One dispatcher, and so one pool per company endpoint, per process
+dispatcher = SyncDispatcher()
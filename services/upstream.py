@@ -0,0 +1,161 @@
+"""Conditional, streaming fetch of upstream master data
+
+BDC, OMC and station lists are downloaded with the ETag / Last-Modified
+of the last applied run, so an unchanged upstream answers 304 before any
+body is sent. A 200 body is hashed while it is spooled; when the hash
+matches the last applied run the dataset is skipped before parsing.
+Otherwise the JSON array is parsed item by item (with ijson when it is
+installed) and deduplicated on the sync keys in the same pass. Every run
+is recorded with its duration and the bytes fetched.
+"""
+
+import hashlib
+import json
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import requests
+from fastapi.exceptions import HTTPException
+from sqlalchemy.orm import Session
+
+from config.setting import settings
+from models.master_data_sync import MasterDataSyncRun
+from tools.log import Log
+from utils.common import sync_summary
+from utils.session import CreateDBSession
+
+
+upstream_logger = Log(name=f"{__name__}")
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class UpstreamFetch:
+    dataset: str
+    status_code: int
+    bytes_fetched: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    # parsed and deduplicated rows, None when the upstream did not change
+    rows: Optional[List[Dict[str, Any]]] = None
+
+
+def iter_json_array(file: IO[bytes]) -> Iterator[Any]:
+    """Items of a top-level JSON array, parsed incrementally when ijson is available"""
+    try:
+        import ijson
+    except ImportError:
+        yield from json.load(file)
+        return
+    yield from ijson.items(file, "item")
+
+
+def unique_rows(items: Iterator[Any], keys: Sequence[str]) -> List[Dict[str, Any]]:
+    """Keep the sync keys of each item, dropping repeated keys and items missing one"""
+    seen, rows = set(), []
+    for item in items:
+        if not isinstance(item, dict) or any(item.get(key) is None for key in keys):
+            continue
+        row_key = tuple(item[key] for key in keys)
+        if row_key not in seen:
+            seen.add(row_key)
+            rows.append(dict(zip(keys, row_key)))
+    return rows
+
+
+def fetch_dataset(
+    dataset: str,
+    url: str,
+    headers: Dict[str, str],
+    keys: Sequence[str],
+    previous: Optional[MasterDataSyncRun] = None,
+) -> UpstreamFetch:
+    """
+    Download a dataset, conditional on the validators of previous.
+    Non-200/304 answers are raised as HTTPException with the upstream status.
+    """
+    request_headers = dict(headers)
+    if previous is not None:
+        if previous.etag:
+            request_headers["If-None-Match"] = previous.etag
+        if previous.last_modified:
+            request_headers["If-Modified-Since"] = previous.last_modified
+    timeout = (settings.UPSTREAM_CONNECT_TIMEOUT, settings.UPSTREAM_READ_TIMEOUT)
+    with requests.get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+        fetch = UpstreamFetch(
+            dataset,
+            response.status_code,
+            etag=response.headers.get("ETag") or (previous.etag if previous else None),
+            last_modified=response.headers.get("Last-Modified") or (previous.last_modified if previous else None),
+        )
+        if response.status_code == 304:
+            fetch.content_hash = previous.content_hash if previous else None
+            return fetch
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=f"Error syncing {dataset}: {response.text}")
+        digest = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=settings.UPSTREAM_SPOOL_MAX_BYTES) as body:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                digest.update(chunk)
+                body.write(chunk)
+                fetch.bytes_fetched += len(chunk)
+            fetch.content_hash = digest.hexdigest()
+            if previous is not None and previous.content_hash == fetch.content_hash:
+                return fetch
+            body.seek(0)
+            fetch.rows = unique_rows(iter_json_array(body), keys)
+    return fetch
+
+
+def sync_dataset(
+    dataset: str,
+    url: str,
+    api_key: str,
+    keys: Sequence[str],
+    apply: Callable[[Session, List[dict], bool], Dict[str, List[dict]]],
+    resource: str,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fetch a dataset and apply it with apply(db_session, rows, dry_run), recording the run.
+    A dry run always downloads the full body and never updates the validators.
+    """
+    started = time.perf_counter()
+    headers = {"Content-Type": "application/json", "API-KEY": api_key}
+    with CreateDBSession() as db_session:
+        previous = None if dry_run else MasterDataSyncRun.last_applied(db_session, dataset)
+        fetch = fetch_dataset(dataset, url, headers, keys, previous)
+        diff = {"added": [], "removed": [], "restored": []}
+        if fetch.rows is not None:
+            diff = apply(db_session, fetch.rows, dry_run)
+            if dry_run:
+                db_session.rollback()
+        outcome = "dry_run" if dry_run else "not_modified" if fetch.status_code == 304 else "unchanged" if fetch.rows is None else "applied"
+        run = MasterDataSyncRun(
+            dataset=dataset,
+            duration_seconds=round(time.perf_counter() - started, 6),
+            bytes_fetched=fetch.bytes_fetched,
+            outcome=outcome,
+            applied=not dry_run,
+            etag=fetch.etag,
+            last_modified=fetch.last_modified,
+            content_hash=fetch.content_hash,
+            rows_received=len(fetch.rows or ()),
+            added=len(diff["added"]),
+            removed=len(diff["removed"]),
+            restored=len(diff["restored"]),
+        )
+        db_session.add(run)
+        db_session.commit()
+    upstream_logger.info(
+        f"{dataset} sync {outcome}: {fetch.bytes_fetched} bytes in {time.perf_counter() - started:.3f}s, "
+        f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['restored'])} restored"
+    )
+    summary = sync_summary(resource, diff, dry_run)
+    if fetch.rows is None:
+        summary["message"] = f"{resource} unchanged upstream, nothing to sync"
+    return summary
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import models.users  # noqa: F401
+import models.companies  # noqa: F401
+from api.v1.router.stations import stations_router
+from core import setup
+from core.setup import Base
+from models.stations import Station
+from utils.reference_cache import reference_cache
+
+
+@pytest.fixture
+def stations_client(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'stations.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    db_session.add_all([Station(name="east legon", location="accra"), Station(name="adum", location="kumasi")])
+    db_session.commit()
+    db_session.close()
+
+    # get_async_db_session runs unchanged, only the sessionmaker behind it points at the test database
+    async_engine = create_async_engine(setup.async_url(url), poolclass=NullPool)
+    sessions = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(setup, "async_database", SimpleNamespace(get_session=lambda: sessions))
+    reference_cache.invalidate()
+
+    app = FastAPI()
+    app.include_router(stations_router)
+    with TestClient(app) as client:
+        yield client
+    reference_cache.invalidate()
+    engine.dispose()
+
+
+@pytest.mark.utils
+def test_station_routes_read_through_the_request_session(stations_client):
+    response = stations_client.get("/stations")
+    assert response.status_code == 200
+    assert [station["name"] for station in response.json()] == ["east legon", "adum"]
+
+    detail = stations_client.get(f"/stations/{response.json()[1]['id']}")
+    assert detail.json()["location"] == "kumasi"
+    assert stations_client.get("/stations", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+@pytest.mark.utils
+def test_missing_station_is_a_404(stations_client):
+    assert stations_client.get("/stations/999").status_code == 404
@@ -0,0 +1,92 @@
+import pytest
+
+from utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.utils
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, timer=clock)
+    cache.set("sub", "identity")
+    assert cache.get("sub") == "identity"
+    clock.now = 6
+    assert cache.get("sub") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.utils
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.utils
+def test_ttl_cache_invalidate_where():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", {"company_id": 1})
+    cache.set("b", {"company_id": 2})
+    assert cache.invalidate_where(lambda key, value: value["company_id"] == 1) == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.utils
+def test_ttl_cache_drops_values_loaded_before_an_invalidation():
+    cache = TTLCache(maxsize=10, ttl=60)
+    version = cache.version
+    cache.invalidate("a")
+    cache.set("a", "stale", version=version)
+    assert cache.get("a") is None
+    cache.set("a", "fresh", version=cache.version)
+    assert cache.get("a") == "fresh"
+
+
+
+@pytest.mark.utils
+def test_user_changes_reach_the_identity_cache_after_commit(monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from controller.users import UserController
+    from core.setup import Base
+    from models.companies import Company
+    from models.users import User
+    from utils import auth
+
+    clock = FakeClock()
+    monkeypatch.setattr(auth, "identity_cache", TTLCache(maxsize=10, ttl=300, timer=clock))
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    admin, collector = User(email="admin@acme.com", company=company, is_admin=True), User(email="collector@acme.com", company=company)
+    db_session.add_all([company, admin, collector])
+    db_session.commit()
+
+    # other workers only drop an identity when it expires, admin rights expire sooner
+    identity = auth.AuthToken.remember_identity(admin)
+    auth.AuthToken.remember_identity(collector)
+    clock.now = 31
+    assert auth.AuthToken.cached_identity(admin.email) is None
+    assert auth.AuthToken.cached_identity(collector.email) is not None
+
+    identity = auth.AuthToken.remember_identity(admin)
+    UserController.update_user(admin.id, {"is_admin": False}, company.id, db_session)
+    assert auth.AuthToken.cached_identity(admin.email) is identity
+    db_session.commit()
+    assert auth.AuthToken.cached_identity(admin.email) is None
+    db_session.close()
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from controller.sync import SendController, company_config_cache
+from core.setup import Base
+from models.companies import Company
+from models.users import User
+
+
+@pytest.mark.utils
+def test_company_configs_are_cached_until_the_company_changes():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    users = [User(email="collector@acme.com", company=company), User(email="manager@acme.com", company=company)]
+    db_session.add_all([company, *users])
+    db_session.commit()
+    # the last id has no user, so it has no config either
+    user_ids = {users[0].id, users[1].id + 1}
+    company_config_cache.clear()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    configs = SendController.get_users_config_urls(db_session, user_ids)
+    assert SendController.get_users_config_urls(db_session, user_ids) == configs
+    assert len(statements) == 1
+    assert configs == {users[0].id: company.sync_config()}
+
+    company.api_key = "rotated"
+    db_session.commit()
+    assert SendController.invalidate_company_configs(company.id) == 1
+    assert SendController.get_users_config_urls(db_session, user_ids)[users[0].id]["api_key"] == "rotated"
+    company_config_cache.clear()
+    db_session.close()
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from api.v1.router.health import health_router
+from core.setup import engine_options, pool_stats
+
+
+@pytest.mark.utils
+def test_wait_counters_add_up_across_threads(tmp_path):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url))
+
+    def checkout() -> None:
+        for _ in range(200):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+    threads = [threading.Thread(target=checkout) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 1600
+    assert stats["max_wait_seconds"] >= stats["avg_wait_seconds"] >= 0
+    engine.dispose()
+
+
+ADMIN_ONLY_PATHS = [
+    "/health/db-pool",
+    "/health/async-db-pool",
+    "/health/auth-cache",
+    "/health/sync-outbox",
+    "/health/sync-companies",
+    "/health/scheduler",
+    "/health/company-config-cache",
+    "/health/master-data-sync",
+]
+
+
+@pytest.mark.utils
+@pytest.mark.parametrize("path", ADMIN_ONLY_PATHS)
+def test_operational_stats_need_a_system_admin(path):
+    app = FastAPI()
+    app.include_router(health_router)
+    assert TestClient(app).get(path).status_code == 403
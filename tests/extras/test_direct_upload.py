@@ -0,0 +1,86 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+from fastapi import UploadFile
+
+from config.setting import settings
+from services import s3
+
+
+@pytest.fixture
+def stubbed_client():
+    client = s3.new_s3_client()
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+@pytest.mark.utils
+def test_presigned_upload_keys_are_scoped_to_the_user(stubbed_client):
+    client, _ = stubbed_client
+    key = s3.upload_key(7, "pump.jpg")
+    assert key.startswith(f"{s3.UPLOAD_PREFIX}/7/") and key.endswith(".jpg")
+    url = s3.generate_url_for_frontend_upload(client, key, 60, "image/jpeg")
+    assert key in url and "Signature" in url
+    with pytest.raises(ValueError):
+        s3.verify_uploaded_images(client, 8, [key])
+
+
+@pytest.mark.utils
+def test_uploaded_images_are_checked_with_head(stubbed_client):
+    client, stubber = stubbed_client
+    good, missing, large = (s3.upload_key(7, name) for name in ("a.jpg", "b.jpg", "c.jpg"))
+    stubber.add_response("head_object", {"ContentLength": 1024, "ContentType": "image/jpeg"}, {"Bucket": settings.S3_BUCKET_NAME, "Key": good})
+    assert s3.verify_uploaded_images(client, 7, [good]) == [{"image_url": s3.object_url(good)}]
+
+    stubber.add_client_error("head_object", service_error_code="404", http_status_code=404)
+    with pytest.raises(ValueError, match="has not been uploaded"):
+        s3.verify_uploaded_images(client, 7, [missing])
+
+    stubber.add_response("head_object", {"ContentLength": settings.S3_MAX_IMAGE_BYTES + 1, "ContentType": "image/jpeg"})
+    with pytest.raises(ValueError, match="larger than"):
+        s3.verify_uploaded_images(client, 7, [large])
+
+
+def image_files(count):
+    return [UploadFile(file=io.BytesIO(b"jpeg"), filename=f"pump-{n}.jpg") for n in range(count)]
+
+
+@pytest.mark.utils
+def test_images_upload_concurrently_off_the_event_loop(monkeypatch):
+    threads = set()
+
+    def slow_upload(fileobj, s3_key, content_type=None):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.2)
+        return s3_key
+
+    monkeypatch.setattr(s3, "upload_fileobj", slow_upload)
+    started = time.perf_counter()
+    images = asyncio.run(s3.upload_multiple_images_to_s3(image_files(4)))
+    assert time.perf_counter() - started < 0.6
+    assert len(images) == 4 and all(image["image_url"].startswith(s3.object_url("omc-bdc/docs/")) for image in images)
+    assert threads and all(name.startswith("s3-upload") for name in threads)
+    assert s3.get_s3_client() is s3.get_s3_client()
+
+
+@pytest.mark.utils
+def test_failed_batch_deletes_the_uploaded_images(monkeypatch):
+    deleted = []
+
+    def flaky_upload(fileobj, s3_key, content_type=None):
+        if s3_key.endswith(".png"):
+            raise ClientError({"Error": {"Code": "500"}}, "PutObject")
+        return s3_key
+
+    monkeypatch.setattr(s3, "upload_fileobj", flaky_upload)
+    monkeypatch.setattr(s3, "delete_objects", deleted.extend)
+    files = image_files(3)
+    files[1].filename = "pump-1.png"
+    with pytest.raises(Exception, match="Error uploading file to S3"):
+        asyncio.run(s3.upload_multiple_images_to_s3(files))
+    assert len(deleted) == 2 and all(obj["Key"].endswith(".jpg") for obj in deleted)
@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from api.v1.router.price_entries import price_entry_router
+from api.v1.router.stations import stations_router
+from core import setup
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry, PriceEntryImage, ProductPrice
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from utils.auth import AuthToken, identity_cache
+from utils.reference_cache import reference_cache
+from tests.query_budget import assert_query_budget
+
+
+@pytest.fixture(scope="module")
+def budget_client(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('budget') / 'budget.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user = User(email="collector@acme.com", company=company)
+    omc = OMC(name="star oil")
+    stations = [Station(name=f"station {n}", location="accra") for n in range(20)]
+    db_session.add_all([company, user, omc, *stations])
+    db_session.flush()
+    for n in range(30):
+        entry = PriceEntry(seller_type="omc", window="1st_window", user_id=user.id, omc_id=omc.id, station_id=stations[n % 20].id)
+        db_session.add(entry)
+        db_session.flush()
+        db_session.add(ProductPrice(price_entry_id=entry.id, product_type="petrol", price=14.5, unit_of_measurement="Ghana Cedis per litre"))
+        db_session.add(PriceEntryImage(price_entry_id=entry.id, image_url="omc-bdc/docs/pump.jpg"))
+    db_session.commit()
+    db_session.close()
+
+    async_engine = create_async_engine(setup.async_url(url), poolclass=NullPool)
+    sessions = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(setup, "async_database", SimpleNamespace(get_session=lambda: sessions))
+        app = FastAPI()
+        app.include_router(price_entry_router)
+        app.include_router(stations_router)
+        token = AuthToken.encode_auth_token_for_user({"email": "collector@acme.com"})
+        with TestClient(app, headers={"Authorization": f"Bearer {token}"}) as client:
+            yield async_engine.sync_engine, client
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    identity_cache.clear()
+    reference_cache.invalidate()
+    yield
+    identity_cache.clear()
+    reference_cache.invalidate()
+
+
+@pytest.mark.utils
+def test_price_entry_listing_route(budget_client):
+    engine, client = budget_client
+    # caller identity, one page joined to its product prices and stations, then its images
+    with assert_query_budget(engine, max_statements=3, max_rows=85):
+        response = client.get("/price_entries", params={"limit": 20})
+    assert response.status_code == 200 and len(response.json()) == 20
+    assert response.headers["X-Next-Cursor"]
+
+
+@pytest.mark.utils
+def test_price_entry_detail_route(budget_client):
+    engine, client = budget_client
+    entry_id = client.get("/price_entries", params={"limit": 1}).json()[0]["id"]
+    identity_cache.clear()
+    with assert_query_budget(engine, max_statements=3, max_rows=7):
+        response = client.get(f"/price_entries/{entry_id}")
+    assert response.status_code == 200 and response.json()["id"] == entry_id
+
+
+@pytest.mark.utils
+def test_station_routes(budget_client):
+    engine, client = budget_client
+    # a cold reference cache loads the four reference tables once ...
+    with assert_query_budget(engine, max_statements=4):
+        response = client.get("/stations")
+    assert len(response.json()) == 20
+    # ... and every station route afterwards is answered from it
+    with assert_query_budget(engine, max_statements=0):
+        client.get("/stations")
+        client.get(f"/stations/{response.json()[0]['id']}")
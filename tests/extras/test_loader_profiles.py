@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry, ProductPrice, PriceEntryImage
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from tests.query_budget import assert_query_budget
+
+
+@pytest.fixture(scope="module")
+def seeded_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user = User(email="collector@acme.com", company=company)
+    omc = OMC(name="star oil")
+    station = Station(name="east legon", location="accra")
+    db_session.add_all([company, user, omc, station])
+    db_session.flush()
+    for _ in range(50):
+        entry = PriceEntry(seller_type="omc", window="1st_window", user_id=user.id, omc_id=omc.id, station_id=station.id)
+        db_session.add(entry)
+        db_session.flush()
+        db_session.add(ProductPrice(price_entry_id=entry.id, product_type="petrol", price=14.5, unit_of_measurement="Ghana Cedis per litre"))
+        db_session.add(PriceEntryImage(price_entry_id=entry.id, image_url="http://s3/image.png"))
+    db_session.commit()
+    db_session.expunge_all()
+    yield engine, db_session
+    db_session.close()
+
+
+@pytest.mark.model
+def test_auth_profile_does_not_load_price_history(seeded_session):
+    engine, db_session = seeded_session
+    with assert_query_budget(engine, max_statements=1, max_rows=2):
+        user = db_session.query(User).options(*User.load_profile("auth")).first()
+        assert user.config_url()["api_endpoint"] == "acme.local"
+    db_session.expunge_all()
+
+
+@pytest.mark.model
+def test_listing_profile_loads_page_in_two_statements(seeded_session):
+    engine, db_session = seeded_session
+    with assert_query_budget(engine, max_statements=2, max_rows=151):
+        entries = db_session.query(PriceEntry).options(*PriceEntry.load_profile("listing")).all()
+        assert all(entry.product_price and entry.station and entry.images for entry in entries)
+    db_session.expunge_all()
+
+
+@pytest.mark.model
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        PriceEntry.load_profile("everything")
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import models.companies  # noqa: F401
+import models.users  # noqa: F401
+from core.setup import Base
+from models.bdcs import OMC
+from models.products import Product
+from models.stations import Station
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    yield db_session
+    db_session.close()
+
+
+@pytest.mark.model
+def test_sync_soft_deletes_restores_and_adds_in_set_based_statements(db_session):
+    kept, dropped, returning = OMC(name="star oil"), OMC(name="total"), OMC(name="goil")
+    returning.soft_delete()
+    db_session.add_all([kept, dropped, returning])
+    db_session.commit()
+    omcs = [{"name": "star oil"}, {"name": "goil"}] + [{"name": f"omc {n}"} for n in range(1000)]
+
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    diff = OMC.sync_omcs(db_session, omcs)
+
+    assert len(statements) <= 10
+    assert (len(diff["added"]), diff["removed"], diff["restored"]) == (1000, [{"name": "total"}], [{"name": "goil"}])
+    db_session.expire_all()
+    active = {omc.name for omc in db_session.query(OMC).filter(OMC.deleted_at.is_(None))}
+    assert active == {omc["name"] for omc in omcs}
+    assert db_session.get(OMC, dropped.id).deleted_at is not None
+
+
+@pytest.mark.model
+def test_dry_run_reports_without_applying(db_session):
+    db_session.add(Station(name="east legon", location="accra"))
+    db_session.commit()
+    diff = Station.sync_stations(db_session, [{"name": "east legon", "location": "tema"}], dry_run=True)
+    db_session.rollback()
+    assert diff == {
+        "added": [{"name": "east legon", "location": "tema"}],
+        "removed": [{"name": "east legon", "location": "accra"}],
+        "restored": [],
+    }
+    assert [(station.name, station.location, station.deleted_at) for station in db_session.query(Station)] == [("east legon", "accra", None)]
+
+
+@pytest.mark.model
+def test_product_sync_only_adds(db_session):
+    db_session.add(Product(name="kerosene"))
+    db_session.commit()
+    diff = Product.sync_products(db_session, [{"name": "petrol"}])
+    assert (diff["added"], diff["removed"]) == ([{"name": "petrol"}], [])
+    assert {product.name for product in Product.get_products(db_session)} == {"kerosene", "petrol"}
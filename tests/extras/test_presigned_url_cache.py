@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from config.setting import settings
+from services import s3
+from utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingSigner:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.calls += 1
+        return f"https://signed/{Params['Key']}?expires={ExpiresIn}&n={self.calls}"
+
+
+@pytest.fixture
+def url_cache(monkeypatch):
+    clock = FakeClock()
+    cache = TTLCache(maxsize=100, ttl=60, timer=clock)
+    monkeypatch.setattr(s3, "url_cache", cache)
+    return cache, clock
+
+
+@pytest.mark.utils
+def test_signed_urls_are_cached_until_before_they_expire(url_cache):
+    _, clock = url_cache
+    signer = CountingSigner()
+    urls = s3.sign_get_urls(["a.jpg", "b.jpg", "a.jpg"], 3600, signer)
+    assert set(urls) == {"a.jpg", "b.jpg"} and signer.calls == 2
+    assert s3.sign_get_urls(["a.jpg", "b.jpg"], 3600, signer) == urls and signer.calls == 2
+    assert s3.create_presigned_url(signer, "a.jpg", 3600) == urls["a.jpg"]
+
+    clock.now = 3600 - settings.PRESIGNED_URL_CACHE_MARGIN
+    assert s3.sign_get_urls(["a.jpg"], 3600, signer)["a.jpg"] != urls["a.jpg"]
+
+
+@pytest.mark.utils
+def test_page_images_are_signed_in_one_pass(url_cache, monkeypatch):
+    signer = CountingSigner()
+    monkeypatch.setattr(s3, "get_s3_client", lambda: signer)
+    shared = s3.object_url("omc-bdc/docs/shared.jpg")
+    entries = [
+        SimpleNamespace(images=[SimpleNamespace(image_url=shared, signed_url=None)]),
+        SimpleNamespace(images=[SimpleNamespace(image_url=shared, signed_url=None), SimpleNamespace(image_url=s3.object_url("omc-bdc/docs/own.jpg"), signed_url=None)]),
+        None,
+    ]
+    s3.sign_price_entry_images(entries)
+    images = [image for entry in entries[:2] for image in entry.images]
+    assert signer.calls == 2 and all(image.signed_url.startswith("https://signed/omc-bdc/docs/") for image in images)
+    assert images[0].signed_url == images[1].signed_url
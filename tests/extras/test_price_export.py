@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry, ProductPrice
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from schemas.price_entry import PriceEntryExportParams
+from utils.export import csv_chunk, export_value
+from utils.price_entry_filter import PriceEntryQuery
+
+
+@pytest.fixture(scope="module")
+def export_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company, other = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local"), Company(name="other", api_key="key", api_user="user", api_endpoint="other.local")
+    users = [User(email="one@acme.com", company=company), User(email="two@acme.com", company=company), User(email="three@other.com", company=other)]
+    omc = OMC(name="star oil")
+    station = Station(name="east legon", location="accra")
+    db_session.add_all([company, other, omc, station, *users])
+    db_session.flush()
+    for user in users:
+        for product_type in ("petrol", "diesel"):
+            entry = PriceEntry(seller_type="omc", window="1st_window", user_id=user.id, omc_id=omc.id, station_id=station.id)
+            db_session.add(entry)
+            db_session.flush()
+            db_session.add(ProductPrice(price_entry_id=entry.id, product_type=product_type, price=14.5, unit_of_measurement="Ghana Cedis per litre"))
+    db_session.commit()
+    yield db_session, company.id, users[0].id
+    db_session.close()
+
+
+@pytest.mark.utils
+def test_export_streams_flat_rows_in_batches(export_session):
+    db_session, _, user_id = export_session
+    query = PriceEntryQuery(db_session, PriceEntryExportParams(), user_id)
+    batches = list(query.stream(batch_size=1))
+    assert [len(batch) for batch in batches] == [1, 1]
+    row = batches[0][0]._mapping
+    assert (row["omc"], row["station"], row["product_type"]) == ("star oil", "east legon", "diesel")
+    assert export_value(row["seller_type"]) == "omc"
+
+
+@pytest.mark.utils
+def test_export_scopes_by_company_and_filters(export_session):
+    db_session, company_id, _ = export_session
+    params = PriceEntryExportParams(product_type="petrol")
+    rows = [row for batch in PriceEntryQuery(db_session, params, company_id=company_id).stream() for row in batch]
+    assert len(rows) == 2
+    assert {row.product_type for row in rows} == {"petrol"}
+
+
+@pytest.mark.utils
+def test_csv_chunk_quotes_values():
+    assert csv_chunk([["id", "omc"], [1, "star, oil"]]) == 'id,omc\r\n1,"star, oil"\r\n'
+
+
+@pytest.mark.utils
+def test_export_needs_a_user_or_company_scope(export_session):
+    db_session, _, _ = export_session
+    with pytest.raises(ValueError):
+        PriceEntryQuery(db_session, PriceEntryExportParams()).export_statement()
+
+
+@pytest.mark.utils
+def test_export_params_do_not_page():
+    assert not {"limit", "cursor"} & set(PriceEntryExportParams.model_fields)
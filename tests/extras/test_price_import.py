@@ -0,0 +1,63 @@
+import io
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import BDC, OMC, PriceEntry
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from utils.price_import import PriceImport, read_rows
+
+CSV = b"""seller_type,date,window,omc,bdc,station,station_location,town_of_loading,transaction_term,product_type,price,credit_price,credit_days
+bdc,2024-03-01,1st_window,Star Oil,Juwel,,,Tema,credit,diesel,14.2,15.0,30
+omc,2024-03-01,2nd_window,star oil,,East Legon,,,,petrol,13.9,,
+omc,2024-03-02,2nd_window,star oil,,Airport,,,,petrol,13.9,,
+omc,2024-03-02,2nd_window,star oil,,Airport,Kumasi,,,petrol,13.9,,
+bdc,2024-03-02,3rd_window,Star Oil,Juwel,,,Tema,cash,diesel,14.2,,
+bdc,2024-03-02,1st_window,Star Oil,Unknown,,,Tema,cash,diesel,-1,,
+,,,,,,,,,,,,
+"""
+
+
+@pytest.fixture
+def import_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user = User(email="backoffice@acme.com", company=company, is_admin=True)
+    db_session.add_all([
+        company, user, OMC(name="Star Oil"), BDC(name="Juwel"),
+        Station(name="East Legon", location="Accra"),
+        Station(name="Airport", location="Accra"), Station(name="Airport", location="Kumasi"),
+    ])
+    db_session.commit()
+    yield db_session, user.id
+    db_session.close()
+
+
+@pytest.mark.utils
+def test_import_writes_valid_rows_and_reports_the_rest(import_session):
+    db_session, user_id = import_session
+    report = PriceImport(db_session, user_id, batch_size=2).run(read_rows(io.BytesIO(CSV), "prices.csv"))
+
+    assert (report["total_rows"], report["imported"], report["failed"]) == (6, 3, 3)
+    assert [error["row"] for error in report["errors"]] == [4, 6, 7]
+    assert "set station_location" in report["errors"][0]["errors"][0]
+    assert report["errors"][1]["errors"][0].startswith("window")
+    assert report["errors"][2]["errors"] == ["bdc: unknown bdc 'Unknown'"]
+
+    entries = db_session.query(PriceEntry).order_by(PriceEntry.id).all()
+    assert [entry.user_id for entry in entries] == [user_id] * 3
+    assert entries[0].product_price.credit_days == 30
+    assert entries[1].station.name == "East Legon"
+    assert entries[2].station.location == "Kumasi"
+
+
+@pytest.mark.utils
+def test_import_rejects_unknown_file_types():
+    with pytest.raises(ValueError):
+        read_rows(io.BytesIO(b""), "prices.txt")
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from schemas.price_entry import OMCBDCFilterParams
+from utils.price_entry_filter import PriceEntryQuery
+
+
+@pytest.fixture(scope="module")
+def pagination_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user, omc, station = User(email="one@acme.com", company=company), OMC(name="star oil"), Station(name="east legon", location="accra")
+    db_session.add_all([company, user, omc, station])
+    db_session.flush()
+    # created_at comes from func.now(), so all six share one second
+    db_session.add_all([
+        PriceEntry(seller_type="omc", window="1st_window", user_id=user.id, omc_id=omc.id, station_id=station.id, date=datetime(2025, 1, 1 + n % 2))
+        for n in range(6)
+    ])
+    db_session.commit()
+    yield db_session, user.id
+    db_session.close()
+
+
+def all_pages(db_session, user_id, **params):
+    seen, cursor = [], None
+    for _ in range(10):
+        query = PriceEntryQuery(db_session, OMCBDCFilterParams(limit=2, cursor=cursor, **params), user_id)
+        seen.append([entry.id for entry in query.paginate()])
+        cursor = query.next_cursor
+        if cursor is None:
+            return seen
+    raise AssertionError(f"cursor did not advance: {seen}")
+
+
+@pytest.mark.utils
+def test_cursor_pages_through_equal_timestamps(pagination_session):
+    db_session, user_id = pagination_session
+    assert all_pages(db_session, user_id) == [[6, 5], [4, 3], [2, 1]]
+    assert all_pages(db_session, user_id, sort_order="asc") == [[1, 2], [3, 4], [5, 6]]
+
+
+@pytest.mark.utils
+def test_cursor_pages_on_python_and_mixed_timestamps(pagination_session):
+    db_session, user_id = pagination_session
+    assert all_pages(db_session, user_id, sort_by="date") == [[6, 4], [2, 5], [3, 1]]
+    db_session.execute(update(PriceEntry).where(PriceEntry.id == 3).values(created_at=datetime.now().replace(microsecond=0)))
+    db_session.commit()
+    pages = all_pages(db_session, user_id)
+    assert sorted(id for page in pages for id in page) == [1, 2, 3, 4, 5, 6]
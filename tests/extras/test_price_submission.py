@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import BDC, OMC, PriceEntry, TransactionTerm, WindowType
+from models.companies import Company
+from models.stations import Station
+from models.users import User
+from tests.query_budget import assert_query_budget
+
+
+@pytest.fixture(scope="module")
+def submission_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user = User(email="collector@acme.com", company=company)
+    omc, bdc = OMC(name="star oil"), BDC(name="juwel")
+    station = Station(name="east legon", location="accra")
+    db_session.add_all([company, user, omc, bdc, station])
+    db_session.commit()
+    yield engine, db_session, {"user_id": user.id, "omc_id": omc.id, "bdc_id": bdc.id, "station_id": station.id}
+    db_session.close()
+
+
+@pytest.mark.model
+def test_omc_submission_is_written_in_batched_statements(submission_session):
+    engine, db_session, ids = submission_session
+    product = SimpleNamespace(price="14.5,15.1,9.8,12,13", product_type="petrol,diesel,LPG,rfo,other")
+    images = [{"image_url": "http://s3/a.png"}, {"image_url": "http://s3/b.png"}]
+    base_data = {"seller_type": "omc", "user_id": ids["user_id"], "omc_id": ids["omc_id"],
+                 "window": WindowType.FIRST_WINDOW, "station_id": ids["station_id"]}
+
+    # entries, prices, images, outbox, then the joined reload and its images
+    with assert_query_budget(engine, max_statements=6):
+        entries = PriceEntry.add_multiple_omc_price_entry(db_session, base_data, product, images)
+
+    assert [entry.product_price.product_type for entry in entries] == ["petrol", "diesel", "LPG", "rfo", "other"]
+    assert [entry.product_price.price for entry in entries] == [14.5, 15.1, 9.8, 12.0, 13.0]
+    assert all(sorted(image.image_url for image in entry.images) == ["http://s3/a.png", "http://s3/b.png"] for entry in entries)
+    assert all(entry.station.name == "east legon" for entry in entries)
+
+
+@pytest.mark.model
+def test_bdc_submission_keeps_credit_terms(submission_session):
+    _, db_session, ids = submission_session
+    product = SimpleNamespace(price="14.5,15.1", product_type="petrol,diesel", credit_price=16.0, credit_days=30)
+    base_data = {"seller_type": "bdc", "user_id": ids["user_id"], "bdc_id": ids["bdc_id"], "omc_id": ids["omc_id"],
+                 "window": WindowType.SECOND_WINDOW, "town_of_loading": "tema", "transaction_term": TransactionTerm.CREDIT}
+
+    entries = PriceEntry.add_multiple_bdc_price_entry(db_session, base_data, product, None)
+
+    assert [(entry.product_price.credit_price, entry.product_price.credit_days) for entry in entries] == [(16.0, 30), (16.0, 30)]
+    assert all(entry.bdc.name == "juwel" and entry.images == [] for entry in entries)
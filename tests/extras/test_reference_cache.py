@@ -0,0 +1,119 @@
+import pytest
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import models.companies  # noqa: F401
+import models.users  # noqa: F401
+from core.setup import Base
+from models.bdcs import OMC
+from models.stations import Station
+from utils.reference_cache import STATION_LIST, ReferenceCache, cached_json_response, serialise
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def reference_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    db_session.add_all([OMC(name="star oil"), Station(name="east legon", location="accra")])
+    db_session.commit()
+    yield db_session
+    db_session.close()
+
+
+def request_with(if_none_match: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"if-none-match", if_none_match.encode())]})
+
+
+@pytest.mark.utils
+def test_snapshot_is_reused_until_invalidated_or_expired(reference_session):
+    clock = FakeClock()
+    cache = ReferenceCache(ttl=60, timer=clock)
+    statements = []
+    event.listen(reference_session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    data = cache.snapshot(reference_session)
+    assert cache.snapshot(reference_session) is data and len(statements) == 4
+    build = lambda: serialise(STATION_LIST, data.rows["station"])
+    assert data.response("stations", build) is data.response("stations", build)
+
+    cache.invalidate()
+    assert cache.snapshot(reference_session) is not data
+    clock.now = 61
+    assert cache.current() is None
+
+
+@pytest.mark.utils
+def test_etag_answers_304(reference_session):
+    data = ReferenceCache(ttl=60).snapshot(reference_session)
+    cached = data.response("stations", lambda: serialise(STATION_LIST, data.rows["station"]))
+    assert cached.body == b'[{"name":"east legon","location":"accra","id":1}]'
+    assert cached_json_response(request_with(cached.etag), cached).status_code == 304
+    assert cached_json_response(request_with('"other"'), cached).body == cached.body
+
+
+@pytest.mark.utils
+def test_require_checks_ids_against_the_snapshot_and_then_the_database(reference_session):
+    cache = ReferenceCache(ttl=60)
+    cache.require(reference_session, omc=1, station=1)
+    with pytest.raises(ValueError, match="OMC with ID 2 not found"):
+        cache.require(reference_session, omc=2)
+
+    # added by another worker: not in this worker's snapshot yet
+    reference_session.add(OMC(name="goil"))
+    reference_session.commit()
+    version = cache.version
+    cache.require(reference_session, omc=2)
+    assert cache.version == version + 1
+
+
+@pytest.mark.utils
+def test_bootstrap_bundle_is_gzipped_once_per_snapshot(reference_session):
+    import asyncio
+    import gzip
+    import json
+
+    from controller.bootstrap import BootstrapController
+    from utils import reference_cache
+
+    reference_cache.reference_cache.snapshot(reference_session)
+    cached = asyncio.run(BootstrapController.get_bootstrap())
+    assert asyncio.run(BootstrapController.get_bootstrap()) is cached
+    assert json.loads(gzip.decompress(cached.gzipped)) == json.loads(cached.body)
+    assert json.loads(cached.body)["stations"] == [{"name": "east legon", "location": "accra", "id": 1}]
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip, br")]})
+    response = cached_json_response(request, cached)
+    assert response.headers["content-encoding"] == "gzip" and response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == cached.gzip_etag
+    assert cached_json_response(request_with(cached.gzip_etag), cached).status_code == 304
+    reference_cache.reference_cache.invalidate()
+
+
+@pytest.mark.utils
+def test_writes_invalidate_the_snapshot_once_committed(reference_session):
+    from controller.products import ProductController
+    from utils.reference_cache import reference_cache
+
+    data = reference_cache.snapshot(reference_session)
+    ProductController.add_product({"name": "petrol"}, reference_session)
+    # a concurrent reload now would still read the old rows
+    assert reference_cache.current() is data
+    reference_session.commit()
+    assert reference_cache.current() is None
+
+    data = reference_cache.snapshot(reference_session)
+    ProductController.add_product({"name": "diesel"}, reference_session)
+    reference_session.rollback()
+    reference_session.commit()
+    assert reference_cache.current() is data
+    reference_cache.invalidate()
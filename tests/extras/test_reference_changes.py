@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from config.setting import settings
+import models.companies  # noqa: F401
+import models.users  # noqa: F401
+from controller.bootstrap import BootstrapController
+from core.setup import Base
+from models.bdcs import OMC
+from models.stations import Station
+
+
+@pytest.fixture
+def changes_session(monkeypatch):
+    monkeypatch.setattr(settings, "REFERENCE_CHANGES_OVERLAP_SECONDS", 0)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    db_session.add_all([OMC(name="star oil"), Station(name="east legon", location="accra"), Station(name="tema", location="tema")])
+    db_session.flush()
+    db_session.execute(update(OMC).values(updated_at=datetime(2024, 1, 1)))
+    db_session.execute(update(Station).values(updated_at=datetime(2024, 1, 2)))
+    db_session.commit()
+    yield db_session
+    db_session.close()
+
+
+@pytest.mark.model
+def test_changes_without_cursor_return_live_rows(changes_session):
+    changes = BootstrapController.load_changes(changes_session)
+    assert changes["cursor"] == datetime(2024, 1, 2)
+    assert [omc["name"] for omc in changes["omcs"]["updated"]] == ["star oil"]
+    assert len(changes["stations"]["updated"]) == 2 and changes["products"] == {"updated": [], "deleted": []}
+
+
+@pytest.mark.model
+def test_changes_since_cursor_return_only_the_delta(changes_session):
+    cursor = BootstrapController.load_changes(changes_session)["cursor"]
+    changes_session.execute(
+        update(Station).where(Station.name == "tema").values(deleted_at=datetime(2024, 1, 3), updated_at=datetime(2024, 1, 3))
+    )
+    changes_session.commit()
+
+    changes = BootstrapController.load_changes(changes_session, datetime(2024, 1, 2, 12))
+    assert changes["stations"] == {"updated": [], "deleted": [2]}
+    assert changes["omcs"]["updated"] == [] and changes["cursor"] == datetime(2024, 1, 3)
+    assert len(BootstrapController.load_changes(changes_session, cursor)["stations"]["updated"]) == 1
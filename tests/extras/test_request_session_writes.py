@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry, WindowType
+from models.companies import Company
+from models.products import Product
+from models.stations import Station
+from models.sync_outbox import SyncOutbox
+from models.users import User
+from utils.sql import add_object_to_database, update_object_in_database
+
+
+@pytest.mark.utils
+def test_request_session_is_flushed_not_committed():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+
+    product = add_object_to_database(Product(name="petrol"), db_session)
+    assert product.id is not None and db_session.in_transaction()
+    assert update_object_in_database(Product, "id", product.id, {"name": "diesel"}, db_session).name == "diesel"
+
+    # a failing route rolls the whole unit of work back
+    db_session.rollback()
+    assert db_session.query(Product).count() == 0
+    db_session.close()
+
+
+@pytest.mark.model
+def test_price_submission_is_left_to_the_request_commit():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user, omc, station = User(email="collector@acme.com", company=company), OMC(name="star oil"), Station(name="east legon", location="accra")
+    db_session.add_all([company, user, omc, station])
+    db_session.commit()
+    base_data = {"seller_type": "omc", "user_id": user.id, "omc_id": omc.id, "window": WindowType.FIRST_WINDOW, "station_id": station.id}
+
+    entries = PriceEntry.add_multiple_omc_price_entry(db_session, base_data, SimpleNamespace(price="14.5,15.1", product_type="petrol,diesel"), None)
+    assert len(entries) == 2 and db_session.in_transaction()
+
+    db_session.rollback()
+    assert db_session.query(PriceEntry).count() == 0 and db_session.query(SyncOutbox).count() == 0
+    db_session.close()
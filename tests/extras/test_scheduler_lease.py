@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.scheduler_lease import SchedulerLease
+
+
+@pytest.fixture
+def lease_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    yield db_session
+    db_session.close()
+
+
+@pytest.mark.model
+def test_one_holder_at_a_time_with_handover_on_expiry(lease_session):
+    assert SchedulerLease.acquire(lease_session, "sync", "node-a", 30)
+    assert not SchedulerLease.acquire(lease_session, "sync", "node-b", 30)
+    acquired_at = SchedulerLease.current(lease_session, "sync").acquired_at
+    assert SchedulerLease.acquire(lease_session, "sync", "node-a", 30)
+    lease_session.expire_all()
+    assert SchedulerLease.current(lease_session, "sync").acquired_at == acquired_at
+
+    # node-a stops renewing
+    lease_session.execute(update(SchedulerLease).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    lease_session.commit()
+    assert SchedulerLease.acquire(lease_session, "sync", "node-b", 30)
+    assert not SchedulerLease.acquire(lease_session, "sync", "node-a", 30)
+    lease_session.expire_all()
+    assert SchedulerLease.current(lease_session, "sync").holder == "node-b"
+
+
+@pytest.mark.model
+def test_release_hands_over_immediately(lease_session):
+    assert SchedulerLease.acquire(lease_session, "sync", "node-a", 30)
+    SchedulerLease.release(lease_session, "sync", "node-b")
+    assert not SchedulerLease.acquire(lease_session, "sync", "node-b", 30)
+    SchedulerLease.release(lease_session, "sync", "node-a")
+    assert SchedulerLease.acquire(lease_session, "sync", "node-b", 30)
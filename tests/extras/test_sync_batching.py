@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config.setting import settings
+from controller.sync import SyncController
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry, ProductPrice
+from models.companies import Company
+from models.stations import Station
+from models.sync_outbox import SyncOperation, SyncOutbox
+from models.users import User
+from tests.stand_in_server import StandInServer
+
+
+def seed(db_session, servers):
+    omc, station = OMC(name="star oil"), Station(name="east legon", location="accra")
+    db_session.add_all([omc, station])
+    companies = []
+    for name, (server, supports_batch_sync) in servers.items():
+        company = Company(name=name, api_key="key", api_user="user", api_endpoint=server.address, supports_batch_sync=supports_batch_sync)
+        user = User(email=f"collector@{name}.com", company=company)
+        db_session.add_all([company, user])
+        db_session.flush()
+        for product_type in ("petrol", "diesel", "LPG"):
+            entry = PriceEntry(seller_type="omc", window="1st_window", user_id=user.id, omc_id=omc.id, station_id=station.id)
+            db_session.add(entry)
+            db_session.flush()
+            db_session.add(ProductPrice(price_entry_id=entry.id, product_type=product_type, price=14.5, unit_of_measurement="Ghana Cedis per litre"))
+        companies.append(company)
+    db_session.flush()
+    SyncOutbox.enqueue(db_session, [entry.id for entry in db_session.query(PriceEntry)], SyncOperation.CREATE, new_entries=True)
+    db_session.commit()
+    return companies
+
+
+@pytest.mark.utils
+def test_creates_are_coalesced_per_company_with_single_item_fallback(monkeypatch):
+    monkeypatch.setattr(settings, "OMC_BDC_URL", "/api/v1/price-entries")
+    path = f"{settings.OMC_BDC_URL}/omc"
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    with StandInServer() as batching, StandInServer() as single, StandInServer(batch=False) as legacy:
+        _, _, legacy_company = seed(db_session, {"batching": (batching, True), "single": (single, False), "legacy": (legacy, True)})
+        items = SyncOutbox.claim(db_session, limit=100, lease_seconds=60)
+        price_entries = {entry.id: entry for entry in PriceEntry.get_price_entries_by_ids(db_session, [item.price_entry_id for item in items], "sync_payload")}
+
+        outcomes = SyncController.send_outbox_items(db_session, items, price_entries)
+
+    assert all(ok for ok, _ in outcomes.values()) and len(outcomes) == 9
+    assert [(method, received, len(body)) for method, received, body in batching.received] == [("POST", f"{path}/batch", 3)]
+    assert [received for _, received, _ in single.received] == [path] * 3
+    assert [received for _, received, _ in legacy.received] == [f"{path}/batch"] + [path] * 3
+    db_session.commit()
+    db_session.refresh(legacy_company)
+    assert legacy_company.supports_batch_sync is False
+    db_session.close()
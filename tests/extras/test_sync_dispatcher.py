@@ -0,0 +1,58 @@
+import httpx
+import pytest
+
+from services.sync_dispatcher import SyncDispatcher, SyncRequest
+from tests.stand_in_server import StandInServer
+
+
+def sync_requests(server: StandInServer, count: int, company: str = None):
+    return [
+        SyncRequest(key=n, company=company or server.address, method="POST", url=f"{server.url}/omc", json={"n": n})
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = SyncDispatcher(max_concurrency=8, company_concurrency=3, timeout=httpx.Timeout(2.0))
+    yield dispatcher
+    dispatcher.close()
+
+
+@pytest.mark.utils
+def test_dispatch_returns_results_in_request_order(dispatcher):
+    with StandInServer(latency=0.01) as server:
+        results = dispatcher.dispatch(sync_requests(server, 20))
+    assert [result.key for result in results] == list(range(20))
+    assert all(result.ok and "id" in result.body for result in results)
+    assert sorted(payload["n"] for _, _, payload in server.received) == list(range(20))
+
+
+@pytest.mark.utils
+def test_dispatch_bounds_concurrency_per_company(dispatcher):
+    with StandInServer(latency=0.05) as server:
+        dispatcher.dispatch(sync_requests(server, 12))
+    assert 1 < server.max_in_flight <= 3
+
+
+@pytest.mark.utils
+def test_dispatch_bounds_concurrency_across_companies(dispatcher):
+    with StandInServer(latency=0.05) as server:
+        # four company names on one stand-in: 4 x 3 per company, capped at 8 overall
+        requests = [request for company in "abcd" for request in sync_requests(server, 6, company)]
+        dispatcher.dispatch(requests)
+    assert 3 < server.max_in_flight <= 8
+
+
+@pytest.mark.utils
+def test_timeouts_and_errors_are_reported_per_item():
+    dispatcher = SyncDispatcher(timeout=httpx.Timeout(0.05))
+    try:
+        with StandInServer(latency=0.5) as server:
+            results = dispatcher.dispatch(sync_requests(server, 2))
+        assert all(not result.ok and "Timeout" in result.error for result in results)
+        with StandInServer(status_code=503) as server:
+            result = dispatcher.dispatch(sync_requests(server, 1))[0]
+        assert not result.ok and result.describe().startswith("503")
+    finally:
+        dispatcher.close()
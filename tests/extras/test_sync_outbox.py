@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from core.setup import Base
+from models.bdcs import OMC, PriceEntry
+from models.companies import Company
+from models.stations import Station
+from models.sync_outbox import SyncOperation, SyncOutbox, backoff_seconds
+from models.users import User
+from tests.query_budget import assert_query_budget
+
+
+@pytest.fixture
+def outbox_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db_session = sessionmaker(bind=engine)()
+    company = Company(name="acme", api_key="key", api_user="user", api_endpoint="acme.local")
+    user = User(email="collector@acme.com", company=company)
+    omc, station = OMC(name="star oil"), Station(name="east legon", location="accra")
+    db_session.add_all([company, user, omc, station])
+    db_session.flush()
+    entries = [PriceEntry(seller_type="omc", window="1st_window", user_id=user.id, omc_id=omc.id, station_id=station.id) for _ in range(3)]
+    db_session.add_all(entries)
+    db_session.commit()
+    yield db_session, [entry.id for entry in entries]
+    db_session.close()
+
+
+@pytest.mark.model
+def test_backoff_grows_exponentially_with_jitter_and_cap():
+    for attempts, delay in ((1, 5), (2, 10), (4, 40), (20, 3600)):
+        assert delay / 2 <= backoff_seconds(attempts, 5, 3600) <= delay
+
+
+@pytest.mark.model
+def test_enqueue_does_not_queue_an_entry_twice(outbox_session):
+    db_session, ids = outbox_session
+    SyncOutbox.enqueue(db_session, ids, SyncOperation.CREATE, new_entries=True)
+    SyncOutbox.enqueue(db_session, ids[:1], SyncOperation.CREATE)
+    SyncOutbox.enqueue(db_session, ids[:1], SyncOperation.UPDATE)
+    db_session.commit()
+    rows = db_session.execute(select(SyncOutbox.price_entry_id, SyncOutbox.operation)).all()
+    assert sorted(rows) == sorted([(id, SyncOperation.CREATE) for id in ids] + [(ids[0], SyncOperation.UPDATE)])
+
+
+@pytest.mark.model
+def test_claimed_items_are_leased_until_they_fail_or_are_delivered(outbox_session):
+    db_session, ids = outbox_session
+    SyncOutbox.enqueue(db_session, ids, SyncOperation.CREATE, new_entries=True)
+    db_session.commit()
+
+    with assert_query_budget(db_session.get_bind(), max_statements=3):
+        items = SyncOutbox.claim(db_session, limit=2, lease_seconds=60)
+        assert [item.attempts for item in items] == [1, 1]
+    assert [item.price_entry_id for item in SyncOutbox.claim(db_session, limit=10, lease_seconds=60)] == ids[2:]
+    assert SyncOutbox.claim(db_session, limit=10, lease_seconds=60) == []
+
+    SyncOutbox.failed(db_session, items[0], "503: unavailable", base=5, cap=3600)
+    SyncOutbox.delivered(db_session, [items[1].id])
+    db_session.commit()
+    assert items[0].next_attempt_at <= datetime.utcnow() + timedelta(seconds=5)
+
+    stats = SyncOutbox.stats(db_session)
+    assert (stats["depth"], stats["due"], stats["max_attempts"]) == (2, 0, 1)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from services.sync_dispatcher import CircuitBreaker, LatencyWindow, TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.utils
+def test_breaker_opens_probes_once_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+@pytest.mark.utils
+def test_token_bucket_allows_bursts_then_the_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+    assert [asyncio.run(bucket.acquire(max_wait=0)) for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert asyncio.run(bucket.acquire(max_wait=0))
+    assert TokenBucket().wait_time() == 0
+
+
+@pytest.mark.utils
+def test_timeout_follows_observed_latency():
+    window = LatencyWindow(size=100)
+    assert window.timeout(default=15) == 15
+    for n in range(100):
+        window.add(0.2 if n < 99 else 1.0)
+    assert window.percentile(50) == 0.2
+    assert window.timeout(default=15) == pytest.approx(3.0)
+    assert window.timeout(default=2) == 2
+
+
+@pytest.mark.utils
+def test_timeout_recovers_after_latency_rises():
+    clock = FakeClock()
+    window = LatencyWindow(size=100, max_age=60, clock=clock)
+    for _ in range(100):
+        window.add(0.2)
+    assert window.timeout(default=15) == 1
+    window.add_timeout(1)
+    assert window.timeout(default=15) == pytest.approx(3.0)
+    window.add_timeout(3)
+    assert window.timeout(default=15) == pytest.approx(9.0)
+
+    clock.now = 61
+    assert window.percentile(99) is None and window.timeout(default=15) == 15
@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+import models.companies  # noqa: F401
+import models.users  # noqa: F401
+from models.master_data_sync import MasterDataSyncRun
+from services.upstream import fetch_dataset, iter_json_array, unique_rows
+from tests.stand_in_server import StandInServer
+
+STATIONS = [
+    {"name": "east legon", "location": "accra", "id": 1},
+    {"name": "east legon", "location": "accra", "id": 2},
+    {"name": "tema one", "location": "tema"},
+    {"name": "no location"},
+]
+
+
+@pytest.mark.utils
+def test_rows_are_deduplicated_on_the_sync_keys_while_parsing():
+    items = iter_json_array(io.BytesIO(b'[{"name": "a", "location": "x"}, {"name": "a", "location": "x", "extra": 1}, 3]'))
+    assert unique_rows(items, ("name", "location")) == [{"name": "a", "location": "x"}]
+
+
+@pytest.mark.utils
+def test_unchanged_upstream_is_skipped_before_parsing():
+    keys = ("name", "location")
+    with StandInServer(dataset=STATIONS, etag='"v1"') as server:
+        first = fetch_dataset("stations", f"{server.url}/stations", {}, keys)
+        assert first.rows == [{"name": "east legon", "location": "accra"}, {"name": "tema one", "location": "tema"}]
+        assert first.etag == '"v1"' and first.bytes_fetched > 0
+
+        previous = MasterDataSyncRun(dataset="stations", etag=first.etag, content_hash=first.content_hash)
+        not_modified = fetch_dataset("stations", f"{server.url}/stations", {}, keys, previous)
+        assert (not_modified.status_code, not_modified.rows, not_modified.bytes_fetched) == (304, None, 0)
+        assert server.received[-1][2]["If-None-Match"] == '"v1"'
+
+        server.etag = None
+        same_content = fetch_dataset("stations", f"{server.url}/stations", {}, keys, previous)
+        assert (same_content.status_code, same_content.rows) == (200, None)
+        assert same_content.content_hash == first.content_hash
@@ -0,0 +1,46 @@
+"""Query budget helper
+
+Counts the SQL statements an engine executes and the ORM rows hydrated
+while a block runs, and fails when an endpoint or controller goes over
+its budget.
+
+    with assert_query_budget(engine, max_statements=2, max_rows=25):
+        client.get("/api/v1/price_entries")
+"""
+
+from contextlib import contextmanager
+from typing import Generator
+
+from sqlalchemy import event
+
+from models.custom_base import CustomBase
+
+
+class QueryBudget:
+    def __init__(self) -> None:
+        self.statements = []
+        self.rows = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _on_load(self, target, context):
+        self.rows += 1
+
+
+@contextmanager
+def assert_query_budget(engine, max_statements: int, max_rows: int = None) -> Generator[QueryBudget, None, None]:
+    budget = QueryBudget()
+    event.listen(engine, "before_cursor_execute", budget._on_execute)
+    event.listen(CustomBase, "load", budget._on_load, propagate=True)
+    try:
+        yield budget
+    finally:
+        event.remove(engine, "before_cursor_execute", budget._on_execute)
+        event.remove(CustomBase, "load", budget._on_load)
+    assert len(budget.statements) <= max_statements, (
+        f"{len(budget.statements)} statements executed, budget is {max_statements}:\n"
+        + "\n".join(budget.statements)
+    )
+    if max_rows is not None:
+        assert budget.rows <= max_rows, f"{budget.rows} rows loaded, budget is {max_rows}"
@@ -0,0 +1,105 @@
+"""Local stand-in for a company sync endpoint
+
+Answers every POST/PUT with {"id": n} after an optional delay and
+records how many requests were in flight at once. An array POSTed to a
+path ending in /batch gets an array of {"id": n}, or a 404 when the
+stand-in is started with batch=False. A GET returns the upstream
+dataset list with its ETag, or 304 when If-None-Match matches it.
+
+    with StandInServer(latency=0.05) as server:
+        requests.post(f"{server.url}/omc", json={...})
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    def __init__(self, latency: float = 0.0, status_code: int = 200, batch: bool = True, dataset: list = None, etag: str = None) -> None:
+        self.latency = latency
+        self.dataset = dataset or []
+        self.etag = etag
+        self.status_code = status_code
+        self.batch = batch
+        self.received = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.address}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _respond(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or "null")
+                is_batch = self.path.endswith("/batch")
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    server.received.append((self.command, self.path, body))
+                    item_id = len(server.received)
+                time.sleep(server.latency)
+                with server._lock:
+                    server.in_flight -= 1
+                status_code = server.status_code
+                if is_batch and not server.batch:
+                    status_code, result = 404, {"detail": "Not Found"}
+                elif is_batch:
+                    result = [{"id": item_id * 1000 + n} for n in range(len(body))]
+                else:
+                    result = {"id": item_id}
+                payload = json.dumps(result).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.received.append((self.command, self.path, dict(self.headers)))
+                if server.etag and self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", server.etag)
+                    self.end_headers()
+                    return
+                payload = json.dumps(server.dataset).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                if server.etag:
+                    self.send_header("ETag", server.etag)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_POST = _respond
+            do_PUT = _respond
+
+        return Handler
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,16 +1,22 @@
 from datetime import datetime, timedelta
-from typing import Tuple, Union
+from typing import Any, Optional, Tuple, Union
 
 import jwt
 from fastapi import security
 import random
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 
 from errors.exception import AuthException
 from config.setting import settings
-from utils.sql import check_if_user_exist
+from schemas.users import VerifiedIdentity
+from utils.cache import TTLCache
+from utils.sql import check_if_user_exist, check_if_user_exist_async
 
 
+# Verified identities keyed by (is_system_admin, token sub)
+identity_cache = TTLCache(settings.AUTH_CACHE_MAXSIZE, settings.AUTH_CACHE_TTL)
 
 
 class AuthToken:
@@ -62,7 +68,6 @@ class AuthToken:
 
     @staticmethod
     def verify_auth_token(auth_token: str) -> str:
-        print(auth_token)
         """
         Verifies the auth token
         """
@@ -92,35 +97,89 @@ class AuthToken:
     
 
     @staticmethod
-    def verify_user_token(token: str)-> dict:
+    def cached_identity(email: str, is_system_admin: bool = False) -> Optional[VerifiedIdentity]:
+        """Return the verified identity cached for a token subject"""
+        return identity_cache.get((is_system_admin, email))
+
+    @staticmethod
+    def remember_identity(db_user: Any, is_system_admin: bool = False) -> VerifiedIdentity:
+        """Cache the identity of a user loaded from the database"""
+        identity = VerifiedIdentity.from_user(db_user, is_system_admin)
+        ttl = min(settings.AUTH_ADMIN_CACHE_TTL, settings.AUTH_CACHE_TTL) if identity.is_admin or identity.is_system_admin else None
+        identity_cache.set((is_system_admin, identity.email), identity, ttl)
+        return identity
+
+    @staticmethod
+    def invalidate_identity(*emails: str) -> None:
+        """Forget cached identities, called whenever a user changes"""
+        for email in emails:
+            if email:
+                identity_cache.invalidate((False, email))
+                identity_cache.invalidate((True, email))
+
+    @staticmethod
+    def invalidate_company_identities(company_id: int) -> int:
+        """Forget cached identities of every user of a company"""
+        return identity_cache.invalidate_where(
+            lambda key, identity: identity.company_id == company_id
+        )
+
+    @staticmethod
+    def verify_user_token(token: str, db_session: Optional[Session] = None)-> VerifiedIdentity:
         """Verify admin token and return user data"""
-        user_email_or_mobile = AuthToken.verify_auth_token(token)
-        user_email = {"email": user_email_or_mobile["sub"]}
-        db_user = check_if_user_exist(user_email)
+        email = AuthToken.verify_auth_token(token)["sub"]
+        identity = AuthToken.cached_identity(email)
+        if identity:
+            return identity
+        db_user = check_if_user_exist({"email": email}, db_session=db_session)
         if not db_user:
             raise AuthException(msg="Invalid token, kindly check your previledges", code=401)
-        return db_user
+        return AuthToken.remember_identity(db_user)
     
 
     @staticmethod
-    def verify_system_admin(token: str)-> dict:
+    def verify_system_admin(token: str, db_session: Optional[Session] = None)-> VerifiedIdentity:
         """Verify system admin token and return user data"""
-        user_email_or_mobile = AuthToken.verify_auth_token(token)
-        user_email = {"email": user_email_or_mobile["sub"]}
-        db_user = check_if_user_exist(user_email, True)
+        db_user = AuthToken.just_verify_system_admin(token, db_session)
         if not db_user:
             raise AuthException(msg="Invalid token", code=404)
         return db_user
     
     @staticmethod
-    def just_verify_system_admin(token: str)-> dict:
+    async def verify_user_token_async(token: str, db_session: Optional[AsyncSession] = None)-> VerifiedIdentity:
+        """Verify user token on the asyncio session and return user data"""
+        email = AuthToken.verify_auth_token(token)["sub"]
+        identity = AuthToken.cached_identity(email)
+        if identity:
+            return identity
+        db_user = await check_if_user_exist_async({"email": email}, db_session=db_session)
+        if not db_user:
+            raise AuthException(msg="Invalid token, kindly check your previledges", code=401)
+        return AuthToken.remember_identity(db_user)
+
+    @staticmethod
+    async def verify_system_admin_async(token: str, db_session: Optional[AsyncSession] = None)-> VerifiedIdentity:
+        """Verify system admin token on the asyncio session and return user data"""
+        email = AuthToken.verify_auth_token(token)["sub"]
+        identity = AuthToken.cached_identity(email, True)
+        if identity:
+            return identity
+        db_user = await check_if_user_exist_async({"email": email}, True, db_session)
+        if not db_user:
+            raise AuthException(msg="Invalid token", code=404)
+        return AuthToken.remember_identity(db_user, True)
+    
+    @staticmethod
+    def just_verify_system_admin(token: str, db_session: Optional[Session] = None)-> Union[VerifiedIdentity, bool]:
         """Verify system admin token and return user data"""
-        user_email_or_mobile = AuthToken.verify_auth_token(token)
-        user_email = {"email": user_email_or_mobile["sub"]}
-        db_user = check_if_user_exist(user_email, True)
+        email = AuthToken.verify_auth_token(token)["sub"]
+        identity = AuthToken.cached_identity(email, True)
+        if identity:
+            return identity
+        db_user = check_if_user_exist({"email": email}, True, db_session)
         if not db_user:
             return False
-        return db_user
+        return AuthToken.remember_identity(db_user, True)
     
     
 
@@ -0,0 +1,146 @@
+"""In-process caches
+
+This module holds the bounded TTL + LRU cache used for
+hot lookups that would otherwise hit the database per request,
+and a Redis-backed cache with the same batch interface for values
+every worker should share
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded cache where entries expire after ``ttl`` seconds and the
+    least recently used entry is evicted once ``maxsize`` is reached.
+
+    Every invalidation bumps ``version``; a loader that reads the version
+    before querying and passes it to ``set`` never stores a value that was
+    invalidated while it was being loaded
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.version = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value or default when missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= self._timer():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, version: Optional[int] = None) -> None:
+        """Store a value, evicting the least recently used entries if full"""
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (self._timer() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """The cached values of keys, leaving out missing and expired ones"""
+        values = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                values[key] = value
+        return values
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        """Store several values with the same ttl"""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self.version += 1
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry matching predicate(key, value) and return how many were dropped"""
+        with self._lock:
+            self.version += 1
+            keys = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self.version += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class RedisCache:
+    """
+    Cache shared by every worker through Redis, with the get_many / set_many
+    interface of TTLCache; Redis expires the entries and bounds the memory.
+    Keys are strings, stored under ``prefix``
+    """
+
+    def __init__(self, client, prefix: str, ttl: float):
+        self._client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self._client.mget([self.prefix + key for key in keys])
+        return {
+            key: value.decode() if isinstance(value, bytes) else value
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_many(self, items: Dict[str, str], ttl: Optional[float] = None) -> None:
+        if not items:
+            return
+        pipeline = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(self.prefix + key, value, ex=max(int(self.ttl if ttl is None else ttl), 1))
+        pipeline.execute()
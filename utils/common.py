@@ -131,3 +131,13 @@ def remove_dict_dulicates(list_of_dicts: list[dict[str, Any]]) -> list[dict[str,
     dict_value = [json.loads(d) for d in dict_value]
     return dict_value
    
+
+
+def sync_summary(resource: str, diff: Dict[str, list], dry_run: bool = False) -> Dict[str, Any]:
+    """Response body of a master-data sync: a message with the counts, and the diff itself"""
+    message = f"{len(diff['added'])} {resource} added, {len(diff['removed'])} removed, {len(diff['restored'])} restored"
+    return {
+        "message": f"{message} (dry run, nothing applied)" if dry_run else message,
+        "status": True,
+        **diff,
+    }
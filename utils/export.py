@@ -0,0 +1,23 @@
+"""Row formatting for the streaming price entry export"""
+
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import Any, Iterable, Sequence
+
+
+def export_value(value: Any) -> Any:
+    """Render a projected column as a plain CSV/JSON value"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_chunk(rows: Iterable[Sequence[Any]]) -> str:
+    """Write a batch of rows as CSV text"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
@@ -1,31 +1,85 @@
+import base64
+import binascii
+import json
 from datetime import datetime, timedelta
-from sqlalchemy import desc, asc
+from typing import List, Optional, Union
+from sqlalchemy import DateTime, desc, asc, literal, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from fastapi_pagination import Params
-from fastapi_pagination.ext.sqlalchemy import paginate as sql_paginate
-from models.bdcs import PriceEntry, ProductPrice
+from models.bdcs import BDC, OMC, PriceEntry, ProductPrice
+from models.stations import Station
+from models.users import User
 from pydantic import BaseModel
 
 
-from models.bdcs import ProductType
+# Columns that can drive keyset pagination, the id breaks ties
+KEYSET_SORT_FIELDS = ("created_at", "updated_at", "date", "id")
+
+# Flat projection streamed by the export, one row per price entry
+EXPORT_COLUMNS = (
+    PriceEntry.id,
+    PriceEntry.seller_type,
+    PriceEntry.window,
+    PriceEntry.date,
+    PriceEntry.created_at,
+    PriceEntry.user_id,
+    OMC.name.label("omc"),
+    BDC.name.label("bdc"),
+    Station.name.label("station"),
+    PriceEntry.station_location,
+    PriceEntry.town_of_loading,
+    PriceEntry.transaction_term,
+    ProductPrice.product_type,
+    ProductPrice.price,
+    ProductPrice.unit_of_measurement,
+    ProductPrice.credit_price,
+    ProductPrice.credit_days,
+)
+
+
+class keyset_timestamp(FunctionElement):
+    """
+    A timestamp column as the keyset cursor compares it. SQLite keeps
+    timestamps as text, written by func.now() without microseconds and by
+    Python values with them, while a bound datetime always has ".ffffff";
+    equal timestamps then compared as different strings and the cursor never
+    moved past them. On SQLite the column is padded to the bound format, in
+    both the ORDER BY and the cursor filter; elsewhere it is the plain column.
+    """
+    inherit_cache = True
+    type = DateTime()
+
+
+@compiles(keyset_timestamp)
+def _keyset_timestamp(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(keyset_timestamp, "sqlite")
+def _keyset_timestamp_sqlite(element, compiler, **kw):
+    return f"substr({compiler.process(element.clauses, **kw)} || '.000000', 1, 26)"
+
 
 class PriceEntryQuery:
-    def __init__(self, db_session: Session, params: BaseModel, user_id: int = None):
+    def __init__(self, db_session: Union[Session, AsyncSession], params: BaseModel, user_id: int = None, company_id: int = None):
         self.db_session = db_session
         self.params = params
         self.user_id = user_id
+        self.company_id = company_id
+        self.next_cursor: Optional[str] = None
 
 
         
 
-    def apply_filters(self, query):
+    def apply_filters(self, query, product_price_joined: bool = False):
         
         needs_variation_join = any([
             getattr(self.params, 'product_type', None)
         ])
-        if needs_variation_join:
+        if needs_variation_join and not product_price_joined:
             query = query.join(ProductPrice)
 
 
@@ -40,38 +94,129 @@ class PriceEntryQuery:
         return query
     
 
+    @property
+    def sort_by(self) -> str:
+        sort_by = self.params.sort_by or "created_at"
+        if sort_by not in KEYSET_SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {', '.join(KEYSET_SORT_FIELDS)}")
+        return sort_by
+
+    @property
+    def descending(self) -> bool:
+        return self.params.sort_order != "asc"
+
     def apply_sorting(self, query):
-        if not self.params.sort_by:
-            query = query.order_by(desc(PriceEntry.created_at))
-        else:
-            sort_field = getattr(PriceEntry, self.params.sort_by, None)
-            if sort_field:
-                if self.params.sort_order == "asc":
-                    query = query.order_by(asc(sort_field))
-                else:
-                    query = query.order_by(desc(sort_field))
-        return query
+        sort_field = getattr(PriceEntry, self.sort_by)
+        direction = desc if self.descending else asc
+        if self.sort_by == "id":
+            return query.order_by(direction(PriceEntry.id))
+        # same expression as the cursor filter, so both see one order
+        return query.order_by(direction(keyset_timestamp(sort_field)), direction(PriceEntry.id))
 
 
     def apply_date_range_filter(self, query):
         if self.params.from_date and self.params.to_date:
             from_date = datetime.strptime(self.params.from_date, "%Y-%m-%d")
             to_date = datetime.strptime(self.params.to_date, "%Y-%m-%d") + timedelta(days=1) - timedelta(seconds=1)
-            query = query.filter(PriceEntry.created_at.between(from_date, to_date))
+            date_field = getattr(PriceEntry, getattr(self.params, "date_field", None) or "created_at")
+            query = query.filter(date_field.between(from_date, to_date))
         return query
+
+
+    def encode_cursor(self, price_entry: PriceEntry) -> str:
+        value = getattr(price_entry, self.sort_by)
+        payload = {
+            "k": self.sort_by,
+            "o": "desc" if self.descending else "asc",
+            "v": value.isoformat() if isinstance(value, datetime) else value,
+            "id": price_entry.id,
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> dict:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, ValueError):
+            raise ValueError("Invalid cursor")
+        if payload.get("k") != self.sort_by or payload.get("o") != ("desc" if self.descending else "asc"):
+            raise ValueError("Cursor does not match the requested sort_by and sort_order")
+        if self.sort_by != "id" and payload.get("v") is not None:
+            payload["v"] = datetime.fromisoformat(payload["v"])
+        return payload
+
+    def apply_cursor(self, query):
+        """Continue after the last row of the previous page (keyset pagination)"""
+        if not getattr(self.params, "cursor", None):
+            return query
+        payload = self.decode_cursor(self.params.cursor)
+        if self.sort_by == "id":
+            key, boundary = PriceEntry.id, payload["id"]
+        else:
+            sort_field = getattr(PriceEntry, self.sort_by)
+            key = tuple_(keyset_timestamp(sort_field), PriceEntry.id)
+            boundary = tuple_(literal(payload["v"], sort_field.type), literal(payload["id"]))
+        return query.filter(key < boundary if self.descending else key > boundary)
     
 
-    def paginate(self):
-        query = self.db_session.query(PriceEntry).filter(PriceEntry.user_id == self.user_id)
+    def apply_scope(self, query):
+        if self.user_id is None and self.company_id is None:
+            raise ValueError("Price entries must be scoped to a user or a company")
+        if self.user_id is not None:
+            query = query.filter(PriceEntry.user_id == self.user_id)
+        if self.company_id is not None:
+            query = query.filter(PriceEntry.user_id.in_(select(User.id).where(User.company_id == self.company_id)))
+        return query
+
+    def statement(self):
+        query = select(PriceEntry).options(*PriceEntry.load_profile("listing"))
+        query = self.apply_scope(query)
         query = self.apply_filters(query)
-        query = self.apply_sorting(query)
         query = self.apply_date_range_filter(query)
-        return query.all()
-
-
+        query = self.apply_cursor(query)
+        query = self.apply_sorting(query)
+        return query
 
-    
+    def export_statement(self):
+        """Same filters and order as statement(), as a flat column projection"""
+        query = (
+            select(*EXPORT_COLUMNS)
+            .select_from(PriceEntry)
+            .outerjoin(ProductPrice, ProductPrice.price_entry_id == PriceEntry.id)
+            .outerjoin(OMC, OMC.id == PriceEntry.omc_id)
+            .outerjoin(BDC, BDC.id == PriceEntry.bdc_id)
+            .outerjoin(Station, Station.id == PriceEntry.station_id)
+        )
+        query = self.apply_scope(query)
+        query = self.apply_filters(query, product_price_joined=True)
+        query = self.apply_date_range_filter(query)
+        query = self.apply_cursor(query)
+        query = self.apply_sorting(query)
+        return query
 
+    def stream(self, batch_size: int = 1000):
+        """Yield export rows in batches from a server-side cursor"""
+        result = self.db_session.execute(
+            self.export_statement(),
+            execution_options={"stream_results": True, "yield_per": batch_size},
+        )
+        for partition in result.partitions():
+            yield partition
+
+    def page_statement(self):
+        """One extra row tells whether another page follows"""
+        return self.statement().limit(self.params.limit + 1)
+
+    def page(self, price_entries: List[PriceEntry]) -> List[PriceEntry]:
+        self.next_cursor = None
+        if len(price_entries) > self.params.limit:
+            price_entries = price_entries[:self.params.limit]
+            self.next_cursor = self.encode_cursor(price_entries[-1])
+        return price_entries
 
+    def paginate(self):
+        return self.page(self.db_session.execute(self.page_statement()).scalars().all())
 
-    
\ No newline at end of file
+    async def paginate_async(self):
+        result = await self.db_session.execute(self.page_statement())
+        return self.page(result.scalars().all())
@@ -0,0 +1,242 @@
+"""Bulk price import
+
+Reads a CSV or XLSX upload row by row, validates each row with the same
+schemas as the single-submission routes, resolves BDC/OMC/station names
+through in-memory maps and writes the valid rows in batched INSERTs.
+"""
+
+import codecs
+import csv
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models.bdcs import BDC, OMC, PriceEntry, ProductPrice, SellerType, TransactionTerm, compute_unit_of_measurement
+from models.stations import Station
+from models.sync_outbox import SyncOperation, SyncOutbox
+from schemas.price_entry import BDCPriceEntryCreate, OMCPriceEntryCreate
+
+
+# Header of an import file; omc is the source OMC for BDC rows
+IMPORT_COLUMNS = (
+    "seller_type", "date", "window", "omc", "bdc", "station", "station_location",
+    "town_of_loading", "transaction_term", "product_type", "price", "credit_price", "credit_days",
+)
+ENTRY_KEYS = (
+    "seller_type", "user_id", "date", "window", "omc_id", "bdc_id", "station_id",
+    "town_of_loading", "transaction_term",
+)
+
+
+def read_csv_rows(file: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+    for row in reader:
+        yield row
+
+
+def read_xlsx_rows(file: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires openpyxl, upload a CSV file instead")
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(file: IO[bytes], filename: str) -> Iterator[Dict[str, Any]]:
+    """Iterate the rows of an upload, picking the parser from the file extension"""
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return read_csv_rows(file)
+    if extension == "xlsx":
+        return read_xlsx_rows(file)
+    raise ValueError("Upload a .csv or .xlsx file")
+
+
+def cell(row: Dict[str, Any], column: str) -> Optional[Any]:
+    value = row.get(column)
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in ("", None) else value
+
+
+def error_messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()]
+
+
+class PriceImport:
+    """Validate and bulk insert the rows of one upload for one collector, leaving the commit to the caller"""
+
+    def __init__(self, db_session: Session, user_id: int, batch_size: int = 1000):
+        self.db_session = db_session
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.total_rows = 0
+        self.imported = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._batch: List[Tuple[dict, dict]] = []
+        self.bdcs = self.name_map(BDC)
+        self.omcs = self.name_map(OMC)
+        self.stations, self.stations_by_location = self.station_maps()
+
+    def name_map(self, model) -> Dict[str, int]:
+        rows = self.db_session.execute(select(model.name, model.id).filter(model.deleted_at.is_(None)))
+        return {name.strip().lower(): id for name, id in rows}
+
+    def station_maps(self) -> Tuple[Dict[str, Optional[int]], Dict[Tuple[str, str], int]]:
+        by_name: Dict[str, Optional[int]] = {}
+        by_location: Dict[Tuple[str, str], int] = {}
+        rows = self.db_session.execute(select(Station.name, Station.location, Station.id).filter(Station.deleted_at.is_(None)))
+        for name, location, id in rows:
+            name = name.strip().lower()
+            by_location[(name, location.strip().lower())] = id
+            # the same station name at several locations needs station_location
+            by_name[name] = None if name in by_name else id
+        return by_name, by_location
+
+    def resolve(self, names: Dict[str, int], kind: str, name: Optional[str], errors: List[str]) -> Optional[int]:
+        if name is None:
+            errors.append(f"{kind}: is required")
+            return None
+        id = names.get(str(name).lower())
+        if id is None:
+            errors.append(f"{kind}: unknown {kind} '{name}'")
+        return id
+
+    def resolve_station(self, row: Dict[str, Any], errors: List[str]) -> Optional[int]:
+        name, location = cell(row, "station"), cell(row, "station_location")
+        if name is None:
+            errors.append("station: is required")
+            return None
+        if location is not None:
+            id = self.stations_by_location.get((str(name).lower(), str(location).lower()))
+        else:
+            id = self.stations.get(str(name).lower(), 0)
+            if id is None:
+                errors.append(f"station: '{name}' exists at several locations, set station_location")
+                return None
+        if not id:
+            errors.append(f"station: unknown station '{name}'")
+            return None
+        return id
+
+    def validate(self, row: Dict[str, Any]) -> Tuple[Optional[Tuple[dict, dict]], List[str]]:
+        """Turn one file row into a price entry and product price, or errors"""
+        errors: List[str] = []
+        seller_type = str(cell(row, "seller_type") or "").lower()
+        product = {"product_type": cell(row, "product_type"), "price": cell(row, "price")}
+        if seller_type == SellerType.OMC:
+            data = {
+                "omc_id": self.resolve(self.omcs, "omc", cell(row, "omc"), errors),
+                "station_id": self.resolve_station(row, errors),
+            }
+            schema = OMCPriceEntryCreate
+        elif seller_type == SellerType.BDC:
+            data = {
+                "bdc_id": self.resolve(self.bdcs, "bdc", cell(row, "bdc"), errors),
+                "source_id": self.resolve(self.omcs, "omc", cell(row, "omc"), errors),
+                "town_of_loading": cell(row, "town_of_loading"),
+                "transaction_term": cell(row, "transaction_term"),
+            }
+            product.update(credit_price=cell(row, "credit_price"), credit_days=cell(row, "credit_days"))
+            schema = BDCPriceEntryCreate
+        else:
+            return None, ["seller_type: must be omc or bdc"]
+        if errors:
+            return None, errors
+
+        data.update(seller_type=seller_type, window=cell(row, "window"), product={
+            key: str(value) if key in ("product_type", "price") and value is not None else value
+            for key, value in product.items()
+        })
+        if cell(row, "date") is not None:
+            data["date"] = cell(row, "date")
+        try:
+            price_entry = schema(**data)
+            price = float(price_entry.product.price)
+        except ValidationError as error:
+            return None, error_messages(error)
+        except ValueError:
+            return None, ["product.price: must be a single number"]
+        if price <= 0:
+            return None, ["product.price: must be greater than 0"]
+
+        entry = dict.fromkeys(ENTRY_KEYS)
+        entry.update(
+            seller_type=seller_type,
+            user_id=self.user_id,
+            date=price_entry.date,
+            window=price_entry.window,
+        )
+        product_type = price_entry.product.product_type
+        product_price = {
+            "product_type": product_type,
+            "price": price,
+            "unit_of_measurement": compute_unit_of_measurement(product_type),
+            "credit_price": None,
+            "credit_days": None,
+        }
+        if isinstance(price_entry, OMCPriceEntryCreate):
+            entry.update(omc_id=price_entry.omc_id, station_id=price_entry.station_id)
+        else:
+            entry.update(
+                omc_id=price_entry.source_id,
+                bdc_id=price_entry.bdc_id,
+                town_of_loading=price_entry.town_of_loading,
+                transaction_term=price_entry.transaction_term,
+            )
+            if price_entry.transaction_term == TransactionTerm.CREDIT:
+                product_price.update(
+                    credit_price=price_entry.product.credit_price,
+                    credit_days=price_entry.product.credit_days,
+                )
+        return (entry, product_price), []
+
+    def flush(self) -> None:
+        """Write the pending batch as two INSERTs"""
+        if not self._batch:
+            return
+        entries, product_prices = zip(*self._batch)
+        price_entry_ids = self.db_session.scalars(
+            insert(PriceEntry).returning(PriceEntry.id, sort_by_parameter_order=True),
+            list(entries),
+        ).all()
+        self.db_session.execute(
+            insert(ProductPrice),
+            [{**product_price, "price_entry_id": price_entry_id} for price_entry_id, product_price in zip(price_entry_ids, product_prices)],
+        )
+        SyncOutbox.enqueue(self.db_session, price_entry_ids, SyncOperation.CREATE, new_entries=True)
+        self.imported += len(self._batch)
+        self._batch = []
+
+    def run(self, rows: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """Import every row; rows are numbered as in the file, the header being row 1"""
+        for row_number, row in enumerate(rows, start=2):
+            if not any(value not in ("", None) for value in row.values()):
+                continue
+            self.total_rows += 1
+            values, errors = self.validate(row)
+            if errors:
+                self.errors.append({"row": row_number, "errors": errors})
+                continue
+            self._batch.append(values)
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        self.flush()
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": len(self.errors),
+            "errors": self.errors,
+        }
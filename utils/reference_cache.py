@@ -0,0 +1,186 @@
+"""In-process reference data cache
+
+BDCs, OMCs, stations and products only change on a sync or an admin edit,
+so each worker keeps one snapshot of them and serves the read endpoints
+from response bytes serialised once per snapshot, with an ETag derived
+from those bytes (so every worker agrees on it). Writes in this worker
+invalidate the snapshot at once; writes in other workers are picked up
+when the snapshot reaches REFERENCE_CACHE_TTL.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config.setting import settings
+from utils.session import AsyncCreateDBSession
+from models.bdcs import BDC, OMC
+from models.products import Product
+from models.stations import Station
+from schemas.bdcs import BDCOMCAllOut, BDCOMCOut
+from schemas.products import Product as ProductOut
+from schemas.stations import StationsOut
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    # gzip encoding of body, kept for the larger responses
+    gzipped: Optional[bytes] = None
+
+    @property
+    def gzip_etag(self) -> str:
+        return f'{self.etag[:-1]}-gzip"'
+
+
+def cached_json_response(request: Request, cached: CachedResponse) -> Response:
+    """
+    The cached body, gzipped when there is a gzip copy and the client accepts it,
+    or an empty 304 when the client already has this version in either encoding
+    """
+    use_gzip = cached.gzipped is not None and "gzip" in request.headers.get("accept-encoding", "")
+    headers = {"ETag": cached.gzip_etag if use_gzip else cached.etag, "Cache-Control": "no-cache"}
+    if cached.gzipped is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if_none_match = {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+    if if_none_match & {cached.etag, cached.gzip_etag}:
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=cached.gzipped, media_type="application/json", headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class ReferenceData:
+    """One version of the reference data, as plain rows"""
+
+    def __init__(self, version: int, bdcs: List[dict], omcs: List[dict], stations: List[dict], products: List[dict]) -> None:
+        self.version = version
+        self.rows = {"bdc": bdcs, "omc": omcs, "station": stations, "product": products}
+        self.by_id = {kind: {row["id"]: row for row in rows} for kind, rows in self.rows.items()}
+        # ids a price entry may reference: deleted stations and products stay readable by id but not usable
+        self.active_ids = {kind: frozenset(row["id"] for row in rows if row.get("deleted_at") is None) for kind, rows in self.rows.items()}
+        self._responses: Dict[Hashable, CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    def response(self, key: Hashable, build: Callable[[], bytes], compress: bool = False) -> CachedResponse:
+        """The serialised response for key, built (and gzipped if compress) on first use"""
+        cached = self._responses.get(key)
+        if cached is None:
+            body = build()
+            cached = CachedResponse(
+                body,
+                f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+                gzip.compress(body, compresslevel=9, mtime=0) if compress else None,
+            )
+            with self._lock:
+                self._responses.setdefault(key, cached)
+        return cached
+
+    def missing(self, kind: str, ids: Iterable[Optional[int]]) -> List[int]:
+        """The ids that are not active rows of kind"""
+        return [id for id in ids if id is not None and id not in self.active_ids[kind]]
+
+
+class ReferenceCache:
+    def __init__(self, ttl: float, timer: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._timer = timer
+        self._data: Optional[ReferenceData] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def current(self) -> Optional[ReferenceData]:
+        """The cached snapshot, or None when it was invalidated or is too old"""
+        data = self._data
+        if data is None or data.version != self.version or self._timer() - self._loaded_at >= self.ttl:
+            return None
+        return data
+
+    def snapshot(self, db_session: Session) -> ReferenceData:
+        """The cached snapshot, loaded with db_session when needed"""
+        data = self.current()
+        if data is not None:
+            return data
+        version = self.version
+        data = ReferenceCache.load(db_session, version)
+        with self._lock:
+            # an invalidation during the load means the rows may already be stale
+            if version == self.version:
+                self._data, self._loaded_at = data, self._timer()
+        return data
+
+    @staticmethod
+    def load(db_session: Session, version: int) -> ReferenceData:
+        def rows(*columns, where=None) -> List[dict]:
+            statement = select(*columns).order_by(columns[0])
+            if where is not None:
+                statement = statement.where(where)
+            return [dict(row._mapping) for row in db_session.execute(statement)]
+
+        return ReferenceData(
+            version,
+            bdcs=rows(BDC.id, BDC.name, BDC.created_at, where=BDC.deleted_at.is_(None)),
+            omcs=rows(OMC.id, OMC.name, OMC.created_at, where=OMC.deleted_at.is_(None)),
+            stations=rows(Station.id, Station.name, Station.location, Station.deleted_at),
+            products=rows(Product.id, Product.name, Product.deleted_at),
+        )
+
+    def invalidate(self) -> None:
+        """Drop the snapshot, called after every write to the reference tables"""
+        with self._lock:
+            self.version += 1
+            self._data = None
+
+    def require(self, db_session: Session, **ids: Optional[int]) -> None:
+        """
+        Raise ValueError unless every id is an active row, e.g. require(db, omc=1, station=2).
+        Ids missing from the snapshot are checked in the database, as another worker may
+        have added them; a hit there means the snapshot is stale and it is dropped.
+        """
+        data = self.snapshot(db_session)
+        for kind, id in ids.items():
+            if not data.missing(kind, [id]):
+                continue
+            model = REFERENCE_MODELS[kind]
+            if db_session.scalar(select(model.id).where(model.id == id, model.deleted_at.is_(None))) is None:
+                raise ValueError(f"{model.__name__} with ID {id} not found")
+            self.invalidate()
+
+
+async def reference_snapshot(db_session: Optional[AsyncSession] = None) -> ReferenceData:
+    """The cached snapshot for async routes, which only touch the database on a miss"""
+    data = reference_cache.current()
+    if data is None:
+        async with AsyncCreateDBSession(db_session) as db_session:
+            data = await db_session.run_sync(reference_cache.snapshot)
+    return data
+
+
+def serialise(adapter: TypeAdapter, value) -> bytes:
+    """Validate rows through the response schema and dump them to JSON bytes"""
+    return adapter.dump_json(adapter.validate_python(value))
+
+
+REFERENCE_MODELS = {"bdc": BDC, "omc": OMC, "station": Station, "product": Product}
+
+BDC_OMC_LIST = TypeAdapter(List[BDCOMCOut])
+BDC_OMC_ALL = TypeAdapter(BDCOMCAllOut)
+STATION_LIST = TypeAdapter(List[StationsOut])
+PRODUCT_LIST = TypeAdapter(List[ProductOut])
+PRODUCT = TypeAdapter(ProductOut)
+STATION = TypeAdapter(StationsOut)
+
+# One snapshot of BDCs, OMCs, stations and products per process
+reference_cache = ReferenceCache(settings.REFERENCE_CACHE_TTL)
@@ -1,3 +1,7 @@
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from core import setup
@@ -5,15 +9,98 @@ from core import setup
 
 class CreateDBSession:
     """
-    Create a database session
+    Create a database session from the process-wide sessionmaker,
+    or reuse the request-scoped session when one is passed in
     """
 
-    def __init__(self):
-        self.db_init = setup.DatabaseSetup()
-        self.db = self.db_init.get_session()
+    def __init__(self, db_session: Optional[Session] = None):
+        self.db = setup.database.get_session()
+        self.session = db_session
+        self.owns_session = db_session is None
 
     def __enter__(self) -> Session:
-        return self.db()
+        if self.owns_session:
+            self.session = self.db()
+        return self.session
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        self.db().close()
\ No newline at end of file
+        if self.owns_session:
+            self.session.close()
+
+
+def get_db_session() -> Generator[Session, None, None]:
+    """
+    FastAPI dependency providing one session per request.
+    The unit of work is committed when the route succeeds
+    and rolled back when it raises.
+    """
+    db_session = setup.database.get_session()()
+    try:
+        yield db_session
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        raise
+    finally:
+        db_session.close()
+
+
+class AsyncCreateDBSession:
+    """
+    Create an asyncio database session, or reuse the
+    request-scoped one when it is passed in
+    """
+
+    def __init__(self, db_session: Optional[AsyncSession] = None):
+        self.db = setup.async_database.get_session()
+        self.session = db_session
+        self.owns_session = db_session is None
+
+    async def __aenter__(self) -> AsyncSession:
+        if self.owns_session:
+            self.session = self.db()
+        return self.session
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        if self.owns_session:
+            await self.session.close()
+
+
+async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency providing one asyncio session per request,
+    committed or rolled back at the request boundary like get_db_session.
+    """
+    db_session = setup.async_database.get_session()()
+    try:
+        yield db_session
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+    finally:
+        await db_session.close()
+
+
+def on_commit(db_session: Optional[Union[Session, AsyncSession]], callback: Callable[[], Any]) -> None:
+    """
+    Run callback once the request session commits, e.g. to invalidate a cache
+    only when the new rows are visible to other sessions. It is dropped when
+    the session rolls back, and runs right away without a session or an open
+    transaction, the change being committed already.
+    """
+    if db_session is None or not db_session.in_transaction():
+        callback()
+        return
+    db_session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(db_session: Session) -> None:
+    for callback in db_session.info.pop("on_commit", []):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit(db_session: Session) -> None:
+    db_session.info.pop("on_commit", None)
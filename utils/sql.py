@@ -1,5 +1,9 @@
 
-from typing import Any,Dict, Union
+from typing import Any,Dict, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 
 from utils import session
@@ -8,7 +12,18 @@ from utils.common import get_user_data
 
 
 
-def add_object_to_database(item: Any) -> dict:
+def save_changes(database_session: Session, db_session: Optional[Session] = None) -> None:
+    """
+    Commit a session opened for this call, or only flush the request
+    session, which get_db_session commits at the request boundary
+    """
+    if db_session is None:
+        database_session.commit()
+    else:
+        database_session.flush()
+
+
+def add_object_to_database(item: Any, db_session: Optional[Session] = None) -> dict:
     """
     Add an item to the database
     Args:
@@ -18,13 +33,13 @@ def add_object_to_database(item: Any) -> dict:
     returns:
         bool
     """
-    with session.CreateDBSession() as database_session:
+    with session.CreateDBSession(db_session) as database_session:
         database_session.add(item)
-        database_session.commit()
+        save_changes(database_session, db_session)
         database_session.refresh(item)
         return item
     
-def get_all_objects_from_database(model: Any) -> Any:
+def get_all_objects_from_database(model: Any, db_session: Optional[Session] = None) -> Any:
     """
     Get all items from the database
     Args:
@@ -34,10 +49,10 @@ def get_all_objects_from_database(model: Any) -> Any:
     returns:
         Any
     """
-    with session.CreateDBSession() as database_session:
+    with session.CreateDBSession(db_session) as database_session:
         return database_session.query(model).all()
     
-def get_object_by_id_from_database(model: Any, id: int) -> Any:
+def get_object_by_id_from_database(model: Any, id: int, db_session: Optional[Session] = None) -> Any:
     """
     Get an item from the database by id
     Args:
@@ -48,7 +63,7 @@ def get_object_by_id_from_database(model: Any, id: int) -> Any:
     returns:
         Any
     """
-    with session.CreateDBSession() as database_session:
+    with session.CreateDBSession(db_session) as database_session:
         return database_session.query(model).filter(model.id == id).first()
     
 
@@ -56,7 +71,7 @@ def get_object_by_id_from_database(model: Any, id: int) -> Any:
         pass
 
 
-def update_object_in_database(db_class, query_param: str, value: Any, update_data: Dict[str, Any]):
+def update_object_in_database(db_class, query_param: str, value: Any, update_data: Dict[str, Any], db_session: Optional[Session] = None):
         """
         Update an object in the database.
         
@@ -67,18 +82,18 @@ def update_object_in_database(db_class, query_param: str, value: Any, update_dat
         :param update_data: A dictionary of fields to update
         :return: The updated instance or None if not found
         """
-        with session.CreateDBSession() as db_session:
-            instance = db_session.query(db_class).filter(getattr(db_class, query_param) == value).first()
+        with session.CreateDBSession(db_session) as database_session:
+            instance = database_session.query(db_class).filter(getattr(db_class, query_param) == value).first()
             if instance:
                 for key, val in update_data.items():
                     setattr(instance, key, val)
-                db_session.commit()
-                db_session.refresh(instance)
+                save_changes(database_session, db_session)
+                database_session.refresh(instance)
                 return instance
             return None
         
 
-def check_if_user_exist( user_email: Dict[str , Any], is_system_admin: bool = False) ->Union[Dict, None]:
+def check_if_user_exist( user_email: Dict[str , Any], is_system_admin: bool = False, db_session: Optional[Session] = None) ->Union[Dict, None]:
     """
     Check if a user exists in the database
     Args:
@@ -88,11 +103,26 @@ def check_if_user_exist( user_email: Dict[str , Any], is_system_admin: bool = Fa
     returns:
         Any
     """
-    with session.CreateDBSession() as db_session:
+    with session.CreateDBSession(db_session) as database_session:
         if is_system_admin:
-            user = db_session.query(SystemAdmin).filter(SystemAdmin.email == user_email['email']).first()
+            user = database_session.query(SystemAdmin).filter(SystemAdmin.email == user_email['email']).first()
         else:
-            user = db_session.query(User).filter(User.email == user_email['email']).first()
+            user = database_session.query(User).options(*User.load_profile("auth")).filter(User.email == user_email['email']).first()
         return user if user else None
 
-        
\ No newline at end of file
+
+async def check_if_user_exist_async(user_email: Dict[str, Any], is_system_admin: bool = False, db_session: Optional[AsyncSession] = None) -> Union[Dict, None]:
+    """
+    Check if a user exists in the database without blocking the event loop
+    Args:
+        db_session (AsyncSession): the request-scoped asyncio session
+        user_email(Dict): The user email
+    returns:
+        Any
+    """
+    statement = select(SystemAdmin) if is_system_admin else select(User).options(*User.load_profile("auth"))
+    model = SystemAdmin if is_system_admin else User
+    async with session.AsyncCreateDBSession(db_session) as database_session:
+        result = await database_session.execute(statement.filter(model.email == user_email['email']))
+        user = result.scalars().first()
+        return user if user else None